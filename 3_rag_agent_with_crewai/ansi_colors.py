@@ -11,7 +11,6 @@ from logging_config import (
     setup_logging,
 )
 
-setup_logging()
 logger = get_logger(__name__)
 
 # ANSI codes for colors:
@@ -25,4 +24,5 @@ RESET = "\033[0m"
 
 
 if __name__ == "__main__":
+    setup_logging()
     logger.info(f"{RED}Hello, World!{RESET}")
@@ -0,0 +1,203 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script answer_cache.py
+======================
+This script contains the semantic answer cache placed in front of
+`ask_question`.
+
+The incoming question is embedded and compared (cosine distance) with the
+questions already answered. When one is closer than `max_distance`, its
+answer is returned without running the agent. Entries expire after `ttl`
+seconds, at most `capacity` entries are kept (least recently used are
+evicted), and the whole cache is dropped when the fingerprint of the
+collection (ingestion manifest) changes.
+
+Questions repeated verbatim (after normalization) are answered from a
+dictionary without any embedding call. Answers are kept per `scope` (e.g. the
+document a question was restricted to) and only reused within it. The vector
+embedded by a missed `lookup` is kept until the answer is stored, so a
+question is embedded once.
+
+The answers are shared by all sessions: callers only use the cache for
+questions that do not depend on a conversation history.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases and collapses punctuation/whitespace of a question."""
+    return re.sub(r"[\W_]+", " ", question.lower()).strip()
+
+
+@dataclass
+class CachedAnswer:
+    """Answer stored in the cache."""
+
+    question: str
+    vector: np.ndarray
+    answer: str
+    created_at: float
+    scope: str = ""
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by question embeddings.
+
+    Args:
+        embed: Embedding function (list of texts -> list of vectors)
+        fingerprint: Returns the fingerprint of the collection (a change clears the cache)
+        max_distance: Maximum cosine distance to reuse an answer
+        ttl: Seconds an answer stays valid
+        capacity: Maximum number of answers kept
+        clock: Clock used for the TTL (injectable for benchmarks)
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], list[list[float]]],
+        fingerprint: Callable[[], str] = lambda: "",
+        max_distance: float = 0.08,
+        ttl: float = 24 * 3600.0,
+        capacity: int = 512,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.embed = embed
+        self.fingerprint = fingerprint
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.capacity = capacity
+        self.clock = clock
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._matrix: np.ndarray | None = None
+        self._keys: list[str] = []
+        self._scopes: np.ndarray | None = None
+        # Vectors of missed questions, waiting for their answer (at most `capacity`):
+        self._pending: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._fingerprint = fingerprint()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed([question])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_fingerprint(self) -> None:
+        """Clears the cache when the collection changed (caller holds the lock)."""
+        current = self.fingerprint()
+        if current != self._fingerprint:
+            if self._entries:
+                logger.info("Knowledge base changed: answer cache cleared")
+            self._entries.clear()
+            self._matrix = None
+            self._fingerprint = current
+
+    def _expire(self, now: float) -> None:
+        """Removes expired entries (caller holds the lock)."""
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _nearest(self, vector: np.ndarray, scope: str = "") -> tuple[str | None, float]:
+        """Returns the key of the closest question of a scope and its cosine distance (caller holds the lock)."""
+        if not self._entries:
+            return None, float("inf")
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key].vector for key in self._keys])
+            self._scopes = np.array([self._entries[key].scope for key in self._keys])
+        distances = 1.0 - self._matrix @ vector
+        distances[self._scopes != scope] = np.inf
+        best = int(np.argmin(distances))
+        return self._keys[best], float(distances[best])
+
+    @staticmethod
+    def _key(question: str, scope: str) -> str:
+        return f"{scope}\0{normalize_question(question)}" if scope else normalize_question(question)
+
+    def lookup(self, question: str, scope: str = "") -> str | None:
+        """
+        Returns the cached answer of a question (or of a close enough question).
+
+        Args:
+            question: Question of the user
+            scope: Scope of the question (e.g. its document id); answers of other scopes are ignored
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        key = self._key(question, scope)
+        with self._lock:
+            self._check_fingerprint()
+            self._expire(self.clock())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key].answer
+            if not self._entries:
+                self.misses += 1
+                return None
+
+        vector = self._embed(question)
+        with self._lock:
+            nearest, distance = self._nearest(vector, scope)
+            if nearest is not None and distance <= self.max_distance:
+                self._entries.move_to_end(nearest)
+                self.hits += 1
+                logger.info(f"Answer cache hit (distance={distance:.3f}): {self._entries[nearest].question!r}")
+                return self._entries[nearest].answer
+            self.misses += 1
+            self._pending[key] = vector
+            while len(self._pending) > self.capacity:
+                self._pending.popitem(last=False)
+            return None
+
+    def store(self, question: str, answer: str, scope: str = "") -> None:
+        """Stores the answer of a question (within a scope)."""
+        if not answer.strip():
+            return
+        key = self._key(question, scope)
+        with self._lock:
+            vector = self._pending.pop(key, None)
+        if vector is None:
+            vector = self._embed(question)
+        with self._lock:
+            self._check_fingerprint()
+            self._entries[key] = CachedAnswer(question, vector, answer, self.clock(), scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._matrix = None
+
+    def stats(self) -> dict[str, float]:
+        """Returns the hit/miss counters and the number of entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
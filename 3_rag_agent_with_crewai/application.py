@@ -18,20 +18,60 @@ uv run application.py
 UI with ReactPy
 ===============
 https://reactpy.dev/docs/index.html#
+
+The chat server (ui.py) streams every answer on the agent scheduler.
+`ask_question_async` is a library API for callers that already run an
+event loop; the server does not use it.
 """
 
+import asyncio
 import os
+import threading
+import time
+from collections.abc import Callable, Iterator
 from pathlib import Path
 from textwrap import dedent
+from typing import Any
 
+import httpx
 from ansi_colors import CYAN, GREEN, MAGENTA, RED, RESET, YELLOW
-from config_crewai import config
-from crewai import LLM, Agent, Crew, Task
+from answer_cache import SemanticAnswerCache
+from config_crewai import (
+    CHUNKER,
+    COLLECTION_NAME,
+    CONTEXT_COMPRESSION,
+    CONTEXT_TOKEN_BUDGET,
+    EMBEDDING_MODEL_ID,
+    RERANK_CANDIDATES,
+    RERANKER,
+    RETRIEVAL_MODE,
+    STORAGE_DIR,
+    TRACE_FILE,
+    TRACING,
+    config,
+    embedding_model,
+)
+from context_compressor import COMPRESSION_EXTRACTIVE, COMPRESSION_SUMMARIZE, ExtractiveCompressor
+from crewai import LLM, Agent, Task
+from crewai.rag.embeddings.factory import build_embedder
 from crewai_tools import RagTool
 from dotenv import find_dotenv, load_dotenv
+from fakes import FakeLLM
+from ingestion import MANIFEST_FILENAME, IncrementalIngestor, IngestionManifest, ManifestWatcher
 from logging_config import get_logger, setup_logging
+from pre_router import ROUTE_AGENT, PreRouter, RouteDecision
+from reranker import FeatureReranker
+from retrieval import HybridVectorStore, KnowledgeBaseTool, knowledge_base_store, open_hybrid_store, scoped_tool
+from session_engine import DEFAULT_SESSION_ID, SessionCrewEngine
+from streaming import FinalAnswerFilter, StreamMetrics, timed_stream
+from tracing import configure_tracing, span
+from vector_store import LOCAL_PROVIDER, open_vector_store
+
+try:  # Optional extra of crewAI (providers without a native client):
+    import litellm
+except ImportError:
+    litellm = None
 
-setup_logging()
 logger = get_logger(__name__)
 
 _ = load_dotenv(find_dotenv())
@@ -41,52 +81,100 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 os.environ["CREWAI_TRACING_ENABLED"] = "false"
 os.environ["OTEL_SDK_DISABLED"] = "true"
 
+# Local span recorder instead (RAG_TRACING=1, see tracing.py and trace_summary.py):
+if TRACING:
+    configure_tracing(TRACE_FILE)
+
 # Define the path to the PDF file:
 pdf_path = Path(__file__).parent / "data" / "Data_Science_Eddy_pt.pdf"
 
-# Name of the collection (use always the same name to reuse embeddings):
-COLLECTION_NAME = "rag_cv_eddy_collection"
+# Minimum similarity of a retrieved chunk (RagTool and pre-router):
+SIMILARITY_THRESHOLD = 0.70
 
 
 def load_rag_tool(
     pdf_path: Path,
     collection_name: str = COLLECTION_NAME,
     limit: int = 6,
-    similarity_threshold: float = 0.70,
-) -> RagTool:
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+) -> RagTool | KnowledgeBaseTool:
     """
     Loads and configures the RagTool with the PDF file.
 
-    ChromaDB is intelligent: if the collection already exists with this document,
-    it does NOT recreate the embeddings - it only loads the existing ones!
+    The ingestion manifest records the file hash, the chunker parameters and the
+    embedding model of the collection: an unchanged PDF costs a single stat call,
+    and a changed PDF only embeds the chunks whose content changed.
+
+    The RagTool (with its LLM summary of the chunks) is only used for dense
+    ChromaDB retrieval with CONTEXT_COMPRESSION="summarize" and no reranker;
+    otherwise the KnowledgeBaseTool returns the chunks, reranked with
+    RERANKER="features" and compressed extractively (no LLM call) with
+    CONTEXT_COMPRESSION="extractive".
 
     Args:
         pdf_path: Path to the PDF file
-        collection_name: Name of the collection in ChromaDB
+        collection_name: Name of the collection in the vector store
         limit: Number of chunks retrieved
         similarity_threshold: Similarity threshold for retrieval
 
     Returns:
-        RagTool configured and loaded with the PDF file
+        RagTool (or KnowledgeBaseTool, see above) loaded with the PDF file
     """
 
-    rag_tool = RagTool(
-        name="Knowledge base",
-        description=dedent(
-            """Knowledge base to be used to answer questions about the
-                              professional curriculum.
-                           """
-        ),
-        limit=limit,
-        similarity_threshold=similarity_threshold,
-        collection_name=collection_name,
-        config=config,
-        summarize=True,
+    description = dedent(
+        """Knowledge base to be used to answer questions about the
+                          professional curriculum.
+                       """
     )
+    use_rag_tool = (
+        config["vectordb"]["provider"] != LOCAL_PROVIDER  # The RagTool only supports ChromaDB and Qdrant
+        and RETRIEVAL_MODE == "dense"
+        and CONTEXT_COMPRESSION == COMPRESSION_SUMMARIZE
+        and RERANKER == "none"
+    )
+    if use_rag_tool:
+        rag_tool = RagTool(
+            name="Knowledge base",
+            description=description,
+            limit=limit,
+            similarity_threshold=similarity_threshold,
+            collection_name=collection_name,
+            config=config,
+            summarize=True,
+        )
+    else:
+        compressor = None
+        if CONTEXT_COMPRESSION == COMPRESSION_EXTRACTIVE:
+            compressor = ExtractiveCompressor(build_embedder(embedding_model), token_budget=CONTEXT_TOKEN_BUDGET)
+        rag_tool = KnowledgeBaseTool(
+            name="Knowledge base",
+            description=description,
+            store=open_hybrid_store(
+                open_vector_store(config, collection_name),
+                collection_name,
+                fusion=RETRIEVAL_MODE == "hybrid",
+                similarity_threshold=similarity_threshold,
+            ),
+            limit=limit,
+            similarity_threshold=similarity_threshold,
+            reranker=FeatureReranker(candidates=RERANK_CANDIDATES) if RERANKER == "features" else None,
+            compressor=compressor,
+        )
     logger.info(f"{CYAN}🔄 Loading knowledge base (in this case, my CV)...{RESET}")
-    logger.info(f"{CYAN}ChromaDB automatically reuses existing embeddings.{RESET}")
-    rag_tool.add(data_type="file", path=str(pdf_path))
-    logger.info(f"{GREEN}✅ Knowledge base loaded successfully!{RESET}")
+    ingestor = IncrementalIngestor(
+        store=knowledge_base_store(rag_tool, collection_name),
+        manifest=IngestionManifest(STORAGE_DIR / MANIFEST_FILENAME),
+        collection_name=collection_name,
+        embedding_model=EMBEDDING_MODEL_ID,
+        chunker=CHUNKER,
+    )
+    with span("ingest", path=str(pdf_path)) as ingest_span:
+        report = ingestor.ingest_file(pdf_path)
+        ingest_span.set(status=report.status, added=report.added, removed=report.removed, kept=report.kept)
+    logger.info(
+        f"{GREEN}✅ Knowledge base loaded successfully! ({report.status}: {report.added} chunks embedded, "
+        f"{report.removed} removed, {report.kept} reused){RESET}"
+    )
 
     return rag_tool
 
@@ -108,16 +196,44 @@ def create_llm(
 
     Returns:
         Configured instance of the LLM
+
+    Set RAG_FAKE_LLM=1 to use a local fake LLM that streams its answer on a
+    timer (RAG_FAKE_LLM_TOKEN_DELAY seconds per token), e.g. to try the
+    streaming chat offline.
     """
+    if os.getenv("RAG_FAKE_LLM") == "1":
+        return FakeLLM(stream=True, token_delay=float(os.getenv("RAG_FAKE_LLM_TOKEN_DELAY", "0.05")))
+
     return LLM(
         api_key=api_key,
         model=model,
         temperature=temperature,
         max_completion_tokens=max_completion_tokens,
+        stream=True,  # Tokens are forwarded to the chat as they arrive
     )
 
 
-def create_resume_agent(llm: LLM, rag_tool: RagTool) -> Agent:
+def configure_http_pool(max_connections: int = 500, max_keepalive_connections: int = 100) -> None:
+    """
+    Shares pooled HTTP clients for the LLM calls made through LiteLLM.
+
+    The native OpenAI provider of crewAI keeps its own (pooled) client inside
+    the LLM instance, which is shared by every session; this function gives the
+    LiteLLM fallback the same behaviour instead of one connection per call
+    (nothing to do when LiteLLM, an optional extra of crewAI, is not installed).
+
+    Args:
+        max_connections: Maximum number of simultaneous connections
+        max_keepalive_connections: Maximum number of idle connections kept open
+    """
+    if litellm is None:
+        return
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+    litellm.client_session = httpx.Client(limits=limits)
+    litellm.aclient_session = httpx.AsyncClient(limits=limits)
+
+
+def create_resume_agent(llm: LLM, rag_tool: RagTool | KnowledgeBaseTool) -> Agent:
     """
     Creates and configures the agent that will analyze the curriculum.
 
@@ -203,15 +319,11 @@ def create_resume_agent(llm: LLM, rag_tool: RagTool) -> Agent:
     )
 
 
-# Initialize the components:
-rag_tool = load_rag_tool(pdf_path)
-llm = create_llm(api_key=OPENAI_API_KEY)
-resume_agent = create_resume_agent(llm=llm, rag_tool=rag_tool)
-
-
-def ask_question(question: str) -> str:
-    """Ask a question to the RAG agent"""
-    task = Task(
+def build_question_task(question: str, agent: Agent, where: dict[str, Any] | None = None) -> Task:
+    """Builds the Task that answers one question of the user (restricted to the chunks matching `where`)"""
+    # The tools of a Task replace the tools of the agent for this question only:
+    tools = [scoped_tool(get_rag_tool(), get_knowledge_base_store(), where)] if where else None
+    return Task(
         description=dedent(
             f"""
             Respond to the following question in a natural and conversational way: {question}
@@ -237,22 +349,263 @@ def ask_question(question: str) -> str:
             professional curriculum."
         """
         ),
-        agent=resume_agent,
+        agent=agent,
+        tools=tools,
     )
 
-    crew = Crew(
-        agents=[resume_agent],
-        tasks=[task],
-        memory=True,  # By default in crewai text-embedding-3-small, enables short-term, long-term, and entity memory
-        verbose=False,
-        tracing=False,
+
+# =====================================
+# COMPONENTS (built once, on first use)
+# =====================================
+# Nothing heavy runs at import time: the PDF ingestion, the LLM client and the agent are
+# built by the first question, or ahead of it by `warm_up()` (called on server startup):
+_components: dict[str, object] = {}
+_components_lock = threading.RLock()
+
+
+def _component(name: str, factory: Callable[[], object]) -> object:
+    """
+    Returns the component `name`, building it with `factory` on first use.
+
+    Concurrent first calls wait for a single build (double-checked locking);
+    later calls do not take the lock.
+    """
+    component = _components.get(name)
+    if component is None:
+        with _components_lock:
+            component = _components.get(name)
+            if component is None:
+                start = time.perf_counter()
+                with span(f"component.{name}"):
+                    component = factory()
+                _components[name] = component
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                logger.info(f"{CYAN}Component '{name}' ready in {elapsed_ms:.0f} ms{RESET}")
+    return component
+
+
+def _build_llm() -> LLM:
+    configure_http_pool()
+    return create_llm(api_key=OPENAI_API_KEY)
+
+
+def get_rag_tool() -> RagTool | KnowledgeBaseTool:
+    """Returns the RagTool (ingesting the PDF on first use)"""
+    return _component("rag_tool", lambda: load_rag_tool(pdf_path))
+
+
+def get_knowledge_base_store() -> HybridVectorStore:
+    """Returns the store of the knowledge base (vector store and BM25 index)"""
+    return _component("knowledge_base_store", lambda: knowledge_base_store(get_rag_tool(), COLLECTION_NAME))
+
+
+def get_llm() -> LLM:
+    """Returns the LLM shared by every session"""
+    return _component("llm", _build_llm)
+
+
+def get_resume_agent() -> Agent:
+    """Returns the template agent (each session works on its own copy)"""
+    return _component("resume_agent", lambda: create_resume_agent(llm=get_llm(), rag_tool=get_rag_tool()))
+
+
+def get_session_engine() -> SessionCrewEngine:
+    """
+    Returns the engine that keeps one warm Crew (memory=True) per session.
+
+    By default crewAI uses text-embedding-3-small for the short-term, long-term
+    and entity memory, which are set up only once per session.
+    """
+    return _component(
+        "session_engine",
+        lambda: SessionCrewEngine(
+            agent_factory=lambda: get_resume_agent().copy(),  # Own Agent per session, same LLM client
+            task_factory=build_question_task,
+            max_sessions=64,
+            idle_ttl=900.0,
+        ),
     )
 
-    result = crew.kickoff()
-    return result
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Returns the cache of (semantically) repeated questions, dropped when the knowledge base changes"""
+    return _component(
+        "answer_cache",
+        lambda: SemanticAnswerCache(
+            embed=build_embedder(embedding_model),
+            fingerprint=ManifestWatcher(STORAGE_DIR / MANIFEST_FILENAME, COLLECTION_NAME),
+            max_distance=0.08,
+            ttl=24 * 3600.0,
+            capacity=512,
+        ),
+    )
+
+
+def _build_pre_router(store: HybridVectorStore) -> PreRouter:
+    return PreRouter(
+        search=store.similarities,
+        similarity_threshold=SIMILARITY_THRESHOLD,
+        lexical_search=store.lexical_search,  # Names and acronyms the dense search misses
+    )
+
+
+def get_pre_router() -> PreRouter:
+    """Returns the router that answers greetings and out-of-scope questions without the agent"""
+    return _component(
+        "pre_router",
+        lambda: _build_pre_router(get_knowledge_base_store()),
+    )
+
+
+def warm_up() -> None:
+    """Builds every component now instead of on the first question (e.g. on server startup)"""
+    start = time.perf_counter()
+    get_resume_agent()
+    get_session_engine()
+    get_answer_cache()
+    get_pre_router()
+    logger.info(f"{GREEN}✅ RAG agent warmed up in {time.perf_counter() - start:.2f} s{RESET}")
+
+
+def _document_scope(document_id: str | None) -> dict[str, Any] | None:
+    """Returns the metadata filter of a question scoped to one document"""
+    return {"document_id": document_id} if document_id else None
+
+
+def _route(question: str, where: dict[str, Any] | None) -> RouteDecision:
+    with span("pre_router") as route_span:
+        decision = get_pre_router().route(question, where)
+        route_span.set(route=decision.route)
+    return decision
+
+
+def _first_question(session_id: str) -> bool:
+    """Tells whether a question starts its session: only those are answered from (and stored in) the shared cache"""
+    return not get_session_engine().has_history(session_id)
+
+
+def _lookup_answer(question: str, document_id: str | None) -> str | None:
+    answer_cache = get_answer_cache()
+    with span("answer_cache.lookup") as lookup_span:
+        cached_answer = answer_cache.lookup(question, scope=document_id or "")
+        lookup_span.set(cache_hit=cached_answer is not None)
+    return cached_answer
+
+
+def _store_answer(question: str, answer: str, document_id: str | None) -> None:
+    with span("answer_cache.store"):
+        get_answer_cache().store(question, answer, scope=document_id or "")
+
+
+def ask_question(question: str, session_id: str = DEFAULT_SESSION_ID, document_id: str | None = None) -> str:
+    """Ask a question to the RAG agent (about one document of the collection when `document_id` is set)"""
+    with span("ask_question", session_id=session_id, document_id=document_id) as question_span:
+        where = _document_scope(document_id)
+        decision = _route(question, where)
+        if decision.route != ROUTE_AGENT:
+            question_span.set(answered_by=decision.route)
+            return decision.answer
+
+        # A follow-up question is answered from the history of its session, never from the cache:
+        cacheable = _first_question(session_id)
+        cached_answer = _lookup_answer(question, document_id) if cacheable else None
+        if cached_answer is not None:
+            question_span.set(answered_by="answer_cache")
+            return cached_answer
+
+        answer = str(get_session_engine().ask(question, session_id=session_id, where=where))
+        if cacheable:
+            _store_answer(question, answer, document_id)
+        question_span.set(answered_by="agent")
+        return answer
+
+
+async def ask_question_async(
+    question: str, session_id: str = DEFAULT_SESSION_ID, document_id: str | None = None
+) -> str:
+    """
+    Ask a question to the RAG agent on the native async path (no thread held per question).
+
+    Library API only: the chat server streams its answers with `ask_question_stream` on the
+    agent scheduler, which keeps the streaming and the backpressure of the scheduler.
+    """
+    with span("ask_question", session_id=session_id, document_id=document_id) as question_span:
+        where = _document_scope(document_id)
+        # The first call builds the components, and the routing and the cache lookup embed the
+        # question, so all of them are kept off the event loop (to_thread keeps the current span):
+        decision = await asyncio.to_thread(_route, question, where)
+        if decision.route != ROUTE_AGENT:
+            question_span.set(answered_by=decision.route)
+            return decision.answer
+
+        cacheable = await asyncio.to_thread(_first_question, session_id)
+        cached_answer = await asyncio.to_thread(_lookup_answer, question, document_id) if cacheable else None
+        if cached_answer is not None:
+            question_span.set(answered_by="answer_cache")
+            return cached_answer
+
+        session_engine = await asyncio.to_thread(get_session_engine)
+        answer = str(await session_engine.ask_async(question, session_id=session_id, where=where))
+        if cacheable:
+            await asyncio.to_thread(_store_answer, question, answer, document_id)
+        question_span.set(answered_by="agent")
+        return answer
+
+
+# Time-to-first-token and total time of the streamed answers:
+streaming_metrics = StreamMetrics()
+
+
+def _stream_answer(question: str, session_id: str, document_id: str | None) -> Iterator[str]:
+    where = _document_scope(document_id)
+    # Spans are not kept open across a yield (the stream may be resumed in another context):
+    decision = _route(question, where)
+    if decision.route != ROUTE_AGENT:
+        yield decision.answer
+        return
+
+    cacheable = _first_question(session_id)
+    cached_answer = _lookup_answer(question, document_id) if cacheable else None
+    if cached_answer is not None:
+        yield cached_answer
+        return
+
+    chunks = get_session_engine().ask_stream(question, session_id=session_id, where=where)
+    answer_filter = FinalAnswerFilter()
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration as stop:
+            result = stop.value
+            break
+        if text := answer_filter.feed(chunk):
+            yield text
+
+    answer = str(result)
+    if not answer_filter.started:
+        # The LLM answered without the ReAct marker (or did not stream):
+        yield answer
+    if cacheable:
+        _store_answer(question, answer, document_id)
+
+
+def ask_question_stream(
+    question: str, session_id: str = DEFAULT_SESSION_ID, document_id: str | None = None
+) -> Iterator[str]:
+    """Ask a question to the RAG agent, yielding the answer token by token"""
+    return timed_stream(_stream_answer(question, session_id, document_id), streaming_metrics, label=session_id)
+
+
+def close_session(session_id: str) -> None:
+    """Release the warm Crew of a session"""
+    session_engine = _components.get("session_engine")
+    if session_engine is not None:
+        session_engine.close_session(session_id)
 
 
 if __name__ == "__main__":
+    setup_logging()
+    warm_up()
     logger.info(
         f"{YELLOW}🤖 Welcome to the RAG Interactive Resume Analysis Agent! 🤖{RESET}"
     )
@@ -275,9 +628,10 @@ if __name__ == "__main__":
 
             # Process the question:
             logger.info(f"{CYAN}🔍 Processing your question...{RESET}")
-            result = ask_question(question)
             print(f"{CYAN}📋 ANSWER:{RESET}")
-            print(result)
+            for token in ask_question_stream(question):
+                print(token, end="", flush=True)
+            print()
 
         except KeyboardInterrupt:
             logger.info(f"{GREEN}👋 Ending... Goodbye!{RESET}")
@@ -0,0 +1,212 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_async_load.py
+==============================
+This script load-tests the two execution paths of the RAG agent against a
+local stub LLM server (OpenAI-compatible, fixed latency, no API costs):
+
+- threads: `SessionCrewEngine.ask` offloaded to one thread per in-flight
+  question (what `ui.py` did with `run_in_executor`)
+- asyncio: `SessionCrewEngine.ask_async` awaited on a single event loop
+
+For 10/100/500 concurrent sessions it reports wall time, throughput,
+latency percentiles and the peak number of OS threads.
+
+Run
+===
+uv run benchmark_async_load.py --sessions 10 100 500 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+
+from ansi_colors import CYAN, RESET, YELLOW
+from benchmark_utils import format_summary, summarize
+from crewai import LLM, Agent, Task
+from session_engine import SessionCrewEngine
+
+STUB_ANSWER = "Thought: I now know the final answer\nFinal Answer: He is a Senior Data Scientist."
+
+
+# ======================
+# STUB LLM SERVER (HTTP)
+# ======================
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: float) -> None:
+    """Answers OpenAI chat completion requests on a keep-alive connection."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            content_length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    content_length = int(value.strip())
+            if content_length:
+                await reader.readexactly(content_length)
+
+            # Simulated provider latency (the event loop keeps serving other requests):
+            await asyncio.sleep(latency)
+            body = json.dumps(
+                {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "stub",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": STUB_ANSWER},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+                }
+            ).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def run_stub_server(port: int, latency: float) -> None:
+    """Runs the stub LLM server forever (in a separate process)."""
+
+    async def serve() -> None:
+        server = await asyncio.start_server(
+            lambda r, w: _handle_connection(r, w, latency), "127.0.0.1", port, backlog=2048
+        )
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+# =========
+# LOAD TEST
+# =========
+def build_engine(base_url: str) -> SessionCrewEngine:
+    """Creates a session engine whose agents call the stub server."""
+    llm = LLM(model="openai/gpt-4o-mini", base_url=base_url, api_key="stub-key", temperature=0.0)
+
+    def agent_factory() -> Agent:
+        return Agent(
+            role="Expert assistant in professional curriculum analysis",
+            goal="Answer questions about the professional curriculum.",
+            backstory="You know the professional curriculum well.",
+            llm=llm,
+            verbose=False,
+            allow_delegation=False,
+        )
+
+    def task_factory(question: str, agent: Agent) -> Task:
+        return Task(
+            description=f"Respond to the following question: {question}",
+            expected_output="A natural and conversational response.",
+            agent=agent,
+        )
+
+    # Memory is disabled: the test isolates the LLM I/O path.
+    return SessionCrewEngine(agent_factory, task_factory, max_sessions=10_000, crew_kwargs={"memory": False})
+
+
+class ThreadCounter:
+    """Samples the number of live OS threads of the process."""
+
+    def __init__(self) -> None:
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "ThreadCounter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_threads(engine: SessionCrewEngine, sessions: int) -> tuple[list[float], float, int]:
+    """One thread per in-flight question."""
+
+    def ask(i: int) -> float:
+        start = time.perf_counter()
+        engine.ask(f"Question {i}", session_id=f"thread-{sessions}-{i}")
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadCounter() as counter:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            latencies = list(executor.map(ask, range(sessions)))
+        wall = time.perf_counter() - start
+    return latencies, wall, counter.peak
+
+
+def run_asyncio(engine: SessionCrewEngine, sessions: int) -> tuple[list[float], float, int]:
+    """All questions in flight on a single event loop."""
+
+    async def ask(i: int) -> float:
+        start = time.perf_counter()
+        await engine.ask_async(f"Question {i}", session_id=f"async-{sessions}-{i}")
+        return (time.perf_counter() - start) * 1000
+
+    async def main() -> list[float]:
+        return await asyncio.gather(*(ask(i) for i in range(sessions)))
+
+    with ThreadCounter() as counter:
+        start = time.perf_counter()
+        latencies = asyncio.run(main())
+        wall = time.perf_counter() - start
+    return latencies, wall, counter.peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 500], help="Concurrent sessions")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub LLM latency in seconds")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the stub LLM server")
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=run_stub_server, args=(args.port, args.latency), daemon=True)
+    server.start()
+    time.sleep(0.5)
+
+    try:
+        engine = build_engine(f"http://127.0.0.1:{args.port}/v1")
+        for sessions in args.sessions:
+            print(f"\n{CYAN}=== {sessions} concurrent sessions (stub latency {args.latency * 1000:.0f} ms) ==={RESET}")
+            for mode, runner in (("threads", run_threads), ("asyncio", run_asyncio)):
+                latencies, wall, peak_threads = runner(engine, sessions)
+                print(format_summary(f"{mode} latency", summarize(latencies)))
+                print(
+                    f"{YELLOW}{mode:<8} wall={wall:.2f}s throughput={sessions / wall:.1f} q/s "
+                    f"peak_threads={peak_threads}{RESET}"
+                )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_context_compression.py
+=======================================
+This script measures, per question, the tokens the agent LLM reads from one
+knowledge base tool call and the time spent to produce them:
+
+- "none": the retrieved chunks as they are
+- "extractive": the chunks through the `ExtractiveCompressor` (no LLM call)
+- "summarize" (`--summarize`): the LLM summary of `RagTool(summarize=True)`,
+  on the ChromaDB collection (one extra LLM call per tool call)
+
+Questions come from a query log (text or JSONL with a "question" field) or
+from the sample questions of `benchmark_pre_router.py`.
+
+Run
+===
+uv run benchmark_context_compression.py --budget 800
+uv run benchmark_context_compression.py --log queries.txt --summarize
+"""
+import argparse
+import time
+from pathlib import Path
+
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_pre_router import load_queries
+from benchmark_utils import format_summary, summarize
+from config_crewai import COLLECTION_NAME, config, embedding_model
+from context_compressor import ExtractiveCompressor
+from crewai.rag.embeddings.factory import build_embedder
+from crewai_tools import RagTool
+from retrieval import open_hybrid_store, relevant_hits
+from vector_store import open_vector_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", type=Path, default=None, help="Query log (text or JSONL)")
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks retrieved (limit of the tool)")
+    parser.add_argument("--budget", type=int, default=800, help="Token budget of the extractive compressor")
+    parser.add_argument("--similarity-threshold", type=float, default=0.70)
+    parser.add_argument("--summarize", action="store_true", help="Also measure RagTool(summarize=True)")
+    args = parser.parse_args()
+
+    questions = load_queries(args.log)
+    store = open_hybrid_store(
+        open_vector_store(config, COLLECTION_NAME), COLLECTION_NAME, similarity_threshold=args.similarity_threshold
+    )
+    compressor = ExtractiveCompressor(build_embedder(embedding_model), token_budget=args.budget)
+    rag_tool = None
+    if args.summarize:
+        rag_tool = RagTool(
+            collection_name=COLLECTION_NAME,
+            config=config,
+            limit=args.k,
+            similarity_threshold=args.similarity_threshold,
+            summarize=True,
+        )
+
+    tokens = {"none": [], "extractive": [], "summarize": []}
+    latencies = {"retrieval": [], "extractive": [], "summarize": []}
+    print(f"\n{CYAN}=== Tokens read by the agent per tool call (k={args.k}, budget={args.budget}) ==={RESET}")
+    print(f"{'raw':>6} {'kept':>6} {'':>7} {'latency':>10}  question")
+    for question in questions:
+        start = time.perf_counter()
+        hits = relevant_hits(store.search(question, args.k), args.similarity_threshold)
+        latencies["retrieval"].append((time.perf_counter() - start) * 1000)
+        if not hits:
+            print(f"{'-':>6} {'-':>6} {'-':>6}  (no relevant chunk) {question}")
+            continue
+
+        documents = [hit.document for hit in hits]
+        result = compressor.compress(question, documents)
+        tokens["none"].append(result.input_tokens)
+        tokens["extractive"].append(result.output_tokens)
+        latencies["extractive"].append(result.latency_ms)
+        line = (
+            f"{result.input_tokens:>6} {result.output_tokens:>6} (-{result.reduction:>4.0%}) "
+            f"{result.latency_ms:>7.1f} ms"
+        )
+
+        if rag_tool is not None:
+            start = time.perf_counter()
+            summary = rag_tool.run(query=question)
+            latencies["summarize"].append((time.perf_counter() - start) * 1000)
+            tokens["summarize"].append(compressor.count_tokens(summary))
+            line += f" | summarize {tokens['summarize'][-1]:>5} tokens {latencies['summarize'][-1]:>7.0f} ms"
+        print(f"{line}  {question}")
+
+    print(f"\n{CYAN}=== Summary ({len(tokens['none'])} questions with chunks) ==={RESET}")
+    print(format_summary("retrieval latency", summarize(latencies["retrieval"])))
+    print(format_summary("extractive latency", summarize(latencies["extractive"])))
+    if latencies["summarize"]:
+        print(format_summary("summarize latency", summarize(latencies["summarize"])))
+    total_none = sum(tokens["none"])
+    for mode in ("extractive", "summarize"):
+        if tokens[mode] and total_none:
+            print(
+                f"{YELLOW}{mode}: {sum(tokens[mode])} of {total_none} prompt tokens "
+                f"(-{1 - sum(tokens[mode]) / total_none:.0%}){RESET}"
+            )
+    print(f"\n{GREEN}✅ Benchmark finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_hybrid.py
+==========================
+This script compares dense and hybrid (BM25 + dense, RRF) retrieval on a
+labeled query set, against the real collection.
+
+The labeled set is a JSONL file, one query per line, with the text that a
+relevant chunk must contain (a string or a list of alternatives):
+
+    {"question": "Does he know PySpark?", "expected": "PySpark"}
+    {"question": "Where did he get his PhD?", "expected": ["Doutorado", "PhD"]}
+
+For each mode it reports hit@k (a relevant chunk among the chunks the tool
+returns), MRR, the queries without any relevant chunk (each one makes the
+agent call the tool again) and the retrieval latency.
+
+Run
+===
+uv run benchmark_hybrid.py --labels data/labeled_queries.jsonl --k 6
+"""
+import argparse
+import time
+from pathlib import Path
+
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_utils import format_summary, load_labels, summarize
+from config_crewai import COLLECTION_NAME, config
+from retrieval import open_hybrid_store, relevant_hits
+from vector_store import open_vector_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", type=Path, required=True, help="Labeled queries (JSONL)")
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks returned to the agent")
+    parser.add_argument("--similarity-threshold", type=float, default=0.70)
+    parser.add_argument("--verbose", action="store_true", help="Print the misses")
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    store = open_vector_store(config, COLLECTION_NAME)
+    for mode in ("dense", "hybrid"):
+        hybrid = open_hybrid_store(
+            store, COLLECTION_NAME, fusion=mode == "hybrid", similarity_threshold=args.similarity_threshold
+        )
+        hits_at_k, reciprocal_ranks, latencies, misses = 0, [], [], []
+        for question, expected in labels:
+            start = time.perf_counter()
+            hits = relevant_hits(hybrid.search(question, args.k), args.similarity_threshold)
+            latencies.append((time.perf_counter() - start) * 1000)
+            rank = next(
+                (
+                    position
+                    for position, hit in enumerate(hits, start=1)
+                    if any(text.lower() in hit.document.lower() for text in expected)
+                ),
+                None,
+            )
+            if rank is None:
+                misses.append(question)
+                reciprocal_ranks.append(0.0)
+            else:
+                hits_at_k += 1
+                reciprocal_ranks.append(1.0 / rank)
+
+        print(f"\n{CYAN}=== {mode} retrieval ({len(labels)} labeled queries, k={args.k}) ==={RESET}")
+        print(f"hit@{args.k}={hits_at_k / len(labels):.3f}  MRR={sum(reciprocal_ranks) / len(labels):.3f}")
+        print(f"{YELLOW}queries without a relevant chunk (tool retries): {len(misses)}{RESET}")
+        print(format_summary(f"{mode} latency", summarize(latencies)))
+        if args.verbose:
+            for question in misses:
+                print(f"  miss: {question}")
+    print(f"\n{GREEN}✅ Benchmark finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_import_time.py
+===============================
+This script is the regression gate of the server startup time. It imports
+the given modules in a fresh interpreter with `python -X importtime`, prints
+the slowest imports (cumulative time) and fails when:
+
+- the total import time of a module is above `--budget-ms`, or
+- importing `application` built any RAG component (PDF ingestion, LLM,
+  agent), which must only happen on first use or in `warm_up()`
+
+The best of `--repeat` runs is kept, so a cold disk cache does not fail it.
+
+Run
+===
+uv run benchmark_import_time.py --modules application ui --budget-ms 8000
+"""
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from ansi_colors import CYAN, GREEN, RED, RESET
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Printed by the child interpreter after the import, to check that nothing was built:
+COMPONENTS_PROBE = "import application; print('components=' + ','.join(sorted(application._components)))"
+
+
+@dataclass
+class ImportRecord:
+    """One line of the `-X importtime` report (microseconds)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportRecord]:
+    """
+    Parses the report written to stderr by `python -X importtime`.
+
+    Args:
+        stderr: Standard error of the child interpreter
+
+    Returns:
+        The import records, in the order of the report
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def total_ms(records: list[ImportRecord], module: str) -> float:
+    """Returns the cumulative import time of the top-level `module` (milliseconds)."""
+    for record in records:
+        if record.depth == 0 and record.module == module:
+            return record.cumulative_us / 1000
+    return 0.0
+
+
+def measure(module: str) -> tuple[list[ImportRecord], str]:
+    """Imports `module` in a fresh interpreter and returns its import records and stdout."""
+    code = COMPONENTS_PROBE if module == "application" else f"import {module}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SCRIPT_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr), completed.stdout
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["application", "ui"], help="Modules to import")
+    parser.add_argument("--budget-ms", type=float, default=8000.0, help="Maximum import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module (the best one is kept)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports printed")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        records, stdout = min(runs, key=lambda run: total_ms(run[0], module))
+        module_ms = total_ms(records, module)
+
+        print(f"\n{CYAN}=== import {module}: {module_ms:.0f} ms (best of {args.repeat}) ==={RESET}")
+        for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[: args.top]:
+            print(f"{record.cumulative_us / 1000:9.1f} ms  {record.self_us / 1000:8.1f} ms self  {record.module}")
+
+        if module_ms > args.budget_ms:
+            failures.append(f"import {module} took {module_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        for line in stdout.splitlines():
+            if line.startswith("components=") and line != "components=":
+                failures.append(f"import {module} built components at import time: {line.split('=', 1)[1]}")
+
+    if failures:
+        for failure in failures:
+            print(f"{RED}❌ {failure}{RESET}")
+        return 1
+    print(f"\n{GREEN}✅ Import time within budget ({args.budget_ms:.0f} ms), no component built at import{RESET}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_local_index.py
+===============================
+This script compares the local memory-mapped index (`local_index.py`) with
+the ChromaDB provider on synthetic collections (clustered unit vectors, like
+real embeddings), and reports for each size:
+
+- open time (the index is only mapped, ChromaDB opens its SQLite/segments)
+- recall@k against the exact top-k and query latency (p50/p99) for the
+  exact scan and for the IVF with several `nprobe` values
+- the same recall@k and latency for ChromaDB (HNSW)
+
+ChromaDB is skipped above `--chroma-max` vectors (its insertion dominates the
+run time). Nothing is sent to the embedding provider.
+
+Run
+===
+uv run benchmark_local_index.py --sizes 10000 100000 1000000 --dimensions 256
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_utils import summarize
+from local_index import LocalVectorIndex
+
+
+def synthetic_vectors(n: int, dimensions: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Returns `n` unit vectors drawn around `clusters` random centers."""
+    centers = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.6 * rng.standard_normal((n, dimensions)).astype(
+        np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    """Ground truth: the exact top-k rows of every query."""
+    truth = []
+    for query in queries:
+        scores = vectors @ query
+        truth.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    return truth
+
+
+def measure(search, queries: np.ndarray, truth: list[set[int]], k: int) -> tuple[float, dict[str, float]]:
+    """Runs the queries and returns recall@k and the latency summary (ms)."""
+    latencies, found = [], 0
+    for query, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        rows = search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(expected & set(rows))
+    return found / (len(queries) * k), summarize(latencies)
+
+
+def report(label: str, recall: float, latency: dict[str, float]) -> None:
+    print(f"{label:<24} recall@k={recall:.3f}  p50={latency['p50']:.3f} ms  p99={latency['p99']:.3f} ms")
+
+
+def bench_local(root: Path, vectors: np.ndarray, queries, truth, k: int, nprobes: list[int]) -> None:
+    n = len(vectors)
+    path = root / f"local_{n}"
+    # Filled with the IVF disabled, then trained once:
+    index = LocalVectorIndex(path, exact_threshold=n + 1)
+    for start in range(0, n, 50_000):
+        block = vectors[start : start + 50_000]
+        ids = [str(i) for i in range(start, start + len(block))]
+        index.upsert(ids, block, documents=ids)
+    index.exact_threshold = 0
+    start = time.perf_counter()
+    index.train()
+    print(f"{YELLOW}local IVF training: {time.perf_counter() - start:.2f} s{RESET}")
+
+    start = time.perf_counter()
+    index = LocalVectorIndex(path, exact_threshold=0)
+    print(f"{YELLOW}local open time: {(time.perf_counter() - start) * 1000:.2f} ms{RESET}")
+
+    exact = LocalVectorIndex(path, exact_threshold=n + 1)
+    report("local exact", *measure(lambda q, k: [r for r, _ in exact.search_rows(q, k)], queries, truth, k))
+    for nprobe in nprobes:
+        recall, latency = measure(
+            lambda q, k, nprobe=nprobe: [r for r, _ in index.search_rows(q, k, nprobe)], queries, truth, k
+        )
+        report(f"local IVF nprobe={nprobe}", recall, latency)
+
+
+def bench_chroma(root: Path, vectors: np.ndarray, queries, truth, k: int) -> None:
+    n = len(vectors)
+    path = root / f"chroma_{n}"
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"}, embedding_function=None)
+    start = time.perf_counter()
+    for block_start in range(0, n, 5_000):
+        block = vectors[block_start : block_start + 5_000]
+        collection.add(ids=[str(i) for i in range(block_start, block_start + len(block))], embeddings=block)
+    print(f"{YELLOW}chroma insertion: {time.perf_counter() - start:.2f} s{RESET}")
+    del client, collection
+
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.get_collection("bench", embedding_function=None)
+    collection.query(query_embeddings=[queries[0]], n_results=k)  # The segments are loaded lazily
+    print(f"{YELLOW}chroma open time (incl. first query): {(time.perf_counter() - start) * 1000:.2f} ms{RESET}")
+
+    def search(query: np.ndarray, k: int) -> list[int]:
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        return [int(i) for i in result["ids"][0]]
+
+    report("chroma HNSW", *measure(search, queries, truth, k))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dimensions", type=int, default=256, help="Dimensions of the synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per size")
+    parser.add_argument("--k", type=int, default=6, help="Number of neighbors (limit of the RagTool)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64], help="nprobe values")
+    parser.add_argument("--chroma-max", type=int, default=100_000, help="Largest size inserted in ChromaDB")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory(prefix="local_index_bench_") as tmp:
+        root = Path(tmp)
+        for n in args.sizes:
+            print(f"\n{CYAN}=== {n} vectors x {args.dimensions} dimensions ==={RESET}")
+            vectors = synthetic_vectors(n, args.dimensions, clusters=max(16, n // 1000), rng=rng)
+            noise = 0.05 * rng.standard_normal((args.queries, args.dimensions)).astype(np.float32)
+            queries = vectors[rng.integers(0, n, size=args.queries)] + noise
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+            truth = exact_top_k(vectors, queries, args.k)
+
+            bench_local(root, vectors, queries, truth, args.k, args.nprobe)
+            if n <= args.chroma_max:
+                bench_chroma(root, vectors, queries, truth, args.k)
+            else:
+                print(f"{YELLOW}chroma skipped (n > --chroma-max){RESET}")
+    print(f"\n{GREEN}✅ Benchmark finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
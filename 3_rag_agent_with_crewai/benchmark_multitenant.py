@@ -0,0 +1,221 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_multitenant.py
+===============================
+This script compares two layouts for serving many documents (CVs) with
+questions scoped to one of them, on synthetic embeddings (nothing is sent to
+the embedding provider):
+
+- one shared collection, every chunk tagged with its `document_id`, and the
+  search restricted with `where={"document_id": ...}` inside the index
+- one collection per document
+
+For the local index and for ChromaDB it reports the build time, the files
+on disk, the open file descriptors, the recall@k inside the document and the
+query latency (p50/p99). For the shared local index it also shows what a
+post-filter of a global top-k would return (queries left without k chunks
+of their document).
+
+Run
+===
+uv run benchmark_multitenant.py --documents 10000 --chunks-per-document 8
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_utils import summarize
+from local_index import LocalVectorIndex
+
+
+def synthetic_corpus(
+    documents: int, chunks_per_document: int, dimensions: int, rng: np.random.Generator
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns unit chunk vectors (similar documents, each with its own offset) and their document index."""
+    topics = rng.standard_normal((32, dimensions)).astype(np.float32)
+    centers = topics[rng.integers(0, len(topics), size=documents)]
+    centers += 0.5 * rng.standard_normal((documents, dimensions)).astype(np.float32)
+    owners = np.repeat(np.arange(documents), chunks_per_document)
+    vectors = centers[owners] + 0.8 * rng.standard_normal((len(owners), dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), owners
+
+
+def document_id(document: int) -> str:
+    return f"cv_{document:06d}"
+
+
+def exact_scope_top_k(vectors: np.ndarray, owners: np.ndarray, query: np.ndarray, doc: int, k: int) -> set[int]:
+    """Ground truth: the exact top-k chunks of one document."""
+    rows = np.flatnonzero(owners == doc)
+    scores = vectors[rows] @ query
+    return set(rows[np.argsort(-scores)[:k]].tolist())
+
+
+def disk_usage(path: Path) -> tuple[int, float]:
+    """Returns the number of files under a directory and the bytes they really use (MB)."""
+    files = [p for p in path.rglob("*") if p.is_file()]
+    return len(files), sum(p.stat().st_blocks * 512 for p in files) / 1e6
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def report(label: str, recall: float, latencies: list[float]) -> None:
+    latency = summarize(latencies)
+    print(f"{label:<34} recall@k={recall:.3f}  p50={latency['p50']:.3f} ms  p99={latency['p99']:.3f} ms")
+
+
+def report_storage(label: str, path: Path, build_seconds: float) -> None:
+    files, megabytes = disk_usage(path)
+    print(f"{YELLOW}{label}: built in {build_seconds:.2f} s, {files} files, {megabytes:.1f} MB on disk{RESET}")
+
+
+def bench_local(root: Path, vectors, owners, queries, query_docs, k: int, documents: int) -> None:
+    ids = [str(i) for i in range(len(vectors))]
+
+    # One shared index, filtered by document_id:
+    path = root / "local_shared"
+    start = time.perf_counter()
+    shared = LocalVectorIndex(path)
+    for block in range(0, len(vectors), 50_000):
+        rows = range(block, min(block + 50_000, len(vectors)))
+        block_ids = ids[rows.start : rows.stop]
+        metadatas = [{"document_id": document_id(owners[row]), "tenant": "default"} for row in rows]
+        shared.upsert(block_ids, vectors[rows.start : rows.stop], block_ids, metadatas)
+    report_storage("local shared index", path, time.perf_counter() - start)
+
+    latencies, found, post_filter_short = [], 0, 0
+    for query, doc in zip(queries, query_docs, strict=True):
+        truth = exact_scope_top_k(vectors, owners, query, doc, k)
+        start = time.perf_counter()
+        rows = shared.search_rows(query, k, where={"document_id": document_id(doc)})
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(truth & {row for row, _ in rows})
+        # What a post-filter of a large global top-k would keep:
+        global_rows = shared.search_rows(query, 200)
+        post_filter_short += sum(owners[row] == doc for row, _ in global_rows) < min(k, len(truth))
+    report("local shared + where", found / (len(queries) * k), latencies)
+    print(f"{YELLOW}post-filter of a global top-200: {post_filter_short}/{len(queries)} queries short of k{RESET}")
+
+    # One index per document (ids are global rows, so the recall is comparable):
+    path = root / "local_per_document"
+    start = time.perf_counter()
+    for doc in range(documents):
+        rows = np.flatnonzero(owners == doc)
+        doc_ids = [ids[row] for row in rows]
+        LocalVectorIndex(path / document_id(doc)).upsert(doc_ids, vectors[rows], doc_ids)
+    report_storage("local index per document", path, time.perf_counter() - start)
+
+    fds_before = open_fds()
+    sample = [LocalVectorIndex(path / document_id(doc)) for doc in range(min(100, documents))]
+    fds_per_index = (open_fds() - fds_before) / len(sample)
+    del sample
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    print(
+        f"{YELLOW}open files: {fds_per_index:.1f} per open index -> {fds_per_index * documents:.0f} to keep "
+        f"{documents} indexes open (limit {soft_limit}); the shared index keeps {fds_per_index:.1f}{RESET}"
+    )
+
+    latencies, found = [], 0
+    for query, doc in zip(queries, query_docs, strict=True):
+        truth = exact_scope_top_k(vectors, owners, query, doc, k)
+        start = time.perf_counter()
+        index = LocalVectorIndex(path / document_id(doc))  # Cannot keep them all open
+        rows = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(truth & {int(record["id"]) for record, _ in rows})
+    report("local per document (open+query)", found / (len(queries) * k), latencies)
+
+
+def bench_chroma(root: Path, vectors, owners, queries, query_docs, k: int, documents: int) -> None:
+    ids = [str(i) for i in range(len(vectors))]
+    path = root / "chroma_shared"
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.create_collection("shared", metadata={"hnsw:space": "cosine"}, embedding_function=None)
+    for block in range(0, len(vectors), 5_000):
+        rows = range(block, min(block + 5_000, len(vectors)))
+        collection.add(
+            ids=ids[rows.start : rows.stop],
+            embeddings=vectors[rows.start : rows.stop],
+            metadatas=[{"document_id": document_id(owners[row])} for row in rows],
+        )
+    report_storage("chroma shared collection", path, time.perf_counter() - start)
+
+    latencies, found = [], 0
+    for query, doc in zip(queries, query_docs, strict=True):
+        truth = exact_scope_top_k(vectors, owners, query, doc, k)
+        start = time.perf_counter()
+        result = collection.query(
+            query_embeddings=[query], n_results=k, where={"document_id": document_id(doc)}, include=[]
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(truth & {int(i) for i in result["ids"][0]})
+    report("chroma shared + where", found / (len(queries) * k), latencies)
+    del client, collection
+
+    path = root / "chroma_per_document"
+    start = time.perf_counter()
+    client = chromadb.PersistentClient(path=str(path))
+    for doc in range(documents):
+        rows = np.flatnonzero(owners == doc)
+        per_document = client.create_collection(
+            document_id(doc), metadata={"hnsw:space": "cosine"}, embedding_function=None
+        )
+        per_document.add(ids=[ids[r] for r in rows], embeddings=vectors[rows])
+    report_storage("chroma collection per document", path, time.perf_counter() - start)
+
+    fds_before = open_fds()
+    latencies, found = [], 0
+    for query, doc in zip(queries, query_docs, strict=True):
+        truth = exact_scope_top_k(vectors, owners, query, doc, k)
+        start = time.perf_counter()
+        per_document = client.get_collection(document_id(doc), embedding_function=None)
+        result = per_document.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len(truth & {int(i) for i in result["ids"][0]})
+    report("chroma per document (get+query)", found / (len(queries) * k), latencies)
+    print(f"{YELLOW}open files after querying {len(queries)} collections: +{open_fds() - fds_before}{RESET}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10_000, help="Number of documents (CVs)")
+    parser.add_argument("--chunks-per-document", type=int, default=8)
+    parser.add_argument("--dimensions", type=int, default=256, help="Dimensions of the synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of scoped queries")
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks (limit of the RagTool)")
+    parser.add_argument("--skip-chroma", action="store_true", help="Only benchmark the local index")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors, owners = synthetic_corpus(args.documents, args.chunks_per_document, args.dimensions, rng)
+    query_docs = rng.integers(0, args.documents, size=args.queries)
+    queries = np.stack([vectors[rng.choice(np.flatnonzero(owners == doc))] for doc in query_docs])
+    queries += 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(
+        f"\n{CYAN}=== {args.documents} documents x {args.chunks_per_document} chunks "
+        f"({len(vectors)} vectors x {args.dimensions} dimensions) ==={RESET}"
+    )
+    with tempfile.TemporaryDirectory(prefix="multitenant_bench_") as tmp:
+        root = Path(tmp)
+        bench_local(root, vectors, owners, queries, query_docs, args.k, args.documents)
+        if not args.skip_chroma:
+            bench_chroma(root, vectors, owners, queries, query_docs, args.k, args.documents)
+    print(f"\n{GREEN}✅ Benchmark finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
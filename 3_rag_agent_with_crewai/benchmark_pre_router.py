@@ -0,0 +1,98 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_pre_router.py
+==============================
+This script replays a query log through the pre-router and reports how many
+agent runs (and LLM calls) it saves, and how long the routing itself takes.
+
+The query log is a text file with one question per line, or a JSONL file
+with a "question" field per line. Without `--log`, a small built-in sample
+is replayed. The retrieval check runs against the real collection (the
+question embeddings go through the persistent embedding cache).
+
+An agent run costs at least `--llm-calls-per-run` LLM calls: the tool call,
+the summarization of the RagTool and the final answer.
+
+Run
+===
+uv run benchmark_pre_router.py --log queries.txt --llm-calls-per-run 3
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from application import get_pre_router
+from benchmark_utils import format_summary, summarize
+from pre_router import ROUTE_AGENT, ROUTES
+
+SAMPLE_QUERIES = [
+    "Hi!",
+    "Hello, how are you?",
+    "Who does this curriculum belong to?",
+    "What are the technical skills of this professional?",
+    "What is the academic formation of this professional?",
+    "Hi, which programming languages does he know?",
+    "What is the capital of France?",
+    "Can you give me a recipe for a chocolate cake?",
+    "Which companies did he work for?",
+    "Bom dia!",
+    "Does he have experience with LLMs and RAG?",
+    "Who won the last World Cup?",
+    "Thanks a lot!",
+    "Bye!",
+]
+
+
+def load_queries(path: Path | None) -> list[str]:
+    """Reads the questions of a query log (text or JSONL)."""
+    if path is None:
+        return list(SAMPLE_QUERIES)
+    queries = []
+    for raw_line in path.read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        queries.append(json.loads(line)["question"] if line.startswith("{") else line)
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", type=Path, default=None, help="Query log (text or JSONL)")
+    parser.add_argument("--llm-calls-per-run", type=int, default=3, help="LLM calls of one agent run")
+    parser.add_argument("--verbose", action="store_true", help="Print the route of every question")
+    args = parser.parse_args()
+
+    # Opens the real collection (and ingests the PDF if needed):
+    router = get_pre_router()
+    queries = load_queries(args.log)
+    routes: Counter[str] = Counter()
+    latencies = []
+    for question in queries:
+        start = time.perf_counter()
+        decision = router.route(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+        routes[decision.route] += 1
+        if args.verbose:
+            similarity = f"{decision.top_similarity:.3f}" if decision.top_similarity is not None else "-"
+            print(f"{decision.route:<13} sim={similarity:<6} {question}")
+
+    avoided = len(queries) - routes[ROUTE_AGENT]
+    print(f"\n{CYAN}=== Pre-router replay: {len(queries)} questions ==={RESET}")
+    for route in ROUTES:
+        print(f"{route:<13} {routes[route]:>6} ({routes[route] / max(len(queries), 1):.0%})")
+    print(format_summary("routing latency", summarize(latencies)))
+    print(f"{YELLOW}Agent runs avoided: {avoided} of {len(queries)}{RESET}")
+    print(
+        f"{GREEN}LLM calls saved: >= {avoided * args.llm_calls_per_run} "
+        f"(of >= {len(queries) * args.llm_calls_per_run} without the pre-router){RESET}"
+    )
+
+
+if __name__ == "__main__":
+    main()
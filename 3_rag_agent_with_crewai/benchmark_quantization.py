@@ -0,0 +1,138 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_quantization.py
+================================
+This script compares the storage modes of the local index (`local_index.py`)
+for every Matryoshka dimension and quantization mode ("none", "int8",
+"binary" with rescoring):
+
+- index size on disk and bytes per vector
+- memory footprint of a query: bytes scanned (float vectors or codes) plus
+  the float rows paged in for the rescoring
+- recall@k against the exact top-k of the full-precision, full-dimension
+  vectors, and the query latency (p50/p99)
+
+Vectors come from the embedding cache (`--from-cache`, real
+`text-embedding-3-large` vectors, the only ones where the Matryoshka
+truncation is meaningful) or are synthetic (clustered unit vectors). The
+queries are held-out vectors with a little noise. Nothing is sent to the
+embedding provider.
+
+Run
+===
+uv run benchmark_quantization.py --from-cache --dimensions 3072 1024 256
+uv run benchmark_quantization.py --size 100000 --dimensions 3072 --rescore 4 8 16
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_local_index import synthetic_vectors
+from benchmark_utils import summarize
+from config_crewai import STORAGE_DIR
+from embedding_cache import CACHE_FILENAME
+from local_index import LocalVectorIndex
+from quantization import QUANTIZATION_MODES, QUANTIZATION_NONE, code_bytes
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def cached_vectors(cache_path: Path, model: str, limit: int) -> np.ndarray:
+    """Reads up to `limit` vectors of one model from the embedding cache (read-only)."""
+    conn = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT vector FROM embeddings WHERE model = ? LIMIT ?", (model, limit)).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        raise SystemExit(f"No vector of {model} in {cache_path}")
+    return normalize(np.stack([np.frombuffer(blob, dtype=np.float32) for (blob,) in rows]))
+
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Matryoshka truncation: the first `dimensions` components, renormalized."""
+    return normalize(np.ascontiguousarray(vectors[:, :dimensions]))
+
+
+def disk_megabytes(path: Path) -> float:
+    """Returns the bytes really used by the files of a directory (MB)."""
+    return sum(p.stat().st_blocks * 512 for p in path.rglob("*") if p.is_file()) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-cache", action="store_true", help="Use the vectors of the embedding cache")
+    parser.add_argument("--model", default="openai/text-embedding-3-large", help="Model of the cached vectors")
+    parser.add_argument("--size", type=int, default=50_000, help="Number of vectors (synthetic, or cache limit)")
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[3072, 1024, 256], help="Matryoshka sizes")
+    parser.add_argument("--modes", nargs="+", choices=QUANTIZATION_MODES, default=list(QUANTIZATION_MODES))
+    parser.add_argument("--rescore", type=int, nargs="+", default=[8], help="Candidates per result rescored")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks (limit of the RagTool)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.from_cache:
+        vectors = cached_vectors(STORAGE_DIR / CACHE_FILENAME, args.model, args.size + args.queries)
+    else:
+        vectors = synthetic_vectors(args.size + args.queries, max(args.dimensions), 256, rng)
+    queries = vectors[-args.queries :] + 0.02 * rng.standard_normal((args.queries, vectors.shape[1])).astype(
+        np.float32
+    )
+    queries = normalize(queries)
+    vectors = vectors[: -args.queries]
+    n, full_dimensions = vectors.shape
+    ids = [str(i) for i in range(n)]
+
+    # Ground truth: exact top-k with the full-precision, full-dimension vectors:
+    truth = [set(np.argsort(-(vectors @ query))[: args.k].tolist()) for query in queries]
+
+    print(f"\n{CYAN}=== {n} vectors x {full_dimensions} dimensions, {len(queries)} queries, k={args.k} ==={RESET}")
+    print(
+        f"{'dims':>5} {'mode':<7} {'rescore':>7} {'disk MB':>8} {'B/vector':>8} {'scan MB':>8} "
+        f"{'recall@k':>8} {'p50 ms':>7} {'p99 ms':>7}"
+    )
+    with tempfile.TemporaryDirectory(prefix="quantization_bench_") as tmp:
+        for dimensions in args.dimensions:
+            if dimensions > full_dimensions:
+                print(f"{YELLOW}skipping {dimensions} dimensions (vectors have {full_dimensions}){RESET}")
+                continue
+            matrix, matrix_queries = truncate(vectors, dimensions), truncate(queries, dimensions)
+            for mode in args.modes:
+                path = Path(tmp) / f"{dimensions}_{mode}"
+                # Exact scan (no IVF), so the numbers isolate the storage mode:
+                index = LocalVectorIndex(path, exact_threshold=n + 1, quantization=mode)
+                for start in range(0, n, 50_000):
+                    block_ids = ids[start : start + 50_000]
+                    index.upsert(block_ids, matrix[start : start + 50_000], block_ids)
+                for rescore in args.rescore if mode != QUANTIZATION_NONE else [0]:
+                    index.rescore = rescore
+                    latencies, found = [], 0
+                    for query, expected in zip(matrix_queries, truth, strict=True):
+                        start = time.perf_counter()
+                        rows = index.search_rows(query, args.k)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        found += len(expected & {row for row, _ in rows})
+                    row_bytes = code_bytes(mode, dimensions) or 4 * dimensions
+                    scan_bytes = n * row_bytes + (args.k * rescore * 4 * dimensions if rescore else 0)
+                    latency = summarize(latencies)
+                    print(
+                        f"{dimensions:>5} {mode:<7} {rescore or '-':>7} {disk_megabytes(path):>8.1f} "
+                        f"{row_bytes:>8} {scan_bytes / 1e6:>8.1f} {found / (len(queries) * args.k):>8.3f} "
+                        f"{latency['p50']:>7.2f} {latency['p99']:>7.2f}"
+                    )
+    print(f"{YELLOW}disk MB includes the float vectors kept for the rescoring and the records{RESET}")
+    print(f"\n{GREEN}✅ Benchmark finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_rag.py
+=======================
+This script is the end-to-end regression benchmark of the RAG agent. It
+runs fully offline (fake embedder and fake LLM of `fakes.py`) in a
+temporary storage directory, and for every corpus size:
+
+1. generates a synthetic CV corpus (text files with the usual CV headings)
+   and labeled queries (a question and the text its chunk must contain)
+2. ingests it with `bulk_ingest` and reports the throughput (docs/s,
+   chunks/s, tokens/s)
+3. builds the tool with `load_rag_tool` (chunker, vector store, retrieval
+   mode, reranker and compression from `config_crewai.py` / RAG_* env vars)
+   and reports the retrieval latency (p50/p95/p99), hit@k and MRR, and the
+   latency of the tool call as the agent makes it
+4. answers questions with `ask_question` (pre-router, answer cache, session
+   engine, one tool call of the fake LLM), cold and then repeated (answer
+   cache hits)
+
+Unlike the application, the benchmark defaults to the hybrid retrieval and
+the extractive compression (the LLM summary would call the real LLM). The
+fake vectors carry no semantics: the retrieval quality measures the lexical
+side of the hybrid retrieval, and the latencies measure the stack itself,
+not the provider. The results are written as JSON (`--output`); with
+`--baseline`, the main metrics are compared with a previous run.
+
+Run
+===
+uv run benchmark_rag.py --documents 10 100 1000 --output rag_bench.json
+RAG_CHUNKER=cv_sections uv run benchmark_rag.py --baseline rag_bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# Offline and isolated: everything crewAI and the RAG stack persist goes to a temporary
+# directory (an absolute CREWAI_STORAGE_DIR is used as is by crewAI), set before the
+# configuration of the application is imported:
+os.environ["CREWAI_STORAGE_DIR"] = str(Path(tempfile.mkdtemp(prefix="rag_bench_")) / "storage")
+os.environ["RAG_FAKE_EMBEDDINGS"] = "1"
+os.environ.setdefault("RAG_VECTORDB_PROVIDER", "local")
+os.environ.setdefault("RAG_RETRIEVAL_MODE", "hybrid")
+os.environ.setdefault("RAG_CONTEXT_COMPRESSION", "extractive")  # "summarize" calls the real LLM
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+
+import application
+import config_crewai
+from ansi_colors import CYAN, GREEN, RED, RESET, YELLOW
+from benchmark_utils import format_summary, summarize
+from bulk_ingest import bulk_ingest
+from fakes import FAKE_EMBEDDER_SPEC, FakeLLM
+from logging_config import setup_logging
+from retrieval import knowledge_base_store, relevant_hits
+from session_engine import SessionCrewEngine
+
+# Names and words of the synthetic CVs:
+FIRST_NAMES = (
+    "Ana", "Bruno", "Carla", "Diego", "Elisa", "Fabio", "Gabriela", "Heitor", "Isabela", "Joao", "Karen", "Lucas",
+    "Marina", "Nicolas", "Olivia", "Pedro", "Rafaela", "Samuel", "Tatiana", "Vitor",
+)  # fmt: skip
+LAST_NAMES = (
+    "Almeida", "Barbosa", "Cardoso", "Dias", "Esteves", "Ferreira", "Gomes", "Henriques", "Lima", "Moreira",
+    "Nunes", "Oliveira", "Pereira", "Ribeiro", "Santos", "Teixeira", "Vieira",
+)  # fmt: skip
+COMPANY_PREFIXES = ("Nova", "Alpha", "Geo", "Quant", "Lumi", "Terra", "Vector", "Orbi", "Datum", "Helio", "Cyber")
+COMPANY_SUFFIXES = ("tek", "soft", "data", "logic", "metrics", "labs", "sense", "works", "mind", "nexus")
+COMPANY_KINDS = ("Analytics", "Consulting", "Bank", "Energy", "Health", "Retail", "Insurance", "Telecom")
+ROLES = (
+    "Data Scientist", "Senior Data Scientist", "Machine Learning Engineer", "Data Engineer", "Data Analyst",
+    "NLP Engineer", "Research Scientist", "MLOps Engineer",
+)  # fmt: skip
+SKILLS = (
+    "Python", "PySpark", "SQL", "TensorFlow", "PyTorch", "Docker", "Kubernetes", "Airflow", "LangChain", "CrewAI",
+    "FastAPI", "Scikit-learn", "Pandas", "Databricks", "Snowflake", "dbt", "Kafka", "Terraform", "MLflow", "Rust",
+)  # fmt: skip
+UNIVERSITIES = (
+    "Universidade Federal do Espirito Santo", "Universidade de Sao Paulo", "Universidade Estadual de Campinas",
+    "Universidade Federal de Minas Gerais", "Universidade Federal do Rio de Janeiro", "Universidade de Brasilia",
+)  # fmt: skip
+DEGREES = ("Doutorado em Fisica", "Mestrado em Estatistica", "Graduacao em Engenharia", "Mestrado em Computacao")
+TASKS = (
+    "modelos de classificacao de documentos", "pipelines de dados em tempo real", "agentes RAG para atendimento",
+    "previsao de demanda", "deteccao de fraudes", "sistemas de recomendacao", "visao computacional industrial",
+)  # fmt: skip
+
+
+def synthetic_cv(index: int, rng: random.Random) -> tuple[str, list[dict[str, Any]]]:
+    """
+    Returns the text of one synthetic CV and its labeled queries.
+
+    Args:
+        index: Number of the CV
+        rng: Random generator of the corpus
+
+    Returns:
+        (text, [{"question", "expected"}])
+    """
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    jobs = []
+    year = 2024
+    for _ in range(rng.randint(2, 4)):
+        company = f"{rng.choice(COMPANY_PREFIXES)}{rng.choice(COMPANY_SUFFIXES)} {rng.choice(COMPANY_KINDS)}"
+        start = year - rng.randint(1, 4)
+        jobs.append((start, year, rng.choice(ROLES), company, rng.choice(TASKS)))
+        year = start
+    skills = rng.sample(SKILLS, 6)
+    university, degree = rng.choice(UNIVERSITIES), rng.choice(DEGREES)
+
+    lines = [name.upper(), jobs[0][2], "", "Resumo"]
+    lines.append(f"Profissional com {2024 - year} anos de experiencia em ciencia de dados e {jobs[0][4]}.")
+    lines += ["", "Experiência Profissional"]
+    for start, end, role, company, task in jobs:
+        lines.append(f"{start} - {end} {role}, {company}")
+        lines.append(f"Responsavel por {task} com {rng.choice(skills)} e {rng.choice(skills)}.")
+    lines += ["", "Formação Acadêmica", f"{year - 6} - {year - 2} {degree}, {university}", "", "Habilidades"]
+    lines += [f"• {skill}" for skill in skills]
+    lines += ["", "Idiomas", "• Portugues (nativo)", f"• Ingles ({rng.choice(('fluente', 'avancado'))})"]
+
+    _, _, role, company, _ = rng.choice(jobs)
+    queries = [
+        {"question": f"Where did {name} work as {role}?", "expected": company},
+        {"question": f"Which university did {name} attend?", "expected": university},
+        {"question": f"Does {name} know {skills[0]}?", "expected": skills[0]},
+    ]
+    return "\n".join(lines) + "\n", queries
+
+
+def write_corpus(directory: Path, documents: int, seed: int) -> tuple[list[Path], list[dict[str, Any]]]:
+    """Writes a synthetic corpus and returns its files and labeled queries."""
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    files, labels = [], []
+    for index in range(documents):
+        text, queries = synthetic_cv(index, rng)
+        path = directory / f"cv_{index:06d}.txt"
+        path.write_text(text, encoding="utf-8")
+        files.append(path)
+        labels.extend(queries)
+    return files, labels
+
+
+def rank_of(documents: list[str], expected: str) -> int | None:
+    """Returns the 1-based rank of the first document containing `expected`."""
+    return next((rank for rank, text in enumerate(documents, start=1) if expected.lower() in text.lower()), None)
+
+
+def run_corpus(documents: int, args: argparse.Namespace, root: Path) -> dict[str, Any]:
+    """Runs the ingestion, retrieval and end-to-end benchmarks on one corpus size."""
+    files, labels = write_corpus(root / f"corpus_{documents}", documents, args.seed)
+    labels = random.Random(args.seed).sample(labels, min(args.queries, len(labels)))
+    collection_name = f"bench_rag_{documents}"
+    print(f"\n{CYAN}=== {documents} documents, {len(labels)} labeled queries ==={RESET}")
+
+    # 1. Ingestion throughput:
+    start = time.perf_counter()
+    writer = bulk_ingest(files, collection_name=collection_name, workers=args.workers, progress_every=3600.0)
+    seconds = time.perf_counter() - start
+    ingestion = {
+        "seconds": seconds,
+        "documents": writer.docs,
+        "chunks": writer.chunks,
+        "tokens": writer.tokens,
+        "docs_per_s": writer.docs / seconds,
+        "chunks_per_s": writer.chunks / seconds,
+        "tokens_per_s": writer.tokens / seconds,
+    }
+    print(
+        f"{YELLOW}ingestion: {writer.docs} docs, {writer.chunks} chunks in {seconds:.2f} s "
+        f"({ingestion['docs_per_s']:.1f} docs/s, {ingestion['chunks_per_s']:.1f} chunks/s){RESET}"
+    )
+
+    # 2. Retrieval, with the tool configured like the application:
+    start = time.perf_counter()
+    tool = application.load_rag_tool(files[0], collection_name=collection_name, limit=args.k)
+    load_ms = (time.perf_counter() - start) * 1000
+    store = knowledge_base_store(tool, collection_name)
+    search_ms, tool_ms, reciprocal_ranks, tool_hits = [], [], [], 0
+    for label in labels:
+        start = time.perf_counter()
+        hits = relevant_hits(store.search(label["question"], args.k), application.SIMILARITY_THRESHOLD)
+        search_ms.append((time.perf_counter() - start) * 1000)
+        rank = rank_of([hit.document for hit in hits], label["expected"])
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+        start = time.perf_counter()
+        output = tool.run(query=label["question"])
+        tool_ms.append((time.perf_counter() - start) * 1000)
+        tool_hits += label["expected"].lower() in str(output).lower()
+    retrieval = {
+        "load_rag_tool_ms": load_ms,
+        "search_ms": summarize(search_ms),
+        "tool_ms": summarize(tool_ms),
+        f"hit@{args.k}": sum(rr > 0 for rr in reciprocal_ranks) / len(labels),
+        "mrr": sum(reciprocal_ranks) / len(labels),
+        "tool_hit_rate": tool_hits / len(labels),
+    }
+    print(format_summary("search", retrieval["search_ms"]))
+    print(format_summary("tool call", retrieval["tool_ms"]))
+    print(
+        f"{YELLOW}hit@{args.k}={retrieval[f'hit@{args.k}']:.3f}  MRR={retrieval['mrr']:.3f}  "
+        f"expected text in the tool output: {retrieval['tool_hit_rate']:.3f}{RESET}"
+    )
+
+    # 3. End to end, through the components of the application (fake LLM calling the tool once, crew
+    # memory on the fake embedder); the other components are built by the application as usual:
+    end_to_end: dict[str, Any] = {}
+    if args.e2e_questions:
+        application._components.clear()
+        application._components.update(
+            rag_tool=tool,
+            knowledge_base_store=store,
+            llm=FakeLLM(tool_name=tool.name, tool_query=labels[0]["question"]),
+            session_engine=SessionCrewEngine(
+                agent_factory=lambda: application.get_resume_agent().copy(),
+                task_factory=application.build_question_task,
+                crew_kwargs={"embedder": FAKE_EMBEDDER_SPEC},
+            ),
+        )
+        questions = [label["question"] for label in labels[: args.e2e_questions]]
+        for phase in ("cold", "repeated"):
+            latencies = []
+            for question in questions:
+                start = time.perf_counter()
+                application.ask_question(question, session_id=f"bench_{documents}")
+                latencies.append((time.perf_counter() - start) * 1000)
+            end_to_end[f"{phase}_ms"] = summarize(latencies)
+            print(format_summary(f"ask_question ({phase})", end_to_end[f"{phase}_ms"]))
+        end_to_end["pre_router"] = application.get_pre_router().stats()
+        end_to_end["answer_cache"] = application.get_answer_cache().stats()
+        application._components.clear()
+
+    return {"documents": documents, "ingestion": ingestion, "retrieval": retrieval, "end_to_end": end_to_end}
+
+
+# Metrics compared with the baseline (path in the result of one corpus, True when higher is better):
+COMPARED_METRICS = (
+    (("ingestion", "docs_per_s"), True),
+    (("retrieval", "search_ms", "p95"), False),
+    (("retrieval", "tool_ms", "p95"), False),
+    (("retrieval", "mrr"), True),
+    (("end_to_end", "cold_ms", "p95"), False),
+    (("end_to_end", "repeated_ms", "p95"), False),
+)
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> int:
+    """Prints the change of the main metrics against a baseline and returns the number of regressions."""
+    previous = {run["documents"]: run for run in baseline["runs"]}
+    regressions = 0
+    print(f"\n{CYAN}=== Comparison with the baseline ({baseline['config']}) ==={RESET}")
+    for run in results["runs"]:
+        old_run = previous.get(run["documents"])
+        if old_run is None:
+            continue
+        for path, higher_is_better in COMPARED_METRICS:
+            new, old = run, old_run
+            for key in path:
+                new, old = (new or {}).get(key), (old or {}).get(key)
+            if not isinstance(new, int | float) or not isinstance(old, int | float) or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            color = RED if worse > tolerance else GREEN
+            regressions += worse > tolerance
+            print(
+                f"{color}{run['documents']:>6} docs  {'.'.join(path):<30} {old:>10.3f} -> {new:>10.3f} "
+                f"({change:+.1%}){RESET}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, nargs="+", default=[10, 100], help="Corpus sizes (CVs)")
+    parser.add_argument("--queries", type=int, default=100, help="Labeled queries per corpus")
+    parser.add_argument("--e2e-questions", type=int, default=20, help="Questions asked end to end (0: skip)")
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks returned to the agent")
+    parser.add_argument("--workers", type=int, default=2, help="Parsing processes of the ingestion")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_rag_results.json"), help="JSON results")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary storage directory")
+    args = parser.parse_args()
+
+    root = Path(os.environ["CREWAI_STORAGE_DIR"]).parent
+    if config_crewai.CONTEXT_COMPRESSION == "summarize":
+        shutil.rmtree(root, ignore_errors=True)
+        sys.exit("RAG_CONTEXT_COMPRESSION=summarize calls the real LLM: use extractive or none")
+
+    setup_logging()
+    benchmark_config = {
+        "vectordb": config_crewai.VECTORDB_PROVIDER,
+        "chunker": config_crewai.CHUNKER,
+        "retrieval": config_crewai.RETRIEVAL_MODE,
+        "reranker": config_crewai.RERANKER,
+        "compression": config_crewai.CONTEXT_COMPRESSION,
+        "quantization": config_crewai.vectordb["config"].get("quantization", "none"),
+        "k": args.k,
+        "seed": args.seed,
+    }
+    results: dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": benchmark_config,
+        "runs": [],
+    }
+    try:
+        for documents in args.documents:
+            results["runs"].append(run_corpus(documents, args, root))
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\n{GREEN}✅ Results written to {args.output}{RESET}")
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print(f"{RED}{regressions} metrics regressed by more than {args.tolerance:.0%}{RESET}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
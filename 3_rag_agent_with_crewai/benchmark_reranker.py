@@ -0,0 +1,87 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_reranker.py
+============================
+This script measures the feature reranker (`reranker.py`) on a labeled
+query set (same JSONL format as `benchmark_hybrid.py`), against the real
+collection:
+
+- "retrieval": the `k` best chunks of the retrieval
+- "reranked": `--candidates` chunks retrieved, reranked down to `k`
+
+For each it reports precision@k (relevant chunks among the `k` returned),
+hit@k and MRR, the tokens of the `k` chunks, and the latency of the
+reranking alone.
+
+Run
+===
+uv run benchmark_reranker.py --labels data/labeled_queries.jsonl --k 6 --candidates 50
+"""
+import argparse
+import time
+from pathlib import Path
+
+import tiktoken
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_utils import format_summary, load_labels, summarize
+from config_crewai import COLLECTION_NAME, RETRIEVAL_MODE, config
+from reranker import FeatureReranker
+from retrieval import open_hybrid_store, relevant_hits
+from vector_store import SearchHit, open_vector_store
+
+
+def relevance(hits: list[SearchHit], expected: list[str]) -> list[bool]:
+    """Whether every hit contains one of the expected texts."""
+    return [any(text.lower() in hit.document.lower() for text in expected) for hit in hits]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", type=Path, required=True, help="Labeled queries (JSONL)")
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks returned to the agent")
+    parser.add_argument("--candidates", type=int, default=50, help="Number of chunks retrieved before reranking")
+    parser.add_argument("--similarity-threshold", type=float, default=0.70)
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    store = open_hybrid_store(
+        open_vector_store(config, COLLECTION_NAME),
+        COLLECTION_NAME,
+        fusion=RETRIEVAL_MODE == "hybrid",
+        similarity_threshold=args.similarity_threshold,
+    )
+    reranker = FeatureReranker(candidates=args.candidates)
+    encoding = tiktoken.get_encoding("cl100k_base")
+
+    results = {mode: {"precision": [], "hits": 0, "rr": [], "tokens": []} for mode in ("retrieval", "reranked")}
+    rerank_latencies = []
+    for question, expected in labels:
+        candidates = relevant_hits(store.search(question, args.candidates), args.similarity_threshold)
+        start = time.perf_counter()
+        reranked = reranker.rerank(question, candidates, args.k)
+        rerank_latencies.append((time.perf_counter() - start) * 1000)
+
+        for mode, hits in (("retrieval", candidates[: args.k]), ("reranked", reranked)):
+            relevant = relevance(hits, expected)
+            result = results[mode]
+            result["precision"].append(sum(relevant) / args.k)
+            result["hits"] += any(relevant)
+            result["rr"].append(next((1.0 / rank for rank, ok in enumerate(relevant, start=1) if ok), 0.0))
+            result["tokens"].append(sum(len(encoding.encode(hit.document, disallowed_special=())) for hit in hits))
+
+    print(f"\n{CYAN}=== {len(labels)} labeled queries, k={args.k}, candidates={args.candidates} ==={RESET}")
+    for mode, result in results.items():
+        n = max(len(labels), 1)
+        print(
+            f"{mode:<10} precision@{args.k}={sum(result['precision']) / n:.3f}  hit@{args.k}={result['hits'] / n:.3f}  "
+            f"MRR={sum(result['rr']) / n:.3f}  tokens/question={sum(result['tokens']) / n:.0f}"
+        )
+    print(format_summary("rerank latency", summarize(rerank_latencies)))
+    print(f"{YELLOW}(the reranking alone; the over-fetch is part of the retrieval){RESET}")
+    print(f"\n{GREEN}✅ Benchmark finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
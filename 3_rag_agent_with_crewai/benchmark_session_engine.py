@@ -0,0 +1,124 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_session_engine.py
+==================================
+This script measures the per-question overhead of the RAG agent before and
+after the session engine:
+
+- rebuild: a fresh Task and a fresh Crew(memory=True) for every question
+  (the old behaviour of `ask_question`)
+- session: the agent and memory storages of the session stay warm, only the
+  Task and a Crew on top of those storages are built per question
+
+The LLM is stubbed (`FakeLLM`, zero latency) and the memory storages use a
+deterministic fake embedder, so the measured time is pure framework overhead.
+
+Run
+===
+uv run benchmark_session_engine.py --questions 20
+"""
+import argparse
+import os
+import time
+
+# Keep the benchmark memory storages apart from the real application data:
+os.environ.setdefault("CREWAI_STORAGE_DIR", "rag_session_engine_benchmark")
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+
+from ansi_colors import CYAN, GREEN, RESET
+from benchmark_utils import format_summary, summarize
+from crewai import Agent, Crew, Task
+from fakes import FAKE_EMBEDDER_SPEC, FakeLLM
+from logging_config import get_logger
+from session_engine import SessionCrewEngine
+
+logger = get_logger(__name__)
+
+QUESTIONS = [
+    "What are the technical skills of this professional?",
+    "What is the academic formation of this professional?",
+    "Where did this professional work before?",
+    "Which programming languages does this professional know?",
+]
+
+
+def build_agent() -> Agent:
+    """Creates the benchmark agent (stub LLM, no tools)."""
+    return Agent(
+        role="Expert assistant in professional curriculum analysis",
+        goal="Answer questions about the professional curriculum.",
+        backstory="You know the professional curriculum well.",
+        llm=FakeLLM(),
+        verbose=False,
+        allow_delegation=False,
+    )
+
+
+def build_task(question: str, agent: Agent) -> Task:
+    """Creates the task of one question."""
+    return Task(
+        description=f"Respond to the following question: {question}",
+        expected_output="A natural and conversational response.",
+        agent=agent,
+    )
+
+
+def run_rebuild(agent: Agent, questions: list[str]) -> list[float]:
+    """Old path: new Task and new Crew(memory=True) per question."""
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        crew = Crew(
+            agents=[agent],
+            tasks=[build_task(question, agent)],
+            memory=True,
+            embedder=FAKE_EMBEDDER_SPEC,
+            verbose=False,
+            tracing=False,
+        )
+        crew.kickoff()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_session(agent: Agent, questions: list[str]) -> list[float]:
+    """New path: warm session (agent and memory storages), new Task and Crew per question."""
+    engine = SessionCrewEngine(
+        agent_factory=lambda: agent,
+        task_factory=build_task,
+        crew_kwargs={"embedder": FAKE_EMBEDDER_SPEC},
+    )
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        engine.ask(question, session_id="benchmark")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20, help="Questions per mode")
+    args = parser.parse_args()
+
+    agent = build_agent()
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+
+    # Warm up imports and lazy initializations of crewAI once:
+    run_rebuild(agent, questions[:1])
+
+    rebuild = summarize(run_rebuild(agent, questions))
+    session = summarize(run_session(agent, questions))
+
+    print(f"{CYAN}Per-question overhead with a stubbed LLM ({args.questions} questions):{RESET}")
+    print(format_summary("rebuild Crew per question", rebuild))
+    print(format_summary("warm session", session))
+    saved = rebuild["mean"] - session["mean"]
+    print(f"{GREEN}Saved per question: {saved:.2f} ms ({saved / rebuild['mean']:.0%}){RESET}")
+
+
+if __name__ == "__main__":
+    main()
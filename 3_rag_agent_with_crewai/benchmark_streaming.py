@@ -0,0 +1,88 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_streaming.py
+=============================
+This script checks the streaming mode of the RAG agent offline and measures
+the time-to-first-token (TTFT) against the total answer time.
+
+A local fake LLM emits its answer word by word on a timer, the memory
+storages use a fake embedder, and the tokens go through the same
+`FinalAnswerFilter` and `timed_stream` used by `ask_question_stream`.
+
+Run
+===
+uv run benchmark_streaming.py --questions 5 --token-delay 0.05
+"""
+import argparse
+import os
+
+# Keep the benchmark memory storages apart from the real application data:
+os.environ.setdefault("CREWAI_STORAGE_DIR", "rag_streaming_benchmark")
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+
+from ansi_colors import CYAN, GREEN, RED, RESET
+from benchmark_utils import format_summary
+from crewai import Agent, Task
+from fakes import DEFAULT_FAKE_ANSWER, FAKE_EMBEDDER_SPEC, FakeLLM
+from session_engine import SessionCrewEngine
+from streaming import FinalAnswerFilter, StreamMetrics, timed_stream
+
+
+def build_task(question: str, agent: Agent) -> Task:
+    """Creates the task of one question."""
+    return Task(
+        description=f"Respond to the following question: {question}",
+        expected_output="A natural and conversational response.",
+        agent=agent,
+    )
+
+
+def stream_answer(engine: SessionCrewEngine, question: str):
+    """Same token pipeline as `application.ask_question_stream`, without the answer cache."""
+    chunks = engine.ask_stream(question, session_id="benchmark")
+    answer_filter = FinalAnswerFilter()
+    for chunk in chunks:
+        if text := answer_filter.feed(chunk):
+            yield text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=5, help="Number of streamed questions")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="Seconds between fake LLM tokens")
+    args = parser.parse_args()
+
+    agent = Agent(
+        role="Expert assistant in professional curriculum analysis",
+        goal="Answer questions about the professional curriculum.",
+        backstory="You know the professional curriculum well.",
+        llm=FakeLLM(stream=True, token_delay=args.token_delay),
+        verbose=False,
+        allow_delegation=False,
+    )
+    engine = SessionCrewEngine(
+        agent_factory=lambda: agent,
+        task_factory=build_task,
+        crew_kwargs={"embedder": FAKE_EMBEDDER_SPEC},
+    )
+    metrics = StreamMetrics()
+
+    for i in range(args.questions):
+        tokens = list(timed_stream(stream_answer(engine, f"Question {i}"), metrics, label=str(i)))
+        streamed = "".join(tokens).strip()
+        if streamed != DEFAULT_FAKE_ANSWER:
+            print(f"{RED}❌ Streamed answer differs from the final answer: {streamed!r}{RESET}")
+            raise SystemExit(1)
+
+    summary = metrics.summary()
+    print(f"{CYAN}Streaming with a fake LLM ({args.token_delay * 1000:.0f} ms per token):{RESET}")
+    print(format_summary("time to first token", summary["ttft_ms"]))
+    print(format_summary("total answer time", summary["total_ms"]))
+    print(f"{GREEN}✅ Every streamed answer matches the final answer.{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_utils.py
+=========================
+This script contains small helpers shared by the benchmark scripts
+of the RAG agent (labeled queries, percentiles and latency summaries).
+"""
+import json
+import math
+from collections.abc import Sequence
+from pathlib import Path
+
+
+def load_labels(path: Path) -> list[tuple[str, list[str]]]:
+    """Reads the labeled queries (question, expected texts)."""
+    labels = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            item = json.loads(line)
+            expected = item["expected"]
+            labels.append((item["question"], [expected] if isinstance(expected, str) else list(expected)))
+    return labels
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Computes a percentile with linear interpolation between the closest ranks.
+
+    Args:
+        values: Measured values (any order)
+        pct: Percentile in the range [0, 100]
+
+    Returns:
+        The interpolated percentile, or NaN when there are no values
+    """
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values: Sequence[float]) -> dict[str, float]:
+    """
+    Summarizes a latency distribution.
+
+    Args:
+        values: Measured values (usually milliseconds)
+
+    Returns:
+        Dictionary with count, mean, p50, p95, p99 and max
+    """
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else math.nan,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else math.nan,
+    }
+
+
+def format_summary(label: str, summary: dict[str, float], unit: str = "ms") -> str:
+    """Formats a summary produced by `summarize` in a single line."""
+    return (
+        f"{label:<28} n={summary['count']:<6} mean={summary['mean']:.2f}{unit} "
+        f"p50={summary['p50']:.2f}{unit} p95={summary['p95']:.2f}{unit} "
+        f"p99={summary['p99']:.2f}{unit} max={summary['max']:.2f}{unit}"
+    )
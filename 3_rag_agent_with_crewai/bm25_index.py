@@ -0,0 +1,205 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bm25_index.py
+====================
+This script contains the lexical (BM25) index kept alongside the vector
+store. Dense retrieval misses exact-match queries (names, skill acronyms,
+tool names such as "PySpark" or "AWS"); the inverted index finds them.
+
+The index is stored in SQLite (postings keyed by term) and is updated
+incrementally by the ingestion, chunk by chunk, together with the vector
+store. Tokens keep the characters of technical terms ("c++", "c#",
+"node.js") and common English/Portuguese stopwords are dropped.
+"""
+import json
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by do does did for from has have he her his how i in is it its me my of on or
+    our she that the their them they this to was we were what when where which who whom why will with you
+    your about can tell give list any some there
+    o os as um uma uns umas de do da dos das e é em no na nos nas por para com que se seu sua seus suas ele
+    ela eles elas qual quais quem como onde quando foi ser ter tem sobre ao aos à às mais
+    """.split()
+)
+
+_TOKEN_PATTERN = re.compile(r"\w+(?:[.+#-]\w+|[+#]+)*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    length INTEGER NOT NULL,
+    document TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, chunk_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (chunk_id);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases a text, strips accents and returns its non-stopword tokens."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [token for token in _TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Persistent BM25 inverted index over the chunks of a collection.
+
+    Args:
+        path: Path of the SQLite file
+        k1: Term frequency saturation
+        b: Length normalization
+    """
+
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75) -> None:
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._stats: tuple[int, float] | None = None
+
+    def _delete(self, ids: Iterable[str]) -> None:
+        """Removes chunks (caller holds the lock, inside a transaction)."""
+        rows = [(chunk_id,) for chunk_id in ids]
+        self._conn.executemany("DELETE FROM postings WHERE chunk_id = ?", rows)
+        self._conn.executemany("DELETE FROM chunks WHERE id = ?", rows)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[dict[str, Any] | None] | None = None,
+    ) -> None:
+        """Indexes (or re-indexes) chunks."""
+        if not ids:
+            return
+        metadatas = metadatas or [None] * len(ids)
+        chunk_rows, posting_rows = [], []
+        for chunk_id, document, metadata in zip(ids, documents, metadatas, strict=True):
+            counts = Counter(tokenize(document))
+            chunk_rows.append((chunk_id, sum(counts.values()), document, json.dumps(metadata or {})))
+            posting_rows.extend((term, chunk_id, tf) for term, tf in counts.items())
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._delete(ids)
+            self._conn.executemany(
+                "INSERT INTO chunks (id, length, document, metadata) VALUES (?, ?, ?, ?)", chunk_rows
+            )
+            self._conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", posting_rows)
+            self._conn.execute("COMMIT")
+            self._stats = None
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[dict[str, Any]]) -> None:
+        """Replaces the metadata of indexed chunks."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas, strict=True)],
+            )
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Removes chunks by id."""
+        if not ids:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._delete(ids)
+            self._conn.execute("COMMIT")
+            self._stats = None
+
+    def clear(self) -> None:
+        """Removes every chunk."""
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM chunks")
+            self._stats = None
+
+    def count(self) -> int:
+        """Returns the number of indexed chunks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def _collection_stats(self) -> tuple[int, float]:
+        """Returns the number of chunks and their average length (caller holds the lock)."""
+        if self._stats is None:
+            n, avg_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+            self._stats = (n, avg_length or 0.0)
+        return self._stats
+
+    def search(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[tuple[str, float]]:
+        """
+        Returns the `limit` chunks with the highest BM25 score.
+
+        Args:
+            query: Question or keywords
+            limit: Number of chunks
+            where: Metadata values the chunks must have (e.g. {"document_id": "cv_eddy"})
+
+        Returns:
+            (chunk id, score) pairs, best first (only chunks sharing a term with the query)
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        # The filter is part of the postings query, so other documents are never scored:
+        conditions = "".join(" AND json_extract(c.metadata, ?) = ?" for _ in where or {})
+        filter_params = [param for field, value in (where or {}).items() for param in (f"$.{field}", value)]
+        scores: dict[str, float] = {}
+        with self._lock:
+            n, avg_length = self._collection_stats()
+            if not n:
+                return []
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+                    f"WHERE p.term = ?{conditions}",
+                    (term, *filter_params),
+                ).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf, length in postings:
+                    norm = self.k1 * (1.0 - self.b + self.b * length / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def get(self, ids: Sequence[str]) -> dict[str, tuple[str, dict[str, Any]]]:
+        """Returns the document and metadata of chunks (id -> (document, metadata))."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = list(ids[start : start + 500])
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT id, document, metadata FROM chunks WHERE id IN ({placeholders})", batch
+                ).fetchall()
+                found.update({chunk_id: (document, json.loads(metadata)) for chunk_id, document, metadata in rows})
+        return found
@@ -0,0 +1,345 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script bulk_ingest.py
+=====================
+This script ingests many documents (e.g. thousands of CVs) into the
+knowledge base collection.
+
+- PDFs are hashed, parsed and chunked in a process pool, and the chunks are
+  streamed to the writer as soon as each document is ready
+- chunks are grouped into embedding batches sized to the provider limits
+  (tokens and inputs per request), and each batch is written with a single
+  bulk upsert
+- progress and throughput (docs/s, chunks/s, tokens/s) are logged
+- it is resumable: the ingestion manifest is saved after every batch, so an
+  interrupted run skips the documents already committed when started again
+- every chunk is tagged with its document id (file stem) and `--tenant`, so
+  thousands of CVs share one collection and a question can still be scoped
+  to one of them
+
+Run
+===
+uv run bulk_ingest.py data/cvs/
+uv run bulk_ingest.py "data/cvs/**/*.pdf" --workers 8 --batch-tokens 250000
+uv run bulk_ingest.py data/cvs/acme/ --tenant acme
+"""
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import tiktoken
+from ansi_colors import CYAN, GREEN, RED, RESET, YELLOW
+from config_crewai import (
+    CHUNKER,
+    COLLECTION_NAME,
+    EMBEDDING_MODEL_ID,
+    STORAGE_DIR,
+    config,
+)
+from cv_chunker import CHUNK_OVERLAP, CHUNK_SIZE, CHUNKERS, chunk_document
+from ingestion import (
+    DEFAULT_TENANT,
+    MANIFEST_FILENAME,
+    ChunkDiff,
+    IncrementalIngestor,
+    IngestionManifest,
+    file_sha256,
+)
+from logging_config import get_logger, setup_logging
+from retrieval import open_hybrid_store
+from vector_store import open_vector_store
+
+logger = get_logger(__name__)
+
+# Limits of the OpenAI embeddings endpoint (per request):
+MAX_TOKENS_PER_REQUEST = 300_000
+MAX_INPUTS_PER_REQUEST = 2048
+
+SUPPORTED_SUFFIXES = {".pdf", ".txt", ".md"}
+
+
+def discover_files(inputs: list[str]) -> list[Path]:
+    """
+    Resolves directories (recursively), files and glob patterns into documents.
+
+    Args:
+        inputs: Directories, files or glob patterns
+
+    Returns:
+        Sorted list of unique supported files
+    """
+    files: set[Path] = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = path.rglob("*")
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = (Path(match) for match in glob.glob(item, recursive=True))
+        files.update(p.resolve() for p in candidates if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES)
+    return sorted(files)
+
+
+@dataclass
+class ParsedDocument:
+    """Document hashed and chunked by a worker process."""
+
+    source: str
+    sha256: str
+    chunks: list[str]
+
+
+def parse_document(source: str, chunker: dict[str, Any]) -> ParsedDocument:
+    """Hashes, parses and chunks one document (runs in the process pool)."""
+    path = Path(source)
+    chunks = list(chunk_document(path, chunker))
+    return ParsedDocument(source=source, sha256=file_sha256(path), chunks=chunks)
+
+
+@dataclass
+class PendingFile:
+    """File whose new chunks are not all written yet."""
+
+    stat: os.stat_result
+    sha256: str
+    diff: ChunkDiff
+    remaining: int
+
+
+class BatchWriter:
+    """
+    Groups chunks into embedding batches and commits files to the manifest.
+
+    Args:
+        ingestor: Incremental ingestor of the collection (manifest and diffs)
+        max_batch_tokens: Maximum number of tokens per embedding request
+        max_batch_inputs: Maximum number of chunks per embedding request
+    """
+
+    def __init__(self, ingestor: IncrementalIngestor, max_batch_tokens: int, max_batch_inputs: int) -> None:
+        self.ingestor = ingestor
+        self.store = ingestor.store
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        # text-embedding-3-* models use the cl100k_base tokenizer:
+        self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.pending: dict[str, PendingFile] = {}
+        self._ids: list[str] = []
+        self._documents: list[str] = []
+        self._metadatas: list[dict[str, Any]] = []
+        self._batch_tokens = 0
+        self.docs = 0
+        self.unchanged = 0
+        self.chunks = 0
+        self.tokens = 0
+        self.batches = 0
+
+    def add(self, document: ParsedDocument, stat: os.stat_result) -> None:
+        """Diffs a parsed document against the manifest and queues its new chunks."""
+        self.docs += 1
+        if self.ingestor.touch(document.source, stat, document.sha256):
+            self.unchanged += 1
+            return
+
+        diff = self.ingestor.diff(document.source, document.chunks)
+        self.store.delete(diff.removed_ids)
+        self.store.update_metadata(ids=diff.moved_ids, metadatas=[diff.metadata(cid) for cid in diff.moved_ids])
+
+        # Chunks written by an interrupted run are not embedded again:
+        written = self.store.existing_ids(diff.new_ids)
+        to_write = [cid for cid in diff.new_ids if cid not in written]
+        self.pending[document.source] = PendingFile(stat, document.sha256, diff, remaining=len(to_write))
+        if not to_write:
+            self._commit(document.source)
+            return
+        for cid in to_write:
+            self._queue(cid, diff.chunks[cid], diff.metadata(cid))
+
+    def _queue(self, cid: str, content: str, metadata: dict[str, Any]) -> None:
+        tokens = len(self.encoding.encode(content, disallowed_special=()))
+        if self._ids and (
+            self._batch_tokens + tokens > self.max_batch_tokens or len(self._ids) >= self.max_batch_inputs
+        ):
+            self.flush()
+        self._ids.append(cid)
+        self._documents.append(content)
+        self._metadatas.append(metadata)
+        self._batch_tokens += tokens
+
+    def flush(self) -> None:
+        """Embeds and writes the current batch with one bulk upsert, then commits finished files."""
+        if not self._ids:
+            return
+        self.store.upsert(ids=self._ids, documents=self._documents, metadatas=self._metadatas)
+        self.batches += 1
+        self.chunks += len(self._ids)
+        self.tokens += self._batch_tokens
+
+        for metadata in self._metadatas:
+            pending = self.pending[metadata["source"]]
+            pending.remaining -= 1
+            if pending.remaining == 0:
+                self._commit(metadata["source"])
+
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._batch_tokens = 0
+        self.ingestor.manifest.save()
+
+    def _commit(self, source: str) -> None:
+        pending = self.pending.pop(source)
+        self.ingestor.commit(pending.stat, pending.sha256, pending.diff)
+
+
+def log_progress(writer: BatchWriter, total: int, skipped: int, started: float) -> None:
+    """Logs progress and throughput."""
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    done = writer.docs + skipped
+    logger.info(
+        f"{CYAN}[{done}/{total}] docs | {writer.chunks} chunks | {writer.tokens} tokens | "
+        f"{done / elapsed:.1f} docs/s | {writer.chunks / elapsed:.1f} chunks/s | "
+        f"{writer.tokens / elapsed:.0f} tokens/s{RESET}"
+    )
+
+
+def bulk_ingest(
+    files: list[Path],
+    collection_name: str = COLLECTION_NAME,
+    workers: int | None = None,
+    max_batch_tokens: int = 250_000,
+    max_batch_inputs: int = MAX_INPUTS_PER_REQUEST,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    chunker: str = CHUNKER,
+    tenant: str = DEFAULT_TENANT,
+    progress_every: float = 5.0,
+) -> BatchWriter:
+    """
+    Ingests many documents into a collection.
+
+    Args:
+        files: Documents to ingest
+        collection_name: Name of the collection in ChromaDB
+        workers: Number of parsing processes (default: number of CPUs)
+        max_batch_tokens: Maximum number of tokens per embedding request
+        max_batch_inputs: Maximum number of chunks per embedding request
+        chunk_size: Maximum number of characters per chunk
+        chunk_overlap: Number of characters repeated between consecutive chunks
+        chunker: Chunker of `cv_chunker.CHUNKERS`
+        tenant: Tenant written in the metadata of the chunks
+        progress_every: Seconds between progress logs
+
+    Returns:
+        The BatchWriter with the final counters
+    """
+    ingestor = IncrementalIngestor(
+        store=open_hybrid_store(open_vector_store(config, collection_name), collection_name, fusion=False),
+        manifest=IngestionManifest(STORAGE_DIR / MANIFEST_FILENAME),
+        collection_name=collection_name,
+        embedding_model=EMBEDDING_MODEL_ID,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        chunker=chunker,
+        tenant=tenant,
+    )
+    writer = BatchWriter(
+        ingestor,
+        max_batch_tokens=min(max_batch_tokens, MAX_TOKENS_PER_REQUEST),
+        max_batch_inputs=min(max_batch_inputs, MAX_INPUTS_PER_REQUEST),
+    )
+
+    # Unchanged documents cost one stat call and never reach the process pool:
+    todo: list[tuple[Path, os.stat_result]] = []
+    for path in files:
+        stat = path.stat()
+        if not ingestor.unchanged(str(path), stat):
+            todo.append((path, stat))
+    skipped = len(files) - len(todo)
+    logger.info(f"{YELLOW}{len(files)} documents found, {skipped} unchanged, {len(todo)} to parse{RESET}")
+
+    started = time.perf_counter()
+    last_log = started
+    workers = workers or os.cpu_count() or 1
+    # Bounded number of documents in flight, so memory stays flat on large corpora:
+    max_in_flight = workers * 4
+    queue = iter(todo)
+    in_flight: dict[Future, os.stat_result] = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                while len(in_flight) < max_in_flight and (item := next(queue, None)) is not None:
+                    path, stat = item
+                    future = executor.submit(parse_document, str(path), ingestor.chunker)
+                    in_flight[future] = stat
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stat = in_flight.pop(future)
+                    try:
+                        writer.add(future.result(), stat)
+                    except Exception as e:
+                        logger.error(f"{RED}❌ Failed to ingest a document: {e}{RESET}")
+                if time.perf_counter() - last_log >= progress_every:
+                    log_progress(writer, len(files), skipped, started)
+                    last_log = time.perf_counter()
+            writer.flush()
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info(f"{YELLOW}Interrupted: run the same command again to resume.{RESET}")
+            raise
+        finally:
+            ingestor.manifest.save()
+
+    log_progress(writer, len(files), skipped, started)
+    logger.info(
+        f"{GREEN}✅ Bulk ingestion finished: {writer.docs - writer.unchanged} documents indexed, "
+        f"{writer.chunks} chunks in {writer.batches} batches{RESET}"
+    )
+    return writer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Directories, files or glob patterns")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Name of the collection")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parsing processes")
+    parser.add_argument("--batch-tokens", type=int, default=250_000, help="Max tokens per embedding request")
+    parser.add_argument("--batch-inputs", type=int, default=MAX_INPUTS_PER_REQUEST, help="Max chunks per request")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--chunker", choices=CHUNKERS, default=CHUNKER, help="Chunker of the documents")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help="Tenant written in the chunk metadata")
+    parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress logs")
+    args = parser.parse_args()
+
+    setup_logging()
+    files = discover_files(args.inputs)
+    if not files:
+        logger.info(f"{RED}⚠️  No supported documents found ({', '.join(sorted(SUPPORTED_SUFFIXES))}).{RESET}")
+        return
+
+    bulk_ingest(
+        files,
+        collection_name=args.collection,
+        workers=args.workers,
+        max_batch_tokens=args.batch_tokens,
+        max_batch_inputs=args.batch_inputs,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        chunker=args.chunker,
+        tenant=args.tenant,
+        progress_every=args.progress_every,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,36 +5,116 @@ Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
 config_crewai.py
 ================
 This script configures the RAG Tool for CrewAI.
-Uses the ChromaDB database to store the documents and the OpenAI embedding
-model to create the embeddings.
+Uses the ChromaDB database (or the local memory-mapped index) to store the
+documents and the OpenAI embedding model to create the embeddings (behind a
+persistent embedding cache).
 
 Run
 ===
 uv run config_crewai.py
 """
 import os
+from pathlib import Path
 
+from crewai.utilities.paths import db_storage_path
 from crewai_tools.tools.rag import ProviderSpec, RagToolConfig, VectorDbConfig
 from dotenv import find_dotenv, load_dotenv
+from embedding_cache import CACHE_FILENAME, cached_embedding_spec
 
 _ = load_dotenv(find_dotenv())  # Read local .env file
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Configuration of the VectorDB (ChromaDB):
-vectordb: VectorDbConfig = {
-    "provider": "chromadb",
-    "config": {
-        "collection_name": "rag_cv_eddy_collection",
-    },
-}
+# Directory where crewAI persists ChromaDB (chroma.sqlite3) and the ingestion manifest:
+STORAGE_DIR = Path(db_storage_path())
+
+# Name of the collection (use always the same name to reuse embeddings):
+COLLECTION_NAME = "rag_cv_eddy_collection"
+
+# Vector store: "chromadb" (default) or "local", the in-process memory-mapped index of
+# local_index.py (RAG_VECTORDB_PROVIDER=local):
+VECTORDB_PROVIDER = os.getenv("RAG_VECTORDB_PROVIDER", "chromadb")
+
+# Configuration of the VectorDB:
+if VECTORDB_PROVIDER == "local":
+    vectordb: VectorDbConfig = {
+        "provider": "local",
+        "config": {
+            "collection_name": COLLECTION_NAME,
+            "path": str(STORAGE_DIR / "local_index"),
+            "exact_threshold": 20_000,  # Exact search below it, IVF above
+            "nprobe": 16,
+            # "none" (float32), "int8" (4x smaller) or "binary" (32x smaller), see quantization.py;
+            # the `rescore` * k best candidates of a quantized scan are rescored with the float vectors:
+            "quantization": os.getenv("RAG_QUANTIZATION", "none"),
+            "rescore": int(os.getenv("RAG_QUANTIZATION_RESCORE", "8")),
+        },
+    }
+else:
+    vectordb: VectorDbConfig = {
+        "provider": "chromadb",
+        "config": {
+            "collection_name": COLLECTION_NAME,
+        },
+    }
+
+# Retrieval of the agent tool: "dense" (similarity search of the RagTool only, the default)
+# or "hybrid" (opt-in: BM25 + dense, fused by reciprocal rank fusion):
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "dense")
+
+# Chunker of the ingestion (cv_chunker.py): "split_text" (fixed-size character windows, the
+# default) or "cv_sections" (opt-in: section-aligned chunks of whole CV entries, each one
+# starting with its heading):
+CHUNKER = os.getenv("RAG_CHUNKER", "split_text")
+
+# Reranking of the retrieved chunks (reranker.py): "features" over-fetches RERANK_CANDIDATES
+# chunks and keeps the best ones with precomputed chunk features, "none" disables it:
+RERANKER = os.getenv("RAG_RERANKER", "none")
+RERANK_CANDIDATES = int(os.getenv("RAG_RERANK_CANDIDATES", "50"))
+
+# Compression of the retrieved chunks before the agent reads them (context_compressor.py):
+# "summarize" (LLM summary of the RagTool, dense ChromaDB retrieval only, the default),
+# "extractive" (opt-in: sentences closest to the query, within a token budget, no LLM call)
+# or "none":
+CONTEXT_COMPRESSION = os.getenv("RAG_CONTEXT_COMPRESSION", "summarize")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "800"))
+
+# Local tracing of the questions (tracing.py): RAG_TRACING=1 appends one JSON line per stage
+# (duration, tokens in/out, cache hits) to TRACE_FILE, summarized by `uv run trace_summary.py`:
+TRACING = os.getenv("RAG_TRACING") == "1"
+TRACE_FILE = Path(os.getenv("RAG_TRACE_FILE") or STORAGE_DIR / "traces.jsonl")
+
+# BM25 index kept alongside the vector store by the ingestion (one SQLite file per collection):
+LEXICAL_INDEX_DIR = STORAGE_DIR / "bm25"
 
 # Configuration of the embedding model:
-embedding_model: ProviderSpec = {
+EMBEDDING_MODEL_NAME = "text-embedding-3-large"
+# Matryoshka truncation of the embeddings (e.g. 1024 or 256 of the 3072 dimensions), empty for full
+# vectors. A change rebuilds the collections (the manifest records EMBEDDING_MODEL_ID); a ChromaDB
+# collection keeps its first dimensionality, so delete it (inspect_chromadb.py) before changing it:
+EMBEDDING_DIMENSIONS = int(os.getenv("RAG_EMBEDDING_DIMENSIONS") or 0) or None
+EMBEDDING_MODEL_ID = f"{EMBEDDING_MODEL_NAME}@{EMBEDDING_DIMENSIONS}" if EMBEDDING_DIMENSIONS else EMBEDDING_MODEL_NAME
+openai_embedding_model: ProviderSpec = {
     "provider": "openai",
-    "config": {"model_name": "text-embedding-3-large", "api_key": OPENAI_API_KEY},
+    "config": {"model_name": EMBEDDING_MODEL_NAME, "api_key": OPENAI_API_KEY},
 }
 
+# RAG_FAKE_EMBEDDINGS=1 replaces the provider with deterministic offline vectors (fakes.py),
+# e.g. for benchmark_rag.py; they carry no semantics, so only the lexical retrieval is meaningful:
+if os.getenv("RAG_FAKE_EMBEDDINGS") == "1":
+    from fakes import FAKE_EMBEDDER_SPEC
+
+    EMBEDDING_MODEL_ID = "fake-embedding"
+    openai_embedding_model = FAKE_EMBEDDER_SPEC
+
+# Persistent cache keyed by (model, text hash), shared by the ingestion and the queries:
+embedding_model: ProviderSpec = cached_embedding_spec(
+    openai_embedding_model,
+    cache_path=STORAGE_DIR / CACHE_FILENAME,
+    max_bytes=512 * 1024 * 1024,
+    dimensions=EMBEDDING_DIMENSIONS,
+)
+
 # Complete configuration of the RAG Tool
 # Note: RagToolConfig accepts only 'vectordb' and 'embedding_model'
 # The LLM is configured separately in the Agent, not here
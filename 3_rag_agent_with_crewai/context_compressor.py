@@ -0,0 +1,219 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script context_compressor.py
+============================
+This script contains the context-compression stage between the retrieval
+and the agent.
+
+`RagTool(summarize=True)` sends the retrieved chunks to the LLM for a
+summary on every tool call, before the agent even reads them. The
+extractive compressor reaches the same goal (fewer prompt tokens for the
+agent) without a second LLM call:
+
+1. near-identical chunks (e.g. the overlap of consecutive chunks, the same
+   paragraph in two versions of a CV) are dropped by word-shingle Jaccard
+2. the chunks are split into sentences, and repeated sentences are dropped
+3. when the sentences exceed `token_budget`, they are scored by the cosine
+   similarity of their embedding with the query (one embedding call, served
+   by the embedding cache for sentences seen before) and packed best first
+   into the budget, skipping sentences too similar to one already packed
+4. the packed sentences are returned in their original order
+
+Modes (RAG_CONTEXT_COMPRESSION in `config_crewai.py`):
+
+- "summarize" (default): the LLM summary of the RagTool (dense ChromaDB retrieval only)
+- "extractive": this compressor
+- "none": the chunks are returned as retrieved
+"""
+import re
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import tiktoken
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+COMPRESSION_EXTRACTIVE = "extractive"
+COMPRESSION_SUMMARIZE = "summarize"
+COMPRESSION_NONE = "none"
+COMPRESSION_MODES = (COMPRESSION_EXTRACTIVE, COMPRESSION_SUMMARIZE, COMPRESSION_NONE)
+
+# Sentence ends, line breaks and bullets (CV lines are often not full sentences):
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|\s*\n+\s*|\s+(?=[•▪●◦·-]\s)")
+
+
+def split_sentences(text: str, min_chars: int = 3) -> list[str]:
+    """Splits a chunk into sentences (and CV lines), dropping fragments shorter than `min_chars`."""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if len(sentence.strip()) >= min_chars]
+
+
+def _shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def drop_near_duplicates(documents: Sequence[str], threshold: float = 0.8) -> list[int]:
+    """
+    Returns the indices of the documents to keep, dropping the near-identical ones.
+
+    Args:
+        documents: Retrieved chunks, best first (the first of two duplicates is kept)
+        threshold: Jaccard similarity of the word 3-shingles above which two chunks are duplicates
+
+    Returns:
+        The indices of the kept documents, in order
+    """
+    kept: list[int] = []
+    kept_shingles: list[set[tuple[str, ...]]] = []
+    for index, document in enumerate(documents):
+        shingles = _shingles(document)
+        if any(len(shingles & other) / max(len(shingles | other), 1) >= threshold for other in kept_shingles):
+            continue
+        kept.append(index)
+        kept_shingles.append(shingles)
+    return kept
+
+
+@dataclass
+class CompressedContext:
+    """Outcome of the compression of the chunks of one tool call."""
+
+    text: str
+    input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    chunks_kept: int
+    sentences_kept: int
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of the prompt tokens removed."""
+        return 1.0 - self.output_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class ExtractiveCompressor:
+    """
+    Compresses retrieved chunks into the sentences closest to the query, within a token budget.
+
+    Args:
+        embed: Embedding function (list of texts -> list of vectors)
+        token_budget: Maximum number of tokens returned to the agent
+        chunk_dedup_threshold: Jaccard similarity above which two chunks are near-identical
+        sentence_dedup_threshold: Cosine similarity above which two sentences are redundant
+        encoding_name: tiktoken encoding used to count the tokens
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], Sequence[Sequence[float]]],
+        token_budget: int = 800,
+        chunk_dedup_threshold: float = 0.8,
+        sentence_dedup_threshold: float = 0.95,
+        encoding_name: str = "cl100k_base",
+    ) -> None:
+        self.embed = embed
+        self.token_budget = token_budget
+        self.chunk_dedup_threshold = chunk_dedup_threshold
+        self.sentence_dedup_threshold = sentence_dedup_threshold
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._input_tokens = 0
+        self._output_tokens = 0
+        self._latency_ms = 0.0
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _pack(self, query: str, sentences: list[str], tokens: list[int]) -> list[int]:
+        """Returns the indices of the sentences packed into the budget, best first."""
+        vectors = np.asarray(self.embed([query, *sentences]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scores = vectors[1:] @ vectors[0]
+        packed: list[int] = []
+        used = 0
+        for index in np.argsort(-scores):
+            # The best sentence is always kept, even when it alone exceeds the budget:
+            if packed and used + tokens[index] > self.token_budget:
+                continue
+            if packed and float(np.max(vectors[1:][packed] @ vectors[index + 1])) >= self.sentence_dedup_threshold:
+                continue
+            packed.append(int(index))
+            used += tokens[index]
+        return packed
+
+    def compress(self, query: str, documents: Sequence[str]) -> CompressedContext:
+        """
+        Compresses the chunks retrieved for a query.
+
+        Args:
+            query: Query of the tool call
+            documents: Retrieved chunks, best first
+
+        Returns:
+            CompressedContext with the text for the agent and the token counts
+        """
+        start = time.perf_counter()
+        input_tokens = self.count_tokens("\n\n".join(documents))
+        kept = drop_near_duplicates(documents, self.chunk_dedup_threshold)
+
+        # (chunk, sentence) of every distinct sentence, in reading order:
+        positions: list[tuple[int, str]] = []
+        seen: set[str] = set()
+        for chunk_number, index in enumerate(kept):
+            for sentence in split_sentences(documents[index]):
+                key = re.sub(r"\W+", " ", sentence.lower()).strip()
+                if key not in seen:
+                    seen.add(key)
+                    positions.append((chunk_number, sentence))
+
+        sentences = [sentence for _, sentence in positions]
+        tokens = [self.count_tokens(sentence) for sentence in sentences]
+        if sum(tokens) <= self.token_budget:
+            selected = range(len(sentences))  # Everything fits: no embedding call
+        else:
+            selected = sorted(self._pack(query, sentences, tokens))
+
+        paragraphs: dict[int, list[str]] = {}
+        for index in selected:
+            chunk_number, sentence = positions[index]
+            paragraphs.setdefault(chunk_number, []).append(sentence)
+        text = "\n\n".join(" ".join(paragraph) for paragraph in paragraphs.values())
+
+        result = CompressedContext(
+            text=text,
+            input_tokens=input_tokens,
+            output_tokens=self.count_tokens(text),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            chunks_kept=len(paragraphs),
+            sentences_kept=len(selected),
+        )
+        with self._lock:
+            self._calls += 1
+            self._input_tokens += result.input_tokens
+            self._output_tokens += result.output_tokens
+            self._latency_ms += result.latency_ms
+        logger.info(
+            f"Context compressed: {result.input_tokens} -> {result.output_tokens} tokens "
+            f"(-{result.reduction:.0%}) in {result.latency_ms:.1f} ms"
+        )
+        return result
+
+    def stats(self) -> dict[str, float]:
+        """Returns the number of compressions, the tokens in/out and the mean latency."""
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "input_tokens": self._input_tokens,
+                "output_tokens": self._output_tokens,
+                "reduction": 1.0 - self._output_tokens / self._input_tokens if self._input_tokens else 0.0,
+                "mean_latency_ms": self._latency_ms / self._calls if self._calls else 0.0,
+            }
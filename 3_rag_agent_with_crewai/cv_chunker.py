@@ -0,0 +1,420 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script cv_chunker.py
+====================
+This script contains the chunkers of the ingestion pipeline:
+
+- "split_text": fixed-size windows cut at the last paragraph, line, sentence
+  or word boundary (same defaults as the crewAI RAG file loader)
+- "cv_sections": structure-aware chunker for CVs. Headings ("Experiência
+  Profissional", "SKILLS", ...) and list entries (bullets, lines starting
+  with a date) are detected line by line, chunks never cross a section and
+  never split an entry (unless the entry alone exceeds the chunk size), and
+  every chunk starts with its section heading. The overlap repeats whole
+  trailing entries, up to `chunk_overlap` characters. The document is read
+  page by page, so memory stays flat for large PDFs.
+
+The sweep mode chunks a document with several chunkers and chunk sizes,
+indexes it in a temporary local index, and reports retrieval quality
+(hit@k, MRR on labeled queries), context tokens and latency for each.
+
+Run
+===
+uv run cv_chunker.py data/Data_Science_Eddy_pt.pdf            # prints the chunks
+uv run cv_chunker.py data/Data_Science_Eddy_pt.pdf --sweep --labels data/labeled_queries.jsonl
+"""
+import argparse
+import re
+import tempfile
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pdfplumber  # Installed (and locked) with crewai
+import tiktoken
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_utils import load_labels, summarize
+from config_crewai import embedding_model
+from crewai.rag.embeddings.factory import build_embedder
+from local_index import LocalVectorIndex
+
+CHUNKER_SPLIT_TEXT = "split_text"
+CHUNKER_CV_SECTIONS = "cv_sections"
+CHUNKERS = (CHUNKER_SPLIT_TEXT, CHUNKER_CV_SECTIONS)
+
+# Same defaults as the crewAI RAG file loader:
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+DEFAULT_CHUNKER = CHUNKER_SPLIT_TEXT  # "cv_sections" is opt-in
+DEFAULT_SECTION = "general"
+
+# CV headings (English and Portuguese) -> section name:
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "about me", "objective", "resumo", "perfil", "sobre mim", "objetivo"),
+    "experience": (
+        "experience", "work experience", "professional experience", "employment", "experiência",
+        "experiencia", "experiência profissional", "experiencia profissional", "histórico profissional",
+    ),
+    "education": ("education", "academic background", "formação", "formacao", "formação acadêmica", "educação"),
+    "skills": (
+        "skills", "technical skills", "competencies", "habilidades", "competências", "competencias",
+        "conhecimentos", "tecnologias",
+    ),
+    "projects": ("projects", "projetos", "portfolio", "portfólio"),
+    "publications": ("publications", "papers", "publicações", "publicacoes", "artigos"),
+    "certifications": ("certifications", "courses", "certificações", "certificacoes", "cursos"),
+    "languages": ("languages", "idiomas", "línguas"),
+}  # fmt: skip
+_SECTION_OF = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+# A heading is a line of its own (longest alternatives first):
+_HEADING_PATTERN = re.compile(
+    r"^\s*(" + "|".join(re.escape(h) for h in sorted(_SECTION_OF, key=len, reverse=True)) + r")\s*:?\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Start of a list entry: a bullet, a numbered item or a date ("2019 - 2021", "03/2020 - Atual", "Jan 2020"):
+_ITEM_START = re.compile(
+    r"^(?:[•▪●◦·*\-\u2013]\s|\d{1,2}[.)]\s|(?:\d{2}/)?(?:19|20)\d{2}\b|"
+    r"(?:jan|fev|feb|mar|abr|apr|mai|may|jun|jul|ago|aug|set|sep|out|oct|nov|dez|dec)\w*\.?\s+(?:19|20)\d{2}\b)",
+    re.IGNORECASE,
+)
+# Page numbers and "Page 2 of 3" footers:
+_PAGE_NUMBER = re.compile(r"^(?:(?:page|página|pagina)\s*)?\d{1,3}(?:\s*(?:/|of|de)\s*\d{1,3})?$", re.IGNORECASE)
+
+
+@dataclass
+class Block:
+    """Unit of a CV that a chunk never splits: a heading, a list entry or a paragraph."""
+
+    kind: str  # "heading", "item", "paragraph"
+    text: str
+
+
+def heading_section(line: str) -> str | None:
+    """
+    Returns the section of a heading line, or None when the line is not a heading.
+
+    Known headings map to their section; other short upper-case lines (e.g.
+    the name at the top of the CV) are headings of DEFAULT_SECTION, unless
+    they are list entries ("• SQL", "1. AWS").
+    """
+    if _HEADING_PATTERN.fullmatch(line):
+        return _SECTION_OF[line.strip().rstrip(":").strip().lower()]
+    if _ITEM_START.match(line):
+        return None
+    words = line.split()
+    if len(line) <= 40 and len(words) <= 5 and line.isupper() and not line.endswith((".", ",", ";")):
+        return DEFAULT_SECTION
+    return None
+
+
+def iter_blocks(pages: Iterable[str]) -> Iterator[Block]:
+    """
+    Groups the lines of a document into blocks, page by page.
+
+    An entry continues on the following lines (and on the next page) until a
+    blank line, a heading, the start of another entry, or a new sentence
+    after a line that ended one.
+    """
+    kind, lines = "paragraph", []
+    for page in pages:
+        for raw_line in page.splitlines():
+            line = re.sub(r"[ \t]+", " ", raw_line).strip()
+            if _PAGE_NUMBER.fullmatch(line):
+                continue
+            starts_block = (
+                not line
+                or heading_section(line) is not None
+                or _ITEM_START.match(line) is not None
+                or (kind == "paragraph" and lines and lines[-1].endswith((".", "!", "?", ":")) and line[0].isupper())
+            )
+            if starts_block and lines:
+                yield Block(kind, " ".join(lines))
+                kind, lines = "paragraph", []
+            if not line:
+                continue
+            if heading_section(line) is not None:
+                yield Block("heading", line)
+            elif _ITEM_START.match(line):
+                kind, lines = "item", [line]
+            else:
+                lines.append(line)
+    if lines:
+        yield Block(kind, " ".join(lines))
+
+
+class CVChunker:
+    """
+    Structure-aware chunker: section-aligned chunks made of whole entries.
+
+    Args:
+        chunk_size: Maximum number of characters per chunk (heading included)
+        chunk_overlap: Maximum number of characters of the whole entries repeated in the next chunk
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> None:
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def _overlap(self, entries: list[str]) -> list[str]:
+        """Returns the trailing entries repeated in the next chunk (never all of them)."""
+        tail: list[str] = []
+        size = 0
+        for entry in reversed(entries[1:]):
+            size += len(entry) + 1
+            if size > self.chunk_overlap:
+                break
+            tail.insert(0, entry)
+        return tail
+
+    def chunks(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Chunks a document.
+
+        Args:
+            pages: Text of the document, page by page (see `iter_pages`)
+
+        Yields:
+            The chunks, each one starting with the heading of its section (and with the
+            headings right above it that have no entries of their own)
+        """
+        heading = ""
+        entries: list[str] = []
+        for block in iter_blocks(pages):
+            if block.kind == "heading":
+                if entries:
+                    yield self._join(heading, entries)
+                    heading, entries = block.text, []
+                else:
+                    # A heading without entries (e.g. "SKILLS" over "CLOUD") stays over the next section:
+                    heading = self._join(heading, [block.text])
+                continue
+            budget = max(self.chunk_size - len(heading) - 1, self.chunk_size // 2)
+            pieces = [block.text]
+            if len(block.text) > budget:
+                # Only an entry longer than a chunk is split (at sentence or word boundaries):
+                pieces = list(split_text(block.text, budget, min(self.chunk_overlap, budget // 2)))
+            for piece in pieces:
+                if entries and sum(len(entry) + 1 for entry in entries) + len(piece) > budget:
+                    yield self._join(heading, entries)
+                    entries = self._overlap(entries)
+                    if sum(len(entry) + 1 for entry in entries) + len(piece) > budget:
+                        entries = []
+                entries.append(piece)
+        if entries:
+            yield self._join(heading, entries)
+
+    @staticmethod
+    def _join(heading: str, entries: list[str]) -> str:
+        return "\n".join([heading, *entries]) if heading else "\n".join(entries)
+
+
+def chunk_document(path: Path, chunker: dict[str, Any]) -> Iterator[str]:
+    """
+    Chunks a document with the chunker parameters recorded in the ingestion manifest.
+
+    Args:
+        path: PDF or plain text file
+        chunker: {"name": one of CHUNKERS, "chunk_size": ..., "chunk_overlap": ...}
+
+    Yields:
+        The chunks of the document, in order
+    """
+    name = chunker["name"]
+    if name == CHUNKER_CV_SECTIONS:
+        return CVChunker(chunker["chunk_size"], chunker["chunk_overlap"]).chunks(iter_pages(Path(path)))
+    if name == CHUNKER_SPLIT_TEXT:
+        return split_text(load_text(Path(path)), chunker["chunk_size"], chunker["chunk_overlap"])
+    raise ValueError(f"Unknown chunker {name!r} (expected one of {', '.join(CHUNKERS)})")
+
+
+def iter_pages(path: Path, lines_per_page: int = 200) -> Iterator[str]:
+    """
+    Yields the text of a document page by page, so large files are never loaded at once.
+
+    Args:
+        path: PDF or plain text file
+        lines_per_page: Number of lines per "page" of a plain text file
+
+    Yields:
+        The text of every PDF page (or block of lines)
+    """
+    if path.suffix.lower() == ".pdf":
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+                # Release the parsed layout of the page before reading the next one:
+                page.flush_cache()
+        return
+    with open(path, encoding="utf-8") as file:
+        lines: list[str] = []
+        for line in file:
+            lines.append(line)
+            if len(lines) == lines_per_page:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+
+
+def load_text(path: Path) -> str:
+    """Loads the text of a PDF or plain text file."""
+    return "\n\n".join(iter_pages(path))
+
+
+def split_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """
+    Splits a text into chunks of at most `chunk_size` characters.
+
+    Cuts are made at the last paragraph, line, sentence or word boundary
+    inside the window, and consecutive chunks share `chunk_overlap` characters.
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum number of characters per chunk
+        chunk_overlap: Number of characters repeated between consecutive chunks
+
+    Yields:
+        The non-empty chunks, in order
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+    text = re.sub(r"[ \t]+", " ", text).strip()
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            window = text[start:end]
+            for separator in _SEPARATORS:
+                cut = window.rfind(separator)
+                if cut > chunk_overlap:
+                    end = start + cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= len(text):
+            break
+        start = max(end - chunk_overlap, start + 1)
+
+
+def detect_sections(chunks: list[str]) -> list[str]:
+    """
+    Returns the CV section of every chunk of a document.
+
+    A chunk belongs to the first heading found in its first half, otherwise to
+    the last heading seen before it (sections span several chunks).
+
+    Args:
+        chunks: Chunks of the document, in order
+
+    Returns:
+        The section name of every chunk (DEFAULT_SECTION before the first heading)
+    """
+    sections, current = [], DEFAULT_SECTION
+    for chunk in chunks:
+        headings = list(_HEADING_PATTERN.finditer(chunk))
+        if headings and headings[0].start() < len(chunk) / 2:
+            sections.append(_SECTION_OF[headings[0].group(1).lower()])
+        else:
+            sections.append(current)
+        if headings:
+            current = _SECTION_OF[headings[-1].group(1).lower()]
+    return sections
+
+
+def sweep(path: Path, labels_path: Path, sizes: list[int], overlap_ratio: float, k: int) -> None:
+    """
+    Chunks a document with every chunker and chunk size, and reports retrieval quality and cost.
+
+    Each configuration is embedded (through the embedding cache) into a temporary local index, and
+    the labeled queries are searched in it: hit@k, MRR, search latency and tokens of the k chunks
+    (the context the agent reads per tool call).
+    """
+    labels = load_labels(labels_path)
+    embed = build_embedder(embedding_model)
+    encoding = tiktoken.get_encoding("cl100k_base")
+    query_vectors = np.asarray(embed([question for question, _ in labels]), dtype=np.float32)
+
+    print(f"\n{CYAN}=== Chunk size sweep: {path.name}, {len(labels)} labeled queries, k={k} ==={RESET}")
+    print(
+        f"{'chunker':<12} {'size':>5} {'chunks':>6} {'tokens':>7} {'embed ms':>9} "
+        f"{'hit@k':>6} {'MRR':>6} {'p50 ms':>7} {'context':>8}"
+    )
+    for name in CHUNKERS:
+        for size in sizes:
+            chunker = {"name": name, "chunk_size": size, "chunk_overlap": int(size * overlap_ratio)}
+            chunks = list(chunk_document(path, chunker))
+            start = time.perf_counter()
+            vectors = np.asarray(embed(chunks), dtype=np.float32)
+            embed_ms = (time.perf_counter() - start) * 1000
+            tokens = [len(encoding.encode(chunk, disallowed_special=())) for chunk in chunks]
+
+            with tempfile.TemporaryDirectory(prefix="chunk_sweep_") as tmp:
+                index = LocalVectorIndex(Path(tmp))
+                ids = [str(i) for i in range(len(chunks))]
+                index.upsert(ids, vectors, chunks)
+                hits, reciprocal_ranks, latencies, context = 0, [], [], []
+                for (_, expected), query in zip(labels, query_vectors, strict=True):
+                    start = time.perf_counter()
+                    results = index.search(query, k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    rows = [int(record["id"]) for record, _ in results]
+                    context.append(sum(tokens[row] for row in rows))
+                    rank = next(
+                        (
+                            position
+                            for position, row in enumerate(rows, start=1)
+                            if any(text.lower() in chunks[row].lower() for text in expected)
+                        ),
+                        None,
+                    )
+                    hits += rank is not None
+                    reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+            print(
+                f"{name:<12} {size:>5} {len(chunks):>6} {sum(tokens) / max(len(chunks), 1):>7.0f} "
+                f"{embed_ms:>9.0f} {hits / len(labels):>6.3f} {sum(reciprocal_ranks) / len(labels):>6.3f} "
+                f"{summarize(latencies)['p50']:>7.3f} {sum(context) / len(context):>8.0f}"
+            )
+    print(f"{YELLOW}tokens: mean tokens per chunk; context: mean tokens of the {k} chunks per query{RESET}")
+    print(f"\n{GREEN}✅ Sweep finished{RESET}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, help="PDF or text document")
+    parser.add_argument("--chunker", choices=CHUNKERS, default=DEFAULT_CHUNKER)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--sweep", action="store_true", help="Compare chunkers and chunk sizes")
+    parser.add_argument("--labels", type=Path, default=None, help="Labeled queries (JSONL) of the sweep")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[400, 600, 800, 1000, 1500])
+    parser.add_argument("--overlap-ratio", type=float, default=0.2, help="Overlap of the sweep (fraction of size)")
+    parser.add_argument("--k", type=int, default=6, help="Number of chunks returned to the agent")
+    args = parser.parse_args()
+
+    if args.sweep:
+        if args.labels is None:
+            parser.error("--sweep requires --labels")
+        sweep(args.path, args.labels, args.sizes, args.overlap_ratio, args.k)
+        return
+
+    chunker = {"name": args.chunker, "chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap}
+    chunks = list(chunk_document(args.path, chunker))
+    for index, (chunk, section) in enumerate(zip(chunks, detect_sections(chunks), strict=True)):
+        print(f"--- chunk {index} [{section}] ({len(chunk)} chars) ---\n{chunk}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script embedding_cache.py
+=========================
+This script contains a persistent embedding cache shared by the ingestion
+and the queries of the RagTool.
+
+Vectors are stored in SQLite as float32 blobs keyed by (model name, SHA-256
+of the text). When the cache grows above `max_bytes`, the least recently used
+vectors are evicted. `cached_embedding_spec` wraps an `embedding_model`
+provider spec into a crewAI "custom" provider, so the cache is transparent
+to the RagTool and to ChromaDB.
+
+With `dimensions`, the vectors are truncated to their first dimensions and
+renormalized (Matryoshka embeddings, e.g. `text-embedding-3-*`). The cache
+keeps the full vectors, so changing `dimensions` never calls the model again.
+
+Run
+===
+uv run embedding_cache.py   # prints the content of the cache
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from chromadb.api.types import EmbeddingFunction
+from crewai.rag.embeddings.factory import build_embedder
+from crewai.rag.embeddings.providers.custom.embedding_callable import CustomEmbeddingFunction
+from logging_config import get_logger
+from tracing import span
+
+logger = get_logger(__name__)
+
+CACHE_FILENAME = "embedding_cache.sqlite3"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access);
+"""
+
+
+def text_hash(text: str) -> str:
+    """Returns the SHA-256 of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite store of float32 vectors with LRU eviction by size.
+
+    Args:
+        path: Path of the SQLite file
+        max_bytes: Maximum size of the stored vectors (LRU eviction above it)
+    """
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> dict[str, list[float]]:
+        """
+        Looks up vectors and refreshes their last access time.
+
+        Args:
+            model: Name of the embedding model
+            hashes: SHA-256 of the texts
+
+        Returns:
+            Dictionary hash -> vector with the hashes found in the cache
+        """
+        unique = list(dict.fromkeys(hashes))
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement:
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found],
+                )
+            self.hits += sum(1 for key in hashes if key in found)
+            self.misses += sum(1 for key in hashes if key not in found)
+        return found
+
+    def put_many(self, model: str, items: dict[str, Sequence[float]]) -> None:
+        """Stores vectors (hash -> vector) and evicts the least recently used ones if needed."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(model, key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for row in rows:
+                old = self._conn.execute(
+                    "SELECT LENGTH(vector) FROM embeddings WHERE model = ? AND text_hash = ?", row[:2]
+                ).fetchone()
+                self._bytes += len(row[2]) - (old[0] if old else 0)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Deletes the least recently used vectors until the cache fits (caller holds the lock)."""
+        # Evict down to 90% of the limit, so eviction does not run on every insert:
+        target = int(self.max_bytes * 0.9)
+        while self._bytes > target:
+            rows = self._conn.execute(
+                "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for model, key, size in rows:
+                victims.append((model, key))
+                self._bytes -= size
+                if self._bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", victims)
+            self.evictions += len(victims)
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the hit/miss counters of this process and the size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# One cache (and one set of counters) per file, shared by every embedding function:
+_caches: dict[Path, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> EmbeddingCache:
+    """Returns the process-wide cache stored at `path`."""
+    path = Path(path).resolve()
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path, max_bytes=max_bytes)
+        return _caches[path]
+
+
+def embedding_cache_stats() -> dict[str, dict[str, Any]]:
+    """Returns the statistics of every cache opened by this process."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {str(path): cache.stats() for path, cache in caches.items()}
+
+
+class CachedEmbeddingFunction(CustomEmbeddingFunction, EmbeddingFunction):
+    """
+    ChromaDB embedding function that looks up the cache before calling the model.
+
+    Only the texts missing from the cache are sent to the wrapped embedding
+    function (deduplicated, in one call). The ChromaDB identity of the wrapped
+    function (`name`, `get_config`, ...) is forwarded, so existing collections
+    accept it as the same embedding function.
+
+    crewAI's custom provider requires a `CustomEmbeddingFunction` subclass and
+    `Crew(embedder=...)` a ChromaDB `EmbeddingFunction` subclass, hence both bases.
+
+    Args:
+        inner: Embedding function of the provider
+        model: Name of the embedding model (part of the cache key)
+        cache: Embedding cache
+        dimensions: Matryoshka truncation of the returned vectors (None: full vectors)
+    """
+
+    def __init__(self, inner: Any, model: str, cache: EmbeddingCache, dimensions: int | None = None) -> None:
+        self.inner = inner
+        self.model = model
+        self.cache = cache
+        self.dimensions = dimensions
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        texts = list(input)
+        hashes = [text_hash(text) for text in texts]
+        with span("embed", model=self.model, texts=len(texts)) as embed_span:
+            vectors = self.cache.get_many(self.model, hashes)
+
+            missing = {key: text for key, text in zip(hashes, texts, strict=True) if key not in vectors}
+            embed_span.set(cache_hits=len(texts) - len(missing))
+            if missing:
+                embedded = self.inner(list(missing.values()))
+                new_vectors = {key: [float(v) for v in vector] for key, vector in zip(missing, embedded, strict=True)}
+                self.cache.put_many(self.model, new_vectors)
+                vectors.update(new_vectors)
+        if self.dimensions:
+            return [truncate_vector(vectors[key], self.dimensions) for key in hashes]
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, input: list[str]) -> list[list[float]]:
+        return self(input)
+
+    def embed_documents(self, input: list[str]) -> list[list[float]]:
+        return self(input)
+
+    # ChromaDB identity of the wrapped function (called on the instance by ChromaDB):
+
+    def name(self) -> str:
+        return self.inner.name()
+
+    def get_config(self) -> dict[str, Any]:
+        return self.inner.get_config()
+
+    def default_space(self) -> Any:
+        return self.inner.default_space()
+
+    def supported_spaces(self) -> list[Any]:
+        return self.inner.supported_spaces()
+
+    def is_legacy(self) -> bool:
+        # The cache cannot be rebuilt from a persisted config, and ChromaDB would otherwise
+        # register this class under the name of the wrapped provider:
+        return True
+
+    def validate_config_update(self, old_config: dict[str, Any], new_config: dict[str, Any]) -> None:
+        self.inner.validate_config_update(old_config, new_config)
+
+
+def truncate_vector(vector: Sequence[float], dimensions: int) -> list[float]:
+    """Returns the first `dimensions` components of a vector, renormalized to unit length."""
+    head = [float(v) for v in vector[:dimensions]]
+    norm = math.sqrt(sum(v * v for v in head)) or 1.0
+    return [v / norm for v in head]
+
+
+def cached_embedding_spec(
+    spec: dict[str, Any],
+    cache_path: Path,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    dimensions: int | None = None,
+) -> dict[str, Any]:
+    """
+    Wraps an `embedding_model` provider spec with the persistent cache.
+
+    Args:
+        spec: Provider spec, e.g. {"provider": "openai", "config": {"model_name": ...}}
+        cache_path: Path of the SQLite cache file
+        max_bytes: Maximum size of the cached vectors
+        dimensions: Matryoshka truncation of the vectors (None: full vectors)
+
+    Returns:
+        A "custom" provider spec accepted by RagToolConfig and Crew(embedder=...)
+    """
+    options = spec["config"]
+    # Custom providers (e.g. the fake embedder of the benchmarks) are named after their callable:
+    name = options.get("model_name") or options.get("model")
+    name = name or getattr(options.get("embedding_callable"), "__name__", None)
+    model = f"{spec['provider']}/{name}"
+
+    class ProviderCachedEmbeddingFunction(CachedEmbeddingFunction):
+        """Cached embedding function built by crewAI from the custom provider spec."""
+
+        def __init__(self, **_: Any) -> None:
+            super().__init__(
+                inner=build_embedder(spec), model=model, cache=get_cache(cache_path, max_bytes), dimensions=dimensions
+            )
+
+    return {"provider": "custom", "config": {"embedding_callable": ProviderCachedEmbeddingFunction}}
+
+
+if __name__ == "__main__":
+    from config_crewai import STORAGE_DIR
+
+    cache_path = STORAGE_DIR / CACHE_FILENAME
+    if not cache_path.exists():
+        print(f"❌ Embedding cache not found in: {cache_path}")
+        raise SystemExit(1)
+
+    conn = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True)
+    print(f"📁 Location: {cache_path}")
+    for model, count, size in conn.execute(
+        "SELECT model, COUNT(*), SUM(LENGTH(vector)) FROM embeddings GROUP BY model ORDER BY model"
+    ):
+        print(f"   └─ {model}: {count} vectors, {size / 1024 / 1024:.1f} MB")
+    conn.close()
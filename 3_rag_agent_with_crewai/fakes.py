@@ -0,0 +1,173 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script fakes.py
+===============
+This script contains deterministic offline replacements for the LLM and the
+embedding model. They are used by the benchmarks so that the overhead of the
+RAG stack can be measured without network calls or API costs.
+"""
+import asyncio
+import hashlib
+import math
+import re
+import struct
+import time
+from typing import Any
+
+from chromadb.api.types import EmbeddingFunction
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.llm_events import LLMStreamChunkEvent
+from crewai.llms.base_llm import BaseLLM
+from crewai.rag.embeddings.providers.custom.embedding_callable import CustomEmbeddingFunction
+
+DEFAULT_FAKE_ANSWER = "The professional curriculum belongs to a Senior Data Scientist."
+
+
+class FakeLLM(BaseLLM):
+    """
+    LLM stub that always returns a ReAct final answer after an optional delay.
+
+    When `stream` is True, the answer is also emitted word by word as
+    `LLMStreamChunkEvent`s, one every `token_delay` seconds, like a real
+    streaming provider.
+
+    When `tool_name` is set, the first call of a task asks for that tool
+    (ReAct action with `tool_query`), and the call that follows its
+    observation returns the final answer, so the tool runs once per question.
+
+    Args:
+        answer: Text returned as the final answer
+        latency: Seconds slept before answering (simulates the provider)
+        token_delay: Seconds between two streamed tokens
+        stream: Whether to emit stream chunk events
+        model: Model name reported to CrewAI
+        tool_name: Tool called once before answering (None: answers directly)
+        tool_query: Query passed to the tool
+    """
+
+    def __init__(
+        self,
+        answer: str = DEFAULT_FAKE_ANSWER,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        stream: bool = False,
+        model: str = "fake/stub-llm",
+        tool_name: str | None = None,
+        tool_query: str = "professional experience and skills",
+    ) -> None:
+        super().__init__(model=model, temperature=0.0)
+        self.answer = answer
+        self.latency = latency
+        self.token_delay = token_delay
+        self.stream = stream
+        self.tool_name = tool_name
+        self.tool_query = tool_query
+        self.calls = 0
+
+    def _final_answer(self) -> str:
+        return f"Thought: I now know the final answer\nFinal Answer: {self.answer}"
+
+    def call(
+        self,
+        messages: str | list[dict[str, Any]],
+        tools: list[dict] | None = None,
+        callbacks: list[Any] | None = None,
+        available_functions: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.tool_name and "Observation:" not in str(messages):
+            return (
+                f"Thought: I should search the knowledge base\nAction: {self.tool_name}\n"
+                f'Action Input: {{"query": "{self.tool_query}"}}'
+            )
+        text = self._final_answer()
+        if self.stream:
+            for token in re.findall(r"\S+\s*", text):
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+                crewai_event_bus.emit(
+                    self,
+                    event=LLMStreamChunkEvent(
+                        chunk=token,
+                        from_task=kwargs.get("from_task"),
+                        from_agent=kwargs.get("from_agent"),
+                    ),
+                )
+        return text
+
+    async def acall(
+        self,
+        messages: str | list[dict[str, Any]],
+        tools: list[dict] | None = None,
+        callbacks: list[Any] | None = None,
+        available_functions: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> str:
+        # Native async kickoff (`Crew.akickoff`): same answer, off the event loop
+        return await asyncio.to_thread(self.call, messages, tools, callbacks, available_functions, **kwargs)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128_000
+
+
+class FakeEmbeddingFunction(CustomEmbeddingFunction, EmbeddingFunction):
+    """
+    Deterministic embedding function for the "custom" embedder provider of crewAI.
+
+    crewAI checks the class twice: the embedder spec (`Crew(embedder=...)`,
+    `RagToolConfig`) expects a ChromaDB `EmbeddingFunction` and the provider
+    built from it expects a `CustomEmbeddingFunction`, hence both bases.
+
+    Each text is hashed into a pseudo-random unit vector, so identical texts
+    always get identical embeddings. The vectors carry no semantics.
+    """
+
+    dimensions = 256
+
+    def __init__(self, **_: Any) -> None:
+        pass
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        return [self.embed(text) for text in input]
+
+    @classmethod
+    def embed(cls, text: str) -> list[float]:
+        """Returns the unit vector associated with `text`."""
+        values: list[float] = []
+        counter = 0
+        while len(values) < cls.dimensions:
+            digest = hashlib.sha256(f"{counter}:{text}".encode()).digest()
+            values.extend(v / 2**31 - 1.0 for v in struct.unpack("<8I", digest))
+            counter += 1
+        values = values[: cls.dimensions]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    @staticmethod
+    def name() -> str:
+        return "fake_embedding_function"
+
+    def get_config(self) -> dict[str, Any]:
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config: dict[str, Any]) -> "FakeEmbeddingFunction":
+        return FakeEmbeddingFunction()
+
+
+# Embedder spec accepted by `Crew(embedder=...)` for offline memory storage:
+FAKE_EMBEDDER_SPEC = {
+    "provider": "custom",
+    "config": {"embedding_callable": FakeEmbeddingFunction},
+}
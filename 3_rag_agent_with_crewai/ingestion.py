@@ -0,0 +1,376 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script ingestion.py
+===================
+This script contains the manifest-backed incremental ingestion of the
+knowledge base.
+
+The manifest records, per collection, the embedding model, the chunker
+parameters and, per file, its size, mtime, content hash and chunk ids:
+
+- unchanged file (same size and mtime): one `stat` call, nothing else
+- touched file with the same content hash: one hash, nothing re-embedded
+- changed file: parsed and chunked again, but only chunks whose content
+  hash changed are embedded; removed chunks are deleted
+- changed embedding model or chunker parameters: the collection is rebuilt
+
+Documents are chunked by `cv_chunker.py` ("split_text" by default, or
+"cv_sections": section-aligned chunks of whole CV entries, read page by page).
+
+Every chunk carries the metadata used to scope a search in a shared
+collection: `document_id` (file stem by default), `tenant`, `section` (CV
+heading the chunk belongs to) and `language` ("pt" or "en"), and the
+features of the reranker (`reranker.chunk_features`).
+"""
+import hashlib
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from cv_chunker import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    DEFAULT_CHUNKER,
+    chunk_document,
+    detect_sections,
+)
+from logging_config import get_logger
+from reranker import chunk_features
+from vector_store import ChromaVectorStore, LocalVectorStore
+
+logger = get_logger(__name__)
+
+MANIFEST_FILENAME = "ingestion_manifest.json"
+MANIFEST_VERSION = 1
+
+# Version of the chunk metadata (a change rebuilds the collections, like the chunker parameters):
+METADATA_VERSION = 3
+DEFAULT_TENANT = "default"
+
+_LANGUAGE_WORDS = {
+    "pt": frozenset("de da do das dos em no na para com que não uma um os pelo pela são é foi como mais".split()),
+    "en": frozenset("the of and to in with for on at is was from by an as are this that".split()),
+}
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    """Returns the SHA-256 of a chunk of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def detect_language(text: str, default: str = "pt") -> str:
+    """Returns "pt" or "en", the language whose common words are the most frequent in the text."""
+    words = re.findall(r"\w+", text.lower())
+    counts = {language: sum(word in common for word in words) for language, common in _LANGUAGE_WORDS.items()}
+    if counts["pt"] == counts["en"]:
+        return default
+    return max(counts, key=counts.get)
+
+
+def chunk_id(source: str, chunk_content_hash: str) -> str:
+    """Returns the id of a chunk (stable while the source and the content do not change)."""
+    return hashlib.sha256(f"{source}\0{chunk_content_hash}".encode()).hexdigest()[:32]
+
+
+class IngestionManifest:
+    """
+    JSON manifest of what has been ingested in each collection.
+
+    Args:
+        path: Path of the manifest file
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.data: dict[str, Any] = {"version": MANIFEST_VERSION, "collections": {}}
+        if self.path.exists():
+            loaded = json.loads(self.path.read_text(encoding="utf-8"))
+            if loaded.get("version") == MANIFEST_VERSION:
+                self.data = loaded
+
+    def collection(self, name: str) -> dict[str, Any]:
+        """Returns the (mutable) manifest entry of a collection."""
+        return self.data["collections"].setdefault(name, {"embedding_model": None, "chunker": None, "files": {}})
+
+    def fingerprint(self, name: str) -> str:
+        """Returns a hash that changes whenever the content of the collection changes."""
+        entry = self.data["collections"].get(name, {})
+        files = entry.get("files", {})
+        state = {
+            "embedding_model": entry.get("embedding_model"),
+            "chunker": entry.get("chunker"),
+            "files": {source: info["sha256"] for source, info in sorted(files.items())},
+        }
+        return content_hash(json.dumps(state, sort_keys=True))
+
+    def save(self) -> None:
+        """Writes the manifest atomically (a crash never leaves a truncated file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class ManifestWatcher:
+    """
+    Returns the fingerprint of a collection, re-reading the manifest only when the file changes.
+
+    Args:
+        path: Path of the manifest file
+        collection_name: Name of the collection
+    """
+
+    def __init__(self, path: Path, collection_name: str) -> None:
+        self.path = Path(path)
+        self.collection_name = collection_name
+        self._mtime_ns: int | None = None
+        self._fingerprint = ""
+
+    def __call__(self) -> str:
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return ""
+        if mtime_ns != self._mtime_ns:
+            self._fingerprint = IngestionManifest(self.path).fingerprint(self.collection_name)
+            self._mtime_ns = mtime_ns
+        return self._fingerprint
+
+
+@dataclass
+class ChunkDiff:
+    """Chunks of a file compared with the chunks recorded in the manifest."""
+
+    source: str
+    chunks: dict[str, str]
+    positions: dict[str, int]
+    new_ids: list[str]
+    removed_ids: list[str]
+    moved_ids: list[str]
+    existed: bool
+    scope: dict[str, str]
+    sections: dict[str, str]
+    language: str
+
+    def metadata(self, cid: str) -> dict[str, Any]:
+        """Returns the metadata stored with a chunk."""
+        return {
+            "source": self.source,
+            "chunk_index": self.positions[cid],
+            **self.scope,
+            "section": self.sections[cid],
+            "language": detect_language(self.chunks[cid], default=self.language),
+            **chunk_features(self.chunks[cid], self.positions[cid], len(self.chunks)),
+        }
+
+
+@dataclass
+class IngestionReport:
+    """Outcome of the ingestion of one file."""
+
+    source: str
+    status: str  # "unchanged", "new", "updated"
+    added: int = 0
+    removed: int = 0
+    kept: int = 0
+
+
+class IncrementalIngestor:
+    """
+    Ingests files into a collection, embedding only what changed.
+
+    Args:
+        store: Vector store of the collection
+        manifest: Ingestion manifest shared by all collections
+        collection_name: Name of the collection
+        embedding_model: Name of the embedding model (a change rebuilds the collection)
+        chunk_size: Maximum number of characters per chunk
+        chunk_overlap: Number of characters repeated between consecutive chunks
+        chunker: Chunker of `cv_chunker.CHUNKERS` ("split_text" by default)
+        tenant: Tenant written in the metadata of every chunk
+    """
+
+    def __init__(
+        self,
+        store: ChromaVectorStore | LocalVectorStore,
+        manifest: IngestionManifest,
+        collection_name: str,
+        embedding_model: str,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        chunker: str = DEFAULT_CHUNKER,
+        tenant: str = DEFAULT_TENANT,
+    ) -> None:
+        self.store = store
+        self.manifest = manifest
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.tenant = tenant
+        self.chunker = {
+            "name": chunker,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "metadata": METADATA_VERSION,
+        }
+        self._checked = False
+
+    def _check_collection(self) -> dict[str, Any]:
+        """Resets the manifest entry when it no longer matches the collection."""
+        entry = self.manifest.collection(self.collection_name)
+        if self._checked:
+            return entry
+        self._checked = True
+
+        params_changed = entry["embedding_model"] != self.embedding_model or entry["chunker"] != self.chunker
+        if entry["embedding_model"] is None and self.store.count() > 0:
+            # Chunks written before the manifest existed (e.g. by `RagTool.add`) cannot be diffed,
+            # and ingesting next to them would duplicate the documents: the collection is migrated
+            # once, by rebuilding it (the manifest records it from then on):
+            logger.warning(
+                f"Collection {self.collection_name} has no manifest yet: clearing its "
+                f"{self.store.count()} chunks to rebuild it"
+            )
+            self.store.clear()
+        elif params_changed and entry["files"]:
+            logger.info(f"Embedding model or chunker changed for {self.collection_name}: rebuilding the collection")
+            for info in entry["files"].values():
+                self.store.delete(info["chunks"])
+            entry["files"] = {}
+        elif entry["files"] and self.store.count() == 0:
+            # The collection was deleted outside of this manifest:
+            entry["files"] = {}
+        entry["embedding_model"] = self.embedding_model
+        entry["chunker"] = self.chunker
+        return entry
+
+    def chunk_file(self, path: Path) -> Iterator[str]:
+        """Chunks a file with the chunker parameters recorded in the manifest."""
+        return chunk_document(path, self.chunker)
+
+    def scope(self, source: str, document_id: str | None = None) -> dict[str, str]:
+        """Returns the document id and tenant of a file (the document id defaults to the file stem)."""
+        return {"document_id": document_id or Path(source).stem, "tenant": self.tenant}
+
+    def unchanged(
+        self, source: str, stat: os.stat_result, document_id: str | None = None
+    ) -> dict[str, Any] | None:
+        """Returns the manifest info of a file whose size, mtime and scope did not change."""
+        info = self._check_collection()["files"].get(source)
+        if (
+            info
+            and info["size"] == stat.st_size
+            and info["mtime_ns"] == stat.st_mtime_ns
+            and info.get("scope") == self.scope(source, document_id)
+        ):
+            return info
+        return None
+
+    def touch(
+        self, source: str, stat: os.stat_result, sha256: str, document_id: str | None = None
+    ) -> dict[str, Any] | None:
+        """Records the new size/mtime of a file whose content hash and scope did not change."""
+        info = self._check_collection()["files"].get(source)
+        if info and info["sha256"] == sha256 and info.get("scope") == self.scope(source, document_id):
+            info["size"], info["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+            return info
+        return None
+
+    def diff(self, source: str, contents: Iterable[str], document_id: str | None = None) -> ChunkDiff:
+        """Compares the new chunks of a file with the chunks recorded in the manifest."""
+        info = self._check_collection()["files"].get(source)
+        contents = list(contents)
+        chunks: dict[str, str] = {}
+        sections: dict[str, str] = {}
+        for content, section in zip(contents, detect_sections(contents), strict=True):
+            cid = chunk_id(source, content_hash(content))
+            chunks.setdefault(cid, content)
+            sections.setdefault(cid, section)
+
+        scope = self.scope(source, document_id)
+        positions = {cid: index for index, cid in enumerate(chunks)}
+        old_positions = {cid: index for index, cid in enumerate(info["chunks"])} if info else {}
+        # Kept chunks are not embedded again, only their metadata is refreshed (new position, relative
+        # position or scope):
+        rescoped = info is not None and (info.get("scope") != scope or len(info["chunks"]) != len(chunks))
+        return ChunkDiff(
+            source=source,
+            chunks=chunks,
+            positions=positions,
+            new_ids=[cid for cid in chunks if cid not in old_positions],
+            removed_ids=sorted(old_positions.keys() - chunks.keys()),
+            moved_ids=[
+                cid for cid in chunks if cid in old_positions and (rescoped or old_positions[cid] != positions[cid])
+            ],
+            existed=info is not None,
+            scope=scope,
+            sections=sections,
+            language=detect_language(" ".join(contents)),
+        )
+
+    def commit(self, stat: os.stat_result, sha256: str, diff: ChunkDiff) -> IngestionReport:
+        """Records a file in the manifest once all its new chunks are written."""
+        self._check_collection()["files"][diff.source] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "chunks": list(diff.chunks),
+            "scope": diff.scope,
+        }
+        return IngestionReport(
+            diff.source,
+            "updated" if diff.existed else "new",
+            added=len(diff.new_ids),
+            removed=len(diff.removed_ids),
+            kept=len(diff.chunks) - len(diff.new_ids),
+        )
+
+    def ingest_file(self, path: Path, document_id: str | None = None) -> IngestionReport:
+        """
+        Ingests one file into the collection.
+
+        Args:
+            path: Path to the PDF or text file
+            document_id: Id written in the metadata of its chunks (default: the file stem)
+
+        Returns:
+            IngestionReport with the number of chunks added, removed and kept
+        """
+        path = Path(path).resolve()
+        source = str(path)
+        stat = path.stat()
+
+        if info := self.unchanged(source, stat, document_id):
+            return IngestionReport(source, "unchanged", kept=len(info["chunks"]))
+
+        sha256 = file_sha256(path)
+        if info := self.touch(source, stat, sha256, document_id):
+            self.manifest.save()
+            return IngestionReport(source, "unchanged", kept=len(info["chunks"]))
+
+        diff = self.diff(source, self.chunk_file(path), document_id)
+        self.store.delete(diff.removed_ids)
+        self.store.upsert(
+            ids=diff.new_ids,
+            documents=[diff.chunks[cid] for cid in diff.new_ids],
+            metadatas=[diff.metadata(cid) for cid in diff.new_ids],
+        )
+        self.store.update_metadata(ids=diff.moved_ids, metadatas=[diff.metadata(cid) for cid in diff.moved_ids])
+
+        report = self.commit(stat, sha256, diff)
+        self.manifest.save()
+        return report
@@ -5,62 +5,307 @@ Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
 inspect_chromadb.py
 ===================
 This script is to inspect the ChromaDB database
-of the CrewAI.
+of the CrewAI: storage analytics and health checks.
+
+Per collection it reports the stored chunks, the vector bytes (logical, in
+the embeddings queue and in the HNSW segment files), the duplicate-content
+chunks (grouped by the SHA-256 of their document) and the fragmentation of
+the HNSW index (deleted elements still allocated). For the database it
+reports the orphaned rows (embeddings without segment, metadata without
+embedding, queue entries of deleted collections), the orphaned segment
+directories and the free pages of SQLite.
+
+Every metric is computed with grouped SQL over the whole tables (one query
+per metric, not one per collection). The database is opened read-only
+(`mode=ro`): each query only holds the shared lock of SQLite while it runs,
+so the figures are consistent and the running application is never blocked
+for longer than one query. `--immutable` also sets `immutable=1`: SQLite
+then takes no lock at all and never checks the file for changes, which is
+only safe on a copy of the database or while the application is stopped.
+
+`--compact` deletes the orphaned rows and segment directories and runs
+VACUUM to give the free pages back to the file system. It writes to the
+database: stop the application first.
 
 Run
 ===
 uv run inspect_chromadb.py
+uv run inspect_chromadb.py --path ~/.local/share/3_rag_agent_with_crewai/chroma.sqlite3
+uv run inspect_chromadb.py --immutable --path /backups/chroma.sqlite3
+uv run inspect_chromadb.py --compact
 """
+import argparse
+import hashlib
 import json
+import re
+import shutil
 import sqlite3
+import struct
 import sys
 from pathlib import Path
+from typing import Any
+
+# Directories of the HNSW segments are named after the segment id:
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+COLLECTIONS_SQL = """
+WITH chunk AS (
+    SELECT s.collection AS collection_id, e.id AS id
+    FROM embeddings e JOIN segments s ON s.id = e.segment_id
+),
+counts AS (
+    SELECT collection_id, COUNT(*) AS chunks FROM chunk GROUP BY collection_id
+),
+documents AS (
+    SELECT c.collection_id, sha256(m.string_value) AS document_hash, COUNT(*) AS n
+    FROM chunk c JOIN embedding_metadata m ON m.id = c.id AND m.key = 'chroma:document'
+    GROUP BY c.collection_id, document_hash
+),
+duplicates AS (
+    SELECT collection_id, SUM(n - 1) AS duplicate_chunks, SUM(n > 1) AS duplicate_groups
+    FROM documents GROUP BY collection_id
+)
+SELECT col.id, col.name, col.dimension, col.config_json_str,
+       COALESCE(counts.chunks, 0), COALESCE(d.duplicate_chunks, 0), COALESCE(d.duplicate_groups, 0)
+FROM collections col
+LEFT JOIN counts ON counts.collection_id = col.id
+LEFT JOIN duplicates d ON d.collection_id = col.id
+ORDER BY col.name
+"""
+
+# Collection ids are UUIDs, the last 36 characters of the queue topic ("persistent://tenant/db/<id>"):
+QUEUE_SQL = """
+SELECT substr(topic, -36) AS collection_id, COUNT(*), COALESCE(SUM(LENGTH(vector)), 0)
+FROM embeddings_queue GROUP BY collection_id
+"""
+
+ORPHANS_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM embeddings WHERE segment_id NOT IN (SELECT id FROM segments)),
+    (SELECT COUNT(*) FROM embedding_metadata WHERE id NOT IN (SELECT id FROM embeddings)),
+    (SELECT COUNT(*) FROM segments WHERE collection NOT IN (SELECT id FROM collections)),
+    (SELECT COUNT(*) FROM embeddings_queue WHERE substr(topic, -36) NOT IN (SELECT id FROM collections))
+"""
+
+COMPACT_SQL = (
+    "DELETE FROM embeddings WHERE segment_id NOT IN (SELECT id FROM segments)",
+    "DELETE FROM embedding_metadata WHERE id NOT IN (SELECT id FROM embeddings)",
+    # The full-text rows are keyed by the embedding id (not by the rowid of embedding_metadata):
+    "DELETE FROM embedding_fulltext_search WHERE rowid NOT IN (SELECT id FROM embeddings)",
+    "DELETE FROM segment_metadata WHERE segment_id IN (SELECT id FROM segments WHERE collection NOT IN "
+    "(SELECT id FROM collections))",
+    "DELETE FROM max_seq_id WHERE segment_id NOT IN (SELECT id FROM segments WHERE collection IN "
+    "(SELECT id FROM collections))",
+    "DELETE FROM segments WHERE collection NOT IN (SELECT id FROM collections)",
+    "DELETE FROM embeddings_queue WHERE substr(topic, -36) NOT IN (SELECT id FROM collections)",
+)
+
+
+def default_db_path() -> Path:
+    """Path of the ChromaDB database of crewAI, based on the current directory."""
+    return Path.home() / ".local" / "share" / Path.cwd().name / "chroma.sqlite3"
+
+
+def connect_read_only(db_path: Path, immutable: bool = False) -> sqlite3.Connection:
+    """
+    Opens the database read-only (it never takes the write lock).
+
+    With `immutable`, SQLite takes no lock at all: only for a copy of the database
+    or while no process writes to it.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro{'&immutable=1' if immutable else ''}", uri=True)
+    conn.create_function("sha256", 1, _sha256, deterministic=True)
+    return conn
+
+
+def _sha256(text: str | None) -> str | None:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest() if text is not None else None
+
+
+def directory_bytes(path: Path) -> int:
+    """Returns the bytes really used by the files of a directory."""
+    return sum(p.stat().st_blocks * 512 for p in path.rglob("*") if p.is_file())
+
 
-# Determine the path to the ChromaDB database based on the current directory:
-project_name = Path.cwd().name
-db_path = Path.home() / ".local" / "share" / project_name / "chroma.sqlite3"
+def read_hnsw_header(segment_dir: Path) -> dict[str, int] | None:
+    """
+    Reads the element counts of a persisted HNSW segment (header.bin of hnswlib).
 
-if not db_path.exists():
-    print(f"❌ ChromaDB database not found in: {db_path}")
-    print("\n💡 Tip: Execute this script from the directory: 3_rag_agent_with_crewai/")
-    sys.exit(1)
+    Returns:
+        {"max_elements", "elements", "bytes_per_element"}, or None when the segment was never persisted
+    """
+    header = segment_dir / "header.bin"
+    if not header.exists() or header.stat().st_size < 32:
+        return None
+    with open(header, "rb") as f:
+        _, max_elements, elements, bytes_per_element = struct.unpack("<4Q", f.read(32))
+    return {"max_elements": max_elements, "elements": elements, "bytes_per_element": bytes_per_element}
 
-conn = sqlite3.connect(str(db_path))
-cursor = conn.cursor()
 
-print(f"📁 Location: {db_path}")
-print(f"💾 Size: {db_path.stat().st_size / 1024:.1f} KB")
-print("=" * 80)
+def segments_by_collection(conn: sqlite3.Connection) -> dict[str, list[tuple[str, str]]]:
+    """Returns the (segment id, scope) of every collection."""
+    segments: dict[str, list[tuple[str, str]]] = {}
+    for segment_id, collection_id, scope in conn.execute("SELECT id, collection, scope FROM segments"):
+        segments.setdefault(collection_id, []).append((segment_id, scope))
+    return segments
 
-print("\n📚 STORED COLLECTIONS:")
-print("=" * 25)
-cursor.execute("SELECT id, name, dimension, config_json_str FROM collections;")
-collections = cursor.fetchall()
 
-for i, (col_id, col_name, dimension, config_str) in enumerate(collections, 1):
-    print(f'\n{i}. 📦 COLLECTION: "{col_name}"')
+def orphan_segment_dirs(db_path: Path, conn: sqlite3.Connection) -> list[Path]:
+    """Returns the segment directories next to the database that no segment references."""
+    known = {segment_id for (segment_id,) in conn.execute("SELECT id FROM segments")}
+    return sorted(p for p in db_path.parent.iterdir() if p.is_dir() and _UUID.match(p.name) and p.name not in known)
+
+
+def database_pages(conn: sqlite3.Connection) -> dict[str, int]:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"page_size": page_size, "pages": page_count, "free_pages": freelist}
+
+
+def _model_of(config_str: str | None) -> str | None:
+    config: dict[str, Any] = json.loads(config_str or "{}")
+    ef = config.get("embedding_function") or {}
+    if ef.get("type") == "known":
+        return f'{ef.get("name")} ({ef.get("config", {}).get("model_name", "N/A")})'
+    return None
+
+
+def _mb(size: float) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def print_collection(
+    i: int,
+    row: tuple,
+    queue: dict[str, tuple[int, int]],
+    segments: dict[str, list[tuple[str, str]]],
+    db_path: Path,
+) -> None:
+    """Prints the storage report of one collection (a row of COLLECTIONS_SQL)."""
+    col_id, name, dimension, config_str, chunks, duplicate_chunks, duplicate_groups = row
+    print(f'\n{i}. 📦 COLLECTION: "{name}"')
     print(f"   └─ ID: {col_id}")
     print(f"   └─ Dimension: {dimension}")
+    if model := _model_of(config_str):
+        print(f"   └─ Model: {model}")
+    print(f"   └─ Stored chunks: {chunks}")
+    print(f"   └─ Vector bytes: {_mb(chunks * (dimension or 0) * 4)} (float32)")
+    queued, queued_bytes = queue.get(col_id, (0, 0))
+    print(f"   └─ Embeddings queue: {queued} entries, {_mb(queued_bytes)} of vectors")
+    print(f"   └─ Duplicate chunks: {duplicate_chunks} (same content in {duplicate_groups} groups)")
+
+    for segment_id, scope in segments.get(col_id, []):
+        if scope != "VECTOR":
+            continue
+        segment_dir = db_path.parent / segment_id
+        if not segment_dir.is_dir():
+            print(f"   └─ HNSW segment {segment_id[:8]}: not persisted yet")
+            continue
+        line = f"   └─ HNSW segment {segment_id[:8]}: {_mb(directory_bytes(segment_dir))} on disk"
+        header = read_hnsw_header(segment_dir)
+        if header and header["elements"]:
+            dead = max(header["elements"] - chunks, 0)
+            slack = (header["max_elements"] - header["elements"]) * header["bytes_per_element"]
+            line += (
+                f", {header['elements']} elements ({dead} deleted, "
+                f"fragmentation {dead / header['elements']:.0%}), {_mb(slack)} preallocated"
+            )
+        print(line)
+
+
+def print_health(orphans: tuple[int, int, int, int], orphan_dirs: list[Path], pages: dict[str, int]) -> None:
+    """Prints the orphaned rows and directories and the free pages of the database."""
+    print("\n🩺 HEALTH:")
+    print("=" * 25)
+    embeddings_without_segment, metadata_without_embedding, segments_without_collection, orphan_queue = orphans
+    print(f"   └─ Embeddings without segment: {embeddings_without_segment}")
+    print(f"   └─ Metadata rows without embedding: {metadata_without_embedding}")
+    print(f"   └─ Segments without collection: {segments_without_collection}")
+    print(f"   └─ Queue entries of deleted collections: {orphan_queue}")
+    orphan_bytes = sum(directory_bytes(path) for path in orphan_dirs)
+    print(f"   └─ Orphaned segment directories: {len(orphan_dirs)} ({_mb(orphan_bytes)})")
+    free_bytes = pages["free_pages"] * pages["page_size"]
+    print(f"   └─ SQLite free pages: {pages['free_pages']} of {pages['pages']} ({_mb(free_bytes)} reclaimable)")
 
-    config = json.loads(config_str)
-    if "embedding_function" in config:
-        ef = config["embedding_function"]
-        if ef.get("type") == "known":
-            model_name = ef.get("config", {}).get("model_name", "N/A")
-            print(f'   └─ Model: {ef.get("name")} ({model_name})')
-
-    # Count embeddings:
-    cursor.execute(
-        """
-        SELECT COUNT(*) FROM embeddings
-        WHERE segment_id IN (SELECT id FROM segments WHERE collection = ?)
-    """,
-        (col_id,),
+    if any(orphans) or orphan_dirs or pages["free_pages"]:
+        print("\n💡 Tip: stop the application and run with --compact to reclaim the space")
+
+
+def inspect(db_path: Path, immutable: bool = False) -> list[Path]:
+    """Prints the storage report and returns the orphaned segment directories."""
+    conn = connect_read_only(db_path, immutable=immutable)
+    try:
+        collections = conn.execute(COLLECTIONS_SQL).fetchall()
+        queue = {collection_id: (n, size) for collection_id, n, size in conn.execute(QUEUE_SQL)}
+        segments = segments_by_collection(conn)
+        orphans = conn.execute(ORPHANS_SQL).fetchone()
+        orphan_dirs = orphan_segment_dirs(db_path, conn)
+        pages = database_pages(conn)
+    finally:
+        conn.close()
+
+    print(f"📁 Location: {db_path}")
+    print(f"💾 Size: {_mb(db_path.stat().st_size)} (SQLite)")
+    print("=" * 80)
+
+    print("\n📚 STORED COLLECTIONS:")
+    print("=" * 25)
+    for i, row in enumerate(collections, 1):
+        print_collection(i, row, queue, segments, db_path)
+    print_health(orphans, orphan_dirs, pages)
+    return orphan_dirs
+
+
+def compact(db_path: Path) -> None:
+    """Deletes the orphaned rows and segment directories, then runs VACUUM."""
+    size_before = db_path.stat().st_size
+    conn = sqlite3.connect(str(db_path), timeout=0, isolation_level=None)
+    try:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            print("❌ The database is in use: stop the application before compacting it")
+            sys.exit(1)
+        for statement in COMPACT_SQL:
+            deleted = conn.execute(statement).rowcount
+            if deleted:
+                print(f"   └─ {statement.split(' WHERE')[0]}: {deleted} rows")
+        orphan_dirs = orphan_segment_dirs(db_path, conn)
+        conn.execute("COMMIT")
+        for path in orphan_dirs:
+            shutil.rmtree(path)
+            print(f"   └─ Removed orphaned segment directory {path.name}")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    size_after = db_path.stat().st_size
+    print(f"✅ Compacted: {_mb(size_before)} -> {_mb(size_after)} (SQLite)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", type=Path, default=None, help="Path of chroma.sqlite3")
+    parser.add_argument("--compact", action="store_true", help="Delete orphans and VACUUM (stop the app first)")
+    parser.add_argument(
+        "--immutable", action="store_true", help="Read without any lock (a copy of the database or a stopped app)"
     )
-    count = cursor.fetchone()[0]
-    print(f"   └─ Stored chunks: {count}")
+    args = parser.parse_args()
+
+    db_path = (args.path or default_db_path()).expanduser()
+    if not db_path.exists():
+        print(f"❌ ChromaDB database not found in: {db_path}")
+        print("\n💡 Tip: Execute this script from the directory: 3_rag_agent_with_crewai/")
+        sys.exit(1)
+
+    inspect(db_path, immutable=args.immutable)
+    if args.compact:
+        print("\n🧹 COMPACTING:")
+        print("=" * 25)
+        compact(db_path)
+    print("\n")
+    print("✅ ChromaDB database is working correctly!")
 
-print("\n")
-print("✅ ChromaDB database is working correctly!")
 
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,658 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script local_index.py
+=====================
+This script contains an in-process vector index stored in memory-mapped
+files, used as an alternative to ChromaDB (provider "local" in
+`config_crewai.py`).
+
+- vectors are unit-normalized float32 rows of a preallocated file, mapped
+  with `np.memmap`: opening the index only maps the files (no parsing, no
+  copy), whatever its size
+- small collections are searched exactly (one matrix-vector product)
+- above `exact_threshold` vectors, an IVF-flat index (spherical k-means
+  centroids + inverted lists) restricts the search to the `nprobe` closest
+  lists; rows appended after the last training are always scanned exactly
+- chunks are appended in place; deletes are tombstones, and the files are
+  compacted (and the IVF retrained) when too many rows are dead
+- the metadata fields of `FILTER_FIELDS` are also stored as integer columns,
+  so a search scoped to one document or tenant (`where`) only scores the
+  matching rows instead of filtering a large top-k afterwards
+- with `quantization` ("int8" or "binary", see `quantization.py`) the
+  search scans compact codes and rescores the `k * rescore` best candidates
+  with the float vectors, so a query pages in 4x (int8) or 32x (binary)
+  less data than a float scan
+
+Layout of the index directory:
+
+    index.json       header (dimensions, count, capacity, ...), written last
+    vectors.f32      capacity x dimensions float32
+    deleted.u8       capacity tombstones
+    spans.i64        capacity x (offset, length) of the records
+    filters.i32      capacity x len(FILTER_FIELDS) codes of the filter values (0: missing)
+    codes.i8 / codes.u1   capacity x code bytes (int8 / binary quantization)
+    records.bin      JSON records {"id", "document", "metadata"}
+    centroids.npy, lists.npy, list_offsets.npy   (IVF, when trained)
+"""
+import json
+import os
+import threading
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from logging_config import get_logger
+from quantization import QUANTIZATION_NONE, approximate_scores, code_bytes, int8_scale, quantize
+
+logger = get_logger(__name__)
+
+INDEX_VERSION = 2
+HEADER_FILENAME = "index.json"
+
+# Metadata fields that can be used in `where` (written by the ingestion):
+FILTER_FIELDS = ("document_id", "tenant", "section", "language")
+
+# File and dtype of the codes of every quantization mode:
+_CODE_FILES = {"int8": ("codes.i8", np.int8), "binary": ("codes.u1", np.uint8)}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _write_json_atomic(path: Path, data: dict[str, Any]) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Returns the positions of the `k` highest finite scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top[np.isfinite(scores[top])]
+
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Trains `nlist` unit centroids on unit vectors (cosine k-means).
+
+    Args:
+        vectors: Training sample (n x dimensions, unit rows)
+        nlist: Number of centroids
+        iterations: Number of Lloyd iterations
+        seed: Seed of the initialization
+
+    Returns:
+        The centroids (nlist x dimensions, float32)
+    """
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        # Sum of the members of every cluster (sorted by cluster, one reduceat):
+        order = np.argsort(assignments, kind="stable")
+        clusters, starts = np.unique(assignments[order], return_index=True)
+        sums = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()  # Empty clusters restart
+        sums[clusters] = np.add.reduceat(vectors[order], starts, axis=0)
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids
+
+
+class LocalVectorIndex:
+    """
+    Memory-mapped vector index with exact search and an IVF-flat mode.
+
+    Args:
+        path: Directory of the index (created if needed)
+        dimensions: Dimensions of the vectors (read from the header when the index exists)
+        exact_threshold: Below this number of vectors the search is always exact
+        nprobe: Number of inverted lists searched per query (IVF mode)
+        max_dead_ratio: Fraction of deleted rows above which the files are compacted
+        quantization: "none", "int8" or "binary" (default: the mode the index was written with)
+        rescore: Number of candidates per result rescored with the float vectors (quantized modes)
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        dimensions: int | None = None,
+        exact_threshold: int = 20_000,
+        nprobe: int = 16,
+        max_dead_ratio: float = 0.25,
+        quantization: str | None = None,
+        rescore: int = 8,
+    ) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.exact_threshold = exact_threshold
+        self.nprobe = nprobe
+        self.max_dead_ratio = max_dead_ratio
+        self.rescore = rescore
+        self._lock = threading.RLock()
+        self._row_of: dict[str, int] | None = None
+        self._codes: dict[str, dict[str, int]] = {}
+        self._finish_compaction()
+
+        header_path = self.path / HEADER_FILENAME
+        if header_path.exists():
+            self.header = json.loads(header_path.read_text(encoding="utf-8"))
+            if self.header.get("version") == 1:
+                self._upgrade_v1()
+            elif self.header.get("version") != INDEX_VERSION:
+                raise ValueError(f"Unsupported local index version in {self.path}")
+        else:
+            self.header = {
+                "version": INDEX_VERSION,
+                "dimensions": dimensions,
+                "count": 0,
+                "capacity": 0,
+                "deleted": 0,
+                "sorted_count": 0,
+                "records_size": 0,
+                "vocab": {},
+                "quantization": quantization or QUANTIZATION_NONE,
+                "int8_scale": None,
+            }
+        self._map_files()
+        if quantization is not None and quantization != self.quantization:
+            self._requantize(quantization)
+
+    # =====
+    # FILES
+    # =====
+    @property
+    def dimensions(self) -> int | None:
+        return self.header["dimensions"]
+
+    @property
+    def count(self) -> int:
+        """Number of rows written (live and deleted)."""
+        return self.header["count"]
+
+    @property
+    def quantization(self) -> str:
+        return self.header.get("quantization", QUANTIZATION_NONE)
+
+    def __len__(self) -> int:
+        return self.header["count"] - self.header["deleted"]
+
+    def _map_files(self) -> None:
+        """Maps the data files (zero-copy) for the current capacity."""
+        capacity = self.header["capacity"]
+        self.vectors = self.deleted = self.spans = self.filters = self.codes = None
+        if capacity:
+            self.vectors = np.memmap(self.path / "vectors.f32", np.float32, "r+", shape=(capacity, self.dimensions))
+            self.deleted = np.memmap(self.path / "deleted.u8", np.uint8, "r+", shape=(capacity,))
+            self.spans = np.memmap(self.path / "spans.i64", np.int64, "r+", shape=(capacity, 2))
+            self.filters = np.memmap(
+                self.path / "filters.i32", np.int32, "r+", shape=(capacity, len(FILTER_FIELDS))
+            )
+            if self.quantization != QUANTIZATION_NONE:
+                name, dtype = _CODE_FILES[self.quantization]
+                shape = (capacity, code_bytes(self.quantization, self.dimensions))
+                self.codes = np.memmap(self.path / name, dtype, "r+", shape=shape)
+        self.centroids = self.lists = self.list_offsets = None
+        if self.header["sorted_count"] and (self.path / "centroids.npy").exists():
+            self.centroids = np.load(self.path / "centroids.npy", mmap_mode="r")
+            self.lists = np.load(self.path / "lists.npy", mmap_mode="r")
+            self.list_offsets = np.load(self.path / "list_offsets.npy", mmap_mode="r")
+
+    def _grow(self, needed: int) -> None:
+        """Extends the data files to hold at least `needed` rows."""
+        capacity = self.header["capacity"]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        files = [
+            ("vectors.f32", 4 * self.dimensions),
+            ("deleted.u8", 1),
+            ("spans.i64", 16),
+            ("filters.i32", 4 * len(FILTER_FIELDS)),
+        ]
+        if self.quantization != QUANTIZATION_NONE:
+            files.append((_CODE_FILES[self.quantization][0], code_bytes(self.quantization, self.dimensions)))
+        for name, row_bytes in files:
+            with open(self.path / name, "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+        self.header["capacity"] = new_capacity
+        self._map_files()
+
+    def _save_header(self) -> None:
+        for array in (self.vectors, self.deleted, self.spans, self.filters, self.codes):
+            if array is not None:
+                array.flush()
+        _write_json_atomic(self.path / HEADER_FILENAME, self.header)
+
+    def _read_record(self, row: int) -> dict[str, Any]:
+        offset, length = (int(v) for v in self.spans[row])
+        with open(self.path / "records.bin", "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def _finish_compaction(self) -> None:
+        """Swaps in the files of a compaction (or removes those of one interrupted before its header)."""
+        header_path = self.path / f"{HEADER_FILENAME}.compact"
+        leftovers = [path for path in self.path.glob("*.compact") if path != header_path]
+        if not header_path.exists():
+            for path in leftovers:
+                path.unlink()
+            return
+        for path in leftovers:
+            os.replace(path, path.with_suffix(""))
+        os.replace(header_path, self.path / HEADER_FILENAME)
+        self.header = json.loads((self.path / HEADER_FILENAME).read_text(encoding="utf-8"))
+
+    def _append_records(self, records: list[dict[str, Any]]) -> list[tuple[int, int]]:
+        """Appends JSON records and returns their (offset, length) spans."""
+        offset = self.header["records_size"]
+        spans = []
+        with open(self.path / "records.bin", "ab") as f:
+            # Drop bytes written after the last header (interrupted write):
+            f.truncate(offset)
+            for record in records:
+                data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                f.write(data)
+                spans.append((offset, len(data)))
+                offset += len(data)
+        self.header["records_size"] = offset
+        return spans
+
+    def _rows(self) -> dict[str, int]:
+        """Returns the id -> row map of the live rows (built on the first write)."""
+        if self._row_of is None:
+            self._row_of = {}
+            for row in range(self.count):
+                if not self.deleted[row]:
+                    self._row_of[self._read_record(row)["id"]] = row
+        return self._row_of
+
+    def _upgrade_v1(self) -> None:
+        """Adds the filter columns to an index written before they existed."""
+        logger.info(f"Upgrading local index {self.path.name}: encoding the filter columns")
+        with open(self.path / "filters.i32", "ab") as f:
+            f.truncate(self.header["capacity"] * 4 * len(FILTER_FIELDS))
+        self.header.update(version=INDEX_VERSION, vocab={})
+        self._map_files()
+        for start in range(0, self.count, 10_000):
+            rows = range(start, min(start + 10_000, self.count))
+            self.filters[start : rows.stop] = self._filter_codes([self._read_record(row)["metadata"] for row in rows])
+        self._save_header()
+
+    # =======
+    # FILTERS
+    # =======
+    def _code(self, field: str, value: Any, add: bool = False) -> int:
+        """Returns the code of a filter value (0 when unknown, unless `add` registers it)."""
+        codes = self._codes.get(field)
+        if codes is None:
+            values = self.header["vocab"].get(field, [])
+            codes = self._codes[field] = {v: code for code, v in enumerate(values, start=1)}
+        value = str(value)
+        code = codes.get(value, 0)
+        if not code and add:
+            self.header["vocab"].setdefault(field, []).append(value)
+            code = codes[value] = len(codes) + 1
+        return code
+
+    def _filter_codes(self, metadatas: Sequence[dict[str, Any] | None]) -> np.ndarray:
+        """Encodes the filter fields of metadata dicts (caller holds the lock)."""
+        codes = np.zeros((len(metadatas), len(FILTER_FIELDS)), dtype=np.int32)
+        for i, metadata in enumerate(metadatas):
+            for j, field in enumerate(FILTER_FIELDS):
+                value = (metadata or {}).get(field)
+                if value is not None:
+                    codes[i, j] = self._code(field, value, add=True)
+        return codes
+
+    def _filter_mask(self, where: dict[str, Any], n: int, filters: np.ndarray) -> np.ndarray:
+        """Returns the mask of the first `n` rows whose metadata equals every value of `where`."""
+        mask = np.ones(n, dtype=bool)
+        for field, value in where.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Cannot filter on {field!r}: filterable fields are {', '.join(FILTER_FIELDS)}")
+            code = self._code(field, value)
+            if not code:
+                return np.zeros(n, dtype=bool)
+            mask &= filters[:n, FILTER_FIELDS.index(field)] == code
+        return mask
+
+    # ============
+    # QUANTIZATION
+    # ============
+    def _write_vectors(self, start: int, matrix: np.ndarray) -> None:
+        """Writes unit vectors (and their codes) from row `start` (caller holds the lock)."""
+        self.vectors[start : start + len(matrix)] = matrix
+        if self.codes is None:
+            return
+        if self.quantization == "int8" and self.header["int8_scale"] is None:
+            # Calibrated once, on the first vectors written (the codes of later rows must stay comparable):
+            self.header["int8_scale"] = int8_scale(matrix)
+        self.codes[start : start + len(matrix)] = quantize(self.quantization, matrix, self.header["int8_scale"])
+
+    def _requantize(self, mode: str) -> None:
+        """Switches the quantization mode, encoding the existing rows from their float vectors."""
+        with self._lock:
+            logger.info(f"Local index {self.path.name}: quantization {self.quantization} -> {mode}")
+            for name, _ in _CODE_FILES.values():
+                (self.path / name).unlink(missing_ok=True)
+            code_bytes(mode, self.dimensions or 0)  # Validates the mode
+            self.header.update(quantization=mode, int8_scale=None)
+            if self.header["capacity"] and mode != QUANTIZATION_NONE:
+                with open(self.path / _CODE_FILES[mode][0], "ab") as f:
+                    f.truncate(self.header["capacity"] * code_bytes(mode, self.dimensions))
+            self._map_files()
+            if self.codes is not None and self.count:
+                sample = np.array(self.vectors[: min(self.count, 10_000)])
+                if mode == "int8":
+                    self.header["int8_scale"] = int8_scale(sample)
+                for start in range(0, self.count, 65_536):
+                    block = np.asarray(self.vectors[start : min(start + 65_536, self.count)])
+                    self.codes[start : start + len(block)] = quantize(mode, block, self.header["int8_scale"])
+            self._save_header()
+
+    def _reset_dimensions(self, dimensions: int) -> None:
+        """Recreates the (empty) data files for vectors of another size, e.g. new Matryoshka dimensions."""
+        logger.info(f"Local index {self.path.name}: {self.dimensions} -> {dimensions} dimensions")
+        self.clear()
+        for name in ("vectors.f32", "deleted.u8", "spans.i64", "filters.i32", *(n for n, _ in _CODE_FILES.values())):
+            (self.path / name).unlink(missing_ok=True)
+        self.header.update(dimensions=dimensions, capacity=0)
+        self._save_header()
+        self._map_files()
+
+    # ======
+    # WRITES
+    # ======
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[dict[str, Any] | None] | None = None,
+    ) -> None:
+        """
+        Inserts or replaces rows (a replaced row is tombstoned and appended again).
+
+        Args:
+            ids: Identifiers of the chunks
+            vectors: Embeddings of the chunks
+            documents: Texts of the chunks
+            metadatas: Metadata of the chunks
+        """
+        if not ids:
+            return
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            if self.dimensions is None:
+                self.header["dimensions"] = int(matrix.shape[1])
+            elif matrix.shape[1] != self.dimensions:
+                if len(self):
+                    raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {matrix.shape[1]}")
+                self._reset_dimensions(int(matrix.shape[1]))
+            rows = self._rows()
+            self._tombstone([rows[i] for i in ids if i in rows])
+
+            start = self.count
+            self._grow(start + len(ids))
+            metadatas = metadatas or [None] * len(ids)
+            spans = self._append_records(
+                [
+                    {"id": i, "document": d, "metadata": m or {}}
+                    for i, d, m in zip(ids, documents, metadatas, strict=True)
+                ]
+            )
+            self._write_vectors(start, matrix)
+            self.deleted[start : start + len(ids)] = 0
+            self.spans[start : start + len(ids)] = spans
+            self.filters[start : start + len(ids)] = self._filter_codes(metadatas)
+            for offset, chunk_id in enumerate(ids):
+                rows[chunk_id] = start + offset
+            self.header["count"] = start + len(ids)
+            self._save_header()
+            self._maybe_maintain()
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[dict[str, Any]]) -> None:
+        """Replaces the metadata of existing rows (the vectors are untouched)."""
+        with self._lock:
+            rows = self._rows()
+            targets = [(rows[i], m) for i, m in zip(ids, metadatas, strict=True) if i in rows]
+            if not targets:
+                return
+            records = []
+            for row, metadata in targets:
+                record = self._read_record(row)
+                record["metadata"] = metadata
+                records.append(record)
+            for (row, _), span in zip(targets, self._append_records(records), strict=True):
+                self.spans[row] = span
+            self.filters[[row for row, _ in targets]] = self._filter_codes([m for _, m in targets])
+            self._save_header()
+
+    def _tombstone(self, rows: list[int]) -> None:
+        if rows:
+            self.deleted[rows] = 1
+            self.header["deleted"] += len(rows)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Removes rows by id."""
+        with self._lock:
+            rows = self._rows()
+            dead = [rows.pop(i) for i in ids if i in rows]
+            if dead:
+                self._tombstone(dead)
+                self._save_header()
+                self._maybe_maintain()
+
+    def existing_ids(self, ids: Sequence[str]) -> set[str]:
+        """Returns which of the given ids are stored."""
+        with self._lock:
+            rows = self._rows()
+            return {i for i in ids if i in rows}
+
+    def all_ids(self) -> list[str]:
+        """Returns the ids of every live row."""
+        with self._lock:
+            return list(self._rows())
+
+    def clear(self) -> None:
+        """Removes every row (and the IVF)."""
+        with self._lock:
+            for name in ("centroids.npy", "lists.npy", "list_offsets.npy", "records.bin"):
+                (self.path / name).unlink(missing_ok=True)
+            self.header.update(count=0, deleted=0, sorted_count=0, records_size=0, vocab={}, int8_scale=None)
+            self._codes = {}
+            if self.deleted is not None:
+                self.deleted[:] = 0
+            self._row_of = {}
+            self._save_header()
+            self._map_files()
+
+    # ===========
+    # MAINTENANCE
+    # ===========
+    def _maybe_maintain(self) -> None:
+        """Compacts and (re)trains the IVF when needed (caller holds the lock)."""
+        if self.header["deleted"] > self.max_dead_ratio * max(self.count, 1):
+            self.compact()
+        live = len(self)
+        tail = self.count - self.header["sorted_count"]
+        if live >= self.exact_threshold and (self.centroids is None or tail > 0.1 * live):
+            self.train()
+
+    def compact(self) -> None:
+        """
+        Rewrites the files without the deleted rows and the stale record versions.
+
+        The compacted files are written next to the current ones (`*.compact`,
+        the header last) and swapped in with `os.replace`, so the rows are
+        never cleared before their new copy is on disk.
+        """
+        with self._lock:
+            old_count = self.count
+            live_rows = np.flatnonzero(self.deleted[:old_count] == 0)
+            n = len(live_rows)
+            logger.info(f"Compacting local index {self.path.name}: {old_count} -> {n} rows")
+            capacity = max(n, 1024)
+            columns = [("vectors.f32", self.vectors), ("filters.i32", self.filters)]
+            if self.codes is not None:
+                columns.append((_CODE_FILES[self.quantization][0], self.codes))
+
+            spans = np.zeros((capacity, 2), dtype=np.int64)
+            offset = 0
+            with open(self.path / "records.bin", "rb") as source, open(self.path / "records.bin.compact", "wb") as f:
+                for new_row, row in enumerate(live_rows):
+                    start, length = (int(v) for v in self.spans[row])
+                    source.seek(start)
+                    f.write(source.read(length))
+                    spans[new_row] = (offset, length)
+                    offset += length
+            for name, array in (("deleted.u8", np.zeros(capacity, dtype=np.uint8)), ("spans.i64", spans)):
+                array.tofile(self.path / f"{name}.compact")
+            for name, column in columns:
+                shape = (capacity, *column.shape[1:])
+                target = np.memmap(self.path / f"{name}.compact", column.dtype, "w+", shape=shape)
+                for start in range(0, n, 65_536):
+                    target[start : min(start + 65_536, n)] = column[live_rows[start : start + 65_536]]
+                target.flush()
+                del target
+
+            self.header.update(count=n, capacity=capacity, deleted=0, sorted_count=0, records_size=offset)
+            _write_json_atomic(self.path / f"{HEADER_FILENAME}.compact", self.header)
+            self._finish_compaction()
+            # Row numbers changed: the IVF is retrained by `_maybe_maintain` when still needed
+            for name in ("centroids.npy", "lists.npy", "list_offsets.npy"):
+                (self.path / name).unlink(missing_ok=True)
+            if self._row_of is not None:
+                new_row_of = np.empty(old_count, dtype=np.int64)
+                new_row_of[live_rows] = np.arange(n)
+                self._row_of = {chunk_id: int(new_row_of[row]) for chunk_id, row in self._row_of.items()}
+            self._map_files()
+
+    def train(self, nlist: int | None = None, sample_size: int = 100_000, seed: int = 0) -> None:
+        """
+        Trains the IVF centroids and sorts every row into its inverted list.
+
+        Args:
+            nlist: Number of lists (default: about sqrt of the number of rows)
+            sample_size: Number of rows used to train the centroids
+            seed: Seed of the sampling and of the initialization
+        """
+        with self._lock:
+            n = self.count
+            nlist = nlist or int(np.clip(np.sqrt(n), 16, 4096))
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(n, size=min(n, sample_size), replace=False))
+            centroids = spherical_kmeans(np.array(self.vectors[sample_rows]), nlist, seed=seed)
+            nlist = len(centroids)
+
+            assignments = np.empty(n, dtype=np.int32)
+            for start in range(0, n, 65_536):
+                block = self.vectors[start : min(start + 65_536, n)]
+                assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            lists = np.argsort(assignments, kind="stable").astype(np.int64)
+            list_offsets = np.searchsorted(assignments[lists], np.arange(nlist + 1)).astype(np.int64)
+
+            for name, array in (("centroids", centroids), ("lists", lists), ("list_offsets", list_offsets)):
+                tmp_path = self.path / f"{name}.tmp.npy"
+                np.save(tmp_path, array)
+                os.replace(tmp_path, self.path / f"{name}.npy")
+            self.header["sorted_count"] = n
+            self._save_header()
+            self._map_files()
+            logger.info(f"Local index {self.path.name}: IVF trained with {nlist} lists over {n} rows")
+
+    # ======
+    # SEARCH
+    # ======
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray | None:
+        """Returns the rows to score in IVF mode, or None for an exact scan."""
+        if self.centroids is None or len(self) < self.exact_threshold:
+            return None
+        if nprobe >= len(self.centroids):
+            closest = np.arange(len(self.centroids))
+        else:
+            closest = np.argpartition(-(self.centroids @ query), nprobe)[:nprobe]
+        parts = [self.lists[self.list_offsets[c] : self.list_offsets[c + 1]] for c in closest]
+        # Rows appended after the last training are not in any list yet:
+        parts.append(np.arange(self.header["sorted_count"], self.count))
+        return np.concatenate(parts)
+
+    def search_rows(
+        self,
+        vector: Sequence[float] | np.ndarray,
+        k: int,
+        nprobe: int | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Returns the `k` rows most similar to a vector.
+
+        Args:
+            vector: Query embedding
+            k: Number of rows
+            nprobe: Number of inverted lists searched (default: `self.nprobe`)
+            where: Metadata values the rows must have (fields of `FILTER_FIELDS`)
+
+        Returns:
+            (row, cosine similarity) pairs, best first
+        """
+        # Local references: a concurrent write may remap the files (the old maps stay valid):
+        n, vectors, deleted, filters, codes = self.count, self.vectors, self.deleted, self.filters, self.codes
+        if not n or k <= 0:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        if where:
+            # Only the rows of the scope are scored; a small scope is scanned exactly:
+            allowed = self._filter_mask(where, n, filters) & (deleted[:n] == 0)
+            rows = np.flatnonzero(allowed)
+            if len(rows) > self.exact_threshold:
+                candidates = self._candidates(query, nprobe or self.nprobe)
+                if candidates is not None and np.count_nonzero(allowed[candidates]) >= k:
+                    rows = candidates[allowed[candidates]]
+            if not len(rows):
+                return []
+        else:
+            rows = self._candidates(query, nprobe or self.nprobe)
+        # Quantized: the codes are scanned and only the shortlist is rescored with the float vectors:
+        scanned = vectors if codes is None else codes
+        if rows is None:
+            scanned, dead = scanned[:n], deleted[:n].astype(bool)
+        else:
+            scanned, dead = scanned[rows], deleted[rows].astype(bool)
+        if codes is None:
+            scores = np.asarray(scanned @ query)
+        else:
+            scores = approximate_scores(self.quantization, scanned, query, self.header["int8_scale"])
+        scores[dead] = -np.inf
+        top = _top_k(scores, k if codes is None else k * max(self.rescore, 1))
+        row_ids = top if rows is None else rows[top]
+        if codes is not None:
+            scores = np.asarray(vectors[row_ids] @ query)
+            top = _top_k(scores, k)
+            row_ids = row_ids[top]
+        return [(int(row), float(score)) for row, score in zip(row_ids, scores[top], strict=True)]
+
+    def search(
+        self,
+        vector: Sequence[float] | np.ndarray,
+        k: int,
+        nprobe: int | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> list[tuple[dict[str, Any], float]]:
+        """Returns the `k` most similar records ({"id", "document", "metadata"}) with their similarity."""
+        return [(self._read_record(row), score) for row, score in self.search_rows(vector, k, nprobe, where)]
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """Yields every live record."""
+        for row in range(self.count):
+            if not self.deleted[row]:
+                yield self._read_record(row)
@@ -0,0 +1,174 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script pre_router.py
+====================
+This script contains the pre-router placed in front of `ask_question`.
+
+The agent used to decide by itself (one full reasoning round-trip) that
+"hello" is a greeting or that a question has nothing to do with the
+curriculum. The pre-router takes these decisions without any LLM call:
+
+1. keyword rules answer greetings and farewells (English and Portuguese)
+2. a retrieval check against the collection answers "not found" when no
+   chunk is above `similarity_threshold` and the BM25 index (if given) has
+   no exact match for the question terms
+3. only the remaining questions go to the Crew
+
+A question that mixes a greeting with a real question ("Hi, what are his
+skills?") is never answered by the rules.
+"""
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from answer_cache import normalize_question
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ROUTE_GREETING = "greeting"
+ROUTE_FAREWELL = "farewell"
+ROUTE_OUT_OF_SCOPE = "out_of_scope"
+ROUTE_AGENT = "agent"
+ROUTES = (ROUTE_GREETING, ROUTE_FAREWELL, ROUTE_OUT_OF_SCOPE, ROUTE_AGENT)
+
+GREETING_PHRASES = (
+    "hi", "hello", "hey", "hiya", "howdy", "good morning", "good afternoon", "good evening", "good day",
+    "how are you", "how is it going", "what s up", "oi", "olá", "ola", "e aí", "e ai", "bom dia", "boa tarde",
+    "boa noite", "tudo bem", "tudo bom", "como vai", "hola", "buenos días", "buenos dias",
+)  # fmt: skip
+FAREWELL_PHRASES = (
+    "bye", "goodbye", "bye bye", "see you", "see you later", "farewell", "thanks", "thank you", "thx", "tchau",
+    "até logo", "ate logo", "até mais", "ate mais", "adeus", "obrigado", "obrigada", "valeu", "adiós", "adios",
+)  # fmt: skip
+# Words that may surround a greeting without turning it into a question:
+FILLER_WORDS = (
+    "there", "everyone", "all", "again", "so", "much", "very", "a", "lot", "my", "friend", "assistant",
+    "bot", "and", "you", "too", "doing", "today", "ok", "okay", "pra", "para", "você", "voce", "muito", "tudo",
+)  # fmt: skip
+
+GREETING_ANSWER = (
+    "Hello! 😊 I can tell you about the professional curriculum: experience, skills, education and projects. "
+    "What would you like to know?"
+)
+FAREWELL_ANSWER = "You're welcome! It was a pleasure to help. Goodbye! 👋"
+OUT_OF_SCOPE_ANSWER = "I did not find information about that subject."
+
+
+def _phrase_pattern(phrases: tuple[str, ...]) -> re.Pattern:
+    # Longest phrases first, so "bye bye" is removed before "bye":
+    alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b")
+
+
+_GREETING_PATTERN = _phrase_pattern(GREETING_PHRASES)
+_FAREWELL_PATTERN = _phrase_pattern(FAREWELL_PHRASES)
+_FILLER_PATTERN = _phrase_pattern(FILLER_WORDS)
+
+
+def classify_small_talk(question: str) -> str | None:
+    """
+    Returns ROUTE_GREETING or ROUTE_FAREWELL when the question is only small talk.
+
+    Args:
+        question: Question of the user
+
+    Returns:
+        The route, or None when the question asks for something else
+    """
+    text = normalize_question(question)
+    if not text:
+        return None
+    has_farewell = _FAREWELL_PATTERN.search(text) is not None
+    has_greeting = _GREETING_PATTERN.search(text) is not None
+    if not has_farewell and not has_greeting:
+        return None
+    rest = _FILLER_PATTERN.sub(" ", _GREETING_PATTERN.sub(" ", _FAREWELL_PATTERN.sub(" ", text)))
+    if rest.strip():
+        return None
+    return ROUTE_FAREWELL if has_farewell else ROUTE_GREETING
+
+
+@dataclass
+class RouteDecision:
+    """Decision of the pre-router for one question."""
+
+    route: str
+    answer: str | None = None
+    top_similarity: float | None = None
+
+
+class PreRouter:
+    """
+    Answers small talk and out-of-scope questions without running the agent.
+
+    Args:
+        search: Returns the similarities of the closest chunks to a question (best first),
+            called with (question, limit, where)
+        similarity_threshold: Minimum similarity of a chunk to run the agent (the one of the RagTool)
+        limit: Number of chunks retrieved by the check
+        lexical_search: Returns the lexical matches of a question (e.g. BM25), called with
+            (question, limit, where); any match runs the agent
+    """
+
+    def __init__(
+        self,
+        search: Callable[[str, int, dict[str, Any] | None], list[float]],
+        similarity_threshold: float = 0.70,
+        limit: int = 1,
+        lexical_search: Callable[[str, int, dict[str, Any] | None], list] | None = None,
+    ) -> None:
+        self.search = search
+        self.similarity_threshold = similarity_threshold
+        self.limit = limit
+        self.lexical_search = lexical_search
+        self._counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def route(self, question: str, where: dict[str, Any] | None = None) -> RouteDecision:
+        """
+        Decides how a question is answered.
+
+        Args:
+            question: Question of the user
+            where: Metadata scope of the question (only its chunks are checked)
+
+        Returns:
+            The decision; `answer` is set for every route except ROUTE_AGENT
+        """
+        small_talk = classify_small_talk(question)
+        if small_talk == ROUTE_GREETING:
+            decision = RouteDecision(ROUTE_GREETING, GREETING_ANSWER)
+        elif small_talk == ROUTE_FAREWELL:
+            decision = RouteDecision(ROUTE_FAREWELL, FAREWELL_ANSWER)
+        else:
+            similarities = self.search(question, self.limit, where)
+            top = max(similarities, default=0.0)
+            if top >= self.similarity_threshold or (
+                self.lexical_search is not None and self.lexical_search(question, 1, where)
+            ):
+                decision = RouteDecision(ROUTE_AGENT, None, top)
+            else:
+                decision = RouteDecision(ROUTE_OUT_OF_SCOPE, OUT_OF_SCOPE_ANSWER, top)
+
+        with self._lock:
+            self._counts[decision.route] += 1
+        if decision.route != ROUTE_AGENT:
+            logger.info(f"Pre-router answered without the agent ({decision.route}): {question!r}")
+        return decision
+
+    def stats(self) -> dict[str, int]:
+        """Returns the number of questions per route."""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            "questions": total,
+            "agent_runs_avoided": total - counts.get(ROUTE_AGENT, 0),
+            **{route: counts.get(route, 0) for route in ROUTES},
+        }
@@ -0,0 +1,101 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script quantization.py
+======================
+This script contains the vector quantization of the local index
+(`local_index.py`, option `quantization` of the "local" provider in
+`config_crewai.py`).
+
+`text-embedding-3-large` returns 3072 float32 dimensions (12 KB per chunk).
+A quantized index keeps a compact copy of every vector, scans it to find
+`k * rescore` candidates, and rescores only those candidates with the float
+vectors (which stay on disk and are paged in row by row):
+
+- "int8": scalar quantization, one byte per dimension (4x smaller), with a
+  symmetric scale calibrated on the first vectors written
+- "binary": one bit per dimension (32x smaller), the sign of each component,
+  compared with the Hamming distance
+
+Matryoshka dimension truncation (the first dimensions of a
+`text-embedding-3-*` vector, renormalized) is applied upstream by the
+embedding function (`EMBEDDING_DIMENSIONS` in `config_crewai.py`), so it
+combines with both modes.
+"""
+import numpy as np
+
+QUANTIZATION_NONE = "none"
+QUANTIZATION_INT8 = "int8"
+QUANTIZATION_BINARY = "binary"
+QUANTIZATION_MODES = (QUANTIZATION_NONE, QUANTIZATION_INT8, QUANTIZATION_BINARY)
+
+# Number of set bits of every byte value (fallback of np.bitwise_count, NumPy < 2.0):
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def code_bytes(mode: str, dimensions: int) -> int:
+    """Returns the number of bytes of the code of one vector (0 without quantization)."""
+    if mode == QUANTIZATION_INT8:
+        return dimensions
+    if mode == QUANTIZATION_BINARY:
+        return (dimensions + 7) // 8
+    if mode == QUANTIZATION_NONE:
+        return 0
+    raise ValueError(f"Unknown quantization {mode!r} (expected one of {', '.join(QUANTIZATION_MODES)})")
+
+
+def int8_scale(vectors: np.ndarray, quantile: float = 0.999) -> float:
+    """
+    Returns the scale of the int8 codes: the `quantile` of the absolute components maps to 127.
+
+    Components above it are clipped (a handful per vector), which keeps the
+    resolution of the bulk of the distribution.
+    """
+    return float(max(np.quantile(np.abs(vectors), quantile), 1e-6) / 127.0)
+
+
+def quantize_int8(vectors: np.ndarray, scale: float) -> np.ndarray:
+    """Returns the int8 codes of unit vectors (n x dimensions)."""
+    return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Returns the packed sign bits of vectors (n x ceil(dimensions / 8) bytes)."""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+def quantize(mode: str, vectors: np.ndarray, scale: float | None = None) -> np.ndarray:
+    """Returns the codes of vectors for a quantization mode."""
+    if mode == QUANTIZATION_INT8:
+        return quantize_int8(vectors, scale)
+    if mode == QUANTIZATION_BINARY:
+        return quantize_binary(vectors)
+    raise ValueError(f"Cannot quantize with mode {mode!r}")
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Returns the Hamming distance between packed binary codes and one packed query code."""
+    xor = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+
+
+def approximate_scores(mode: str, codes: np.ndarray, query: np.ndarray, scale: float | None = None) -> np.ndarray:
+    """
+    Scores codes against a unit query (higher is more similar).
+
+    Args:
+        mode: "int8" or "binary"
+        codes: Codes of the rows to score
+        query: Float query vector (unit)
+        scale: Scale of the int8 codes
+
+    Returns:
+        Approximate cosine similarities (int8) or negated Hamming distances (binary)
+    """
+    if mode == QUANTIZATION_BINARY:
+        return -hamming_distances(codes, quantize_binary(query)).astype(np.float32)
+    # The query stays in float (asymmetric distance); einsum reads the int8 codes without a float32 copy:
+    return np.einsum("ij,j->i", codes, (query * scale).astype(np.float32))
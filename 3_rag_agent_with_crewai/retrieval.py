@@ -0,0 +1,293 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script retrieval.py
+===================
+This script contains the retrieval layer of the agent:
+
+- `HybridVectorStore` keeps a BM25 index (`bm25_index.py`) in sync with the
+  vector store during ingestion and, in hybrid mode, fuses the lexical and
+  dense rankings by reciprocal rank fusion (RRF)
+- `KnowledgeBaseTool` is the tool of the agent when the RagTool cannot be
+  used (local provider, hybrid retrieval or extractive compression); it
+  returns the chunks in the same format as the RagTool, optionally reranked
+  (`reranker.py`) and compressed (`context_compressor.py`)
+- `scoped_tool` returns a copy of the tool restricted to the chunks of one
+  document or tenant (`where` filter applied inside both indexes)
+"""
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from bm25_index import BM25Index
+from config_crewai import LEXICAL_INDEX_DIR
+from crewai.tools import BaseTool
+from crewai_tools import RagTool
+from logging_config import get_logger
+from pydantic import BaseModel, Field
+from tracing import span
+from vector_store import ChromaVectorStore, LocalVectorStore, SearchHit
+
+logger = get_logger(__name__)
+
+# Minimum BM25 score of a lexical match kept without dense support: about one query term found in
+# less than a third of the chunks (the IDF of a term in every chunk is close to 0):
+MIN_LEXICAL_SCORE = 1.0
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> list[tuple[str, float]]:
+    """
+    Fuses rankings of chunk ids: score(id) = sum over rankings of 1 / (k + rank).
+
+    Args:
+        rankings: Chunk ids of every ranking, best first
+        k: Smoothing constant (60 in the original RRF paper)
+
+    Returns:
+        (chunk id, fused score) pairs, best first
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridVectorStore:
+    """
+    Vector store with a BM25 index kept in sync (same interface as the wrapped store).
+
+    Args:
+        store: ChromaVectorStore or LocalVectorStore
+        lexical: BM25 index of the same chunks
+        fusion: Whether `search` fuses the BM25 and dense rankings (False: dense only)
+        candidates: Number of chunks taken from each ranking before the fusion
+        rrf_k: Smoothing constant of the reciprocal rank fusion
+        similarity_threshold: Minimum dense similarity of a fused hit without a strong lexical match
+        min_lexical_score: Minimum BM25 score of a lexical match (weaker matches are ignored)
+    """
+
+    def __init__(
+        self,
+        store: ChromaVectorStore | LocalVectorStore,
+        lexical: BM25Index,
+        fusion: bool = True,
+        candidates: int = 30,
+        rrf_k: int = 60,
+        similarity_threshold: float = 0.0,
+        min_lexical_score: float = MIN_LEXICAL_SCORE,
+    ) -> None:
+        self.store = store
+        self.lexical = lexical
+        self.fusion = fusion
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.similarity_threshold = similarity_threshold
+        self.min_lexical_score = min_lexical_score
+
+    def sync(self) -> "HybridVectorStore":
+        """Rebuilds the BM25 index from the vector store when they differ (e.g. new BM25 file)."""
+        if self.lexical.count() == self.store.count():
+            return self
+        logger.info("Rebuilding the BM25 index from the vector store...")
+        self.lexical.clear()
+        batch: list[tuple[str, str, dict[str, Any]]] = []
+        for chunk in self.store.iter_chunks():
+            batch.append(chunk)
+            if len(batch) == 1000:
+                self.lexical.upsert(*zip(*batch, strict=True))
+                batch = []
+        if batch:
+            self.lexical.upsert(*zip(*batch, strict=True))
+        return self
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[dict[str, Any]] | None = None,
+        embeddings: Sequence[Sequence[float]] | None = None,
+    ) -> None:
+        """Inserts or replaces chunks in both indexes."""
+        self.store.upsert(ids, documents, metadatas, embeddings)
+        self.lexical.upsert(ids, documents, metadatas)
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[dict[str, Any]]) -> None:
+        self.store.update_metadata(ids, metadatas)
+        self.lexical.update_metadata(ids, metadatas)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        self.store.delete(ids)
+        self.lexical.delete(ids)
+
+    def clear(self) -> None:
+        self.store.clear()
+        self.lexical.clear()
+
+    def existing_ids(self, ids: Sequence[str]) -> set[str]:
+        return self.store.existing_ids(ids)
+
+    def count(self) -> int:
+        return self.store.count()
+
+    def iter_chunks(self) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        return self.store.iter_chunks()
+
+    def similarities(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[float]:
+        """Returns the dense similarities of the `limit` closest chunks (best first)."""
+        return self.store.similarities(query, limit, where)
+
+    def lexical_search(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[tuple[str, float]]:
+        """Returns the (chunk id, BM25 score) of the `limit` best lexical matches above `min_lexical_score`."""
+        matches = self.lexical.search(query, limit, where)
+        return [(chunk_id, score) for chunk_id, score in matches if score >= self.min_lexical_score]
+
+    def search(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[SearchHit]:
+        """
+        Returns the `limit` best chunks for a query, among the chunks matching `where`.
+
+        In fusion mode, the dense and BM25 candidates are fused by RRF, then a
+        fused hit is kept when its dense similarity reaches `similarity_threshold`
+        or its BM25 score reaches `min_lexical_score`, so an exact match (name,
+        acronym) is returned even when its dense similarity is low.
+        """
+        if not self.fusion:
+            return self.store.search(query, limit, where)
+        # A reranker may over-fetch more chunks than `candidates`:
+        candidates = max(self.candidates, limit)
+        dense = self.store.search(query, candidates, where)
+        lexical = self.lexical_search(query, candidates, where)
+        rankings = [[hit.id for hit in dense], [chunk_id for chunk_id, _ in lexical]]
+        fused = reciprocal_rank_fusion(rankings, self.rrf_k)
+
+        dense_hits = {hit.id: hit for hit in dense}
+        lexical_scores = dict(lexical)
+        # Ranks only order the candidates: the thresholds apply to the calibrated scores of each hit
+        kept = [
+            chunk_id
+            for chunk_id, _ in fused
+            if chunk_id in lexical_scores or dense_hits[chunk_id].similarity >= self.similarity_threshold
+        ][:limit]
+        lexical_only = self.lexical.get([chunk_id for chunk_id in kept if chunk_id not in dense_hits])
+        hits = []
+        for chunk_id in kept:
+            hit = dense_hits.get(chunk_id)
+            if hit is None:
+                if chunk_id not in lexical_only:
+                    continue
+                document, metadata = lexical_only[chunk_id]
+                hit = SearchHit(chunk_id, document, metadata, similarity=0.0)
+            hit.lexical_score = lexical_scores.get(chunk_id)
+            hits.append(hit)
+        return hits
+
+
+def open_hybrid_store(
+    store: ChromaVectorStore | LocalVectorStore,
+    collection_name: str,
+    fusion: bool = True,
+    similarity_threshold: float = 0.0,
+) -> HybridVectorStore:
+    """Wraps a vector store with the BM25 index of its collection (rebuilt if out of sync)."""
+    lexical = BM25Index(LEXICAL_INDEX_DIR / f"{collection_name}.sqlite3")
+    return HybridVectorStore(store, lexical, fusion=fusion, similarity_threshold=similarity_threshold).sync()
+
+
+def relevant_hits(
+    hits: list[SearchHit], similarity_threshold: float, min_lexical_score: float = MIN_LEXICAL_SCORE
+) -> list[SearchHit]:
+    """Keeps the hits above the similarity threshold and the strong lexical matches."""
+    return [
+        hit
+        for hit in hits
+        if hit.similarity >= similarity_threshold
+        or (hit.lexical_score is not None and hit.lexical_score >= min_lexical_score)
+    ]
+
+
+class KnowledgeBaseToolSchema(BaseModel):
+    """Input of the KnowledgeBaseTool."""
+
+    query: str = Field(..., description="Question or keywords to search in the knowledge base")
+
+
+class KnowledgeBaseTool(BaseTool):
+    """
+    Similarity search over a vector store, formatted like the RagTool output.
+
+    Args:
+        store: Vector store with a `search(query, limit, where)` method
+        limit: Number of chunks retrieved
+        similarity_threshold: Minimum similarity of a returned chunk
+        where: Metadata values the chunks must have (None: the whole collection)
+        compressor: Compresses the chunks before the agent reads them (None: returned as retrieved)
+        reranker: Reranks `reranker.candidates` retrieved chunks down to `limit` (None: no reranking)
+    """
+
+    name: str = "Knowledge base"
+    description: str = "Knowledge base to be used to answer questions."
+    args_schema: type[BaseModel] = KnowledgeBaseToolSchema
+    store: Any = Field(exclude=True)
+    limit: int = 6
+    similarity_threshold: float = 0.70
+    where: dict[str, Any] | None = None
+    compressor: Any = Field(default=None, exclude=True)
+    reranker: Any = Field(default=None, exclude=True)
+
+    def _run(self, query: str) -> str:
+        with span("knowledge_base.search", scoped=self.where is not None):
+            return self._search(query)
+
+    def _search(self, query: str) -> str:
+        limit = self.limit if self.reranker is None else max(self.reranker.candidates, self.limit)
+        with span("retrieve", limit=limit) as retrieve_span:
+            hits = relevant_hits(self.store.search(query, limit, self.where), self.similarity_threshold)
+            retrieve_span.set(hits=len(hits))
+        if self.reranker is not None:
+            with span("rerank", candidates=len(hits)):
+                hits = self.reranker.rerank(query, hits, self.limit)
+        if not hits:
+            return "No relevant content found."
+        documents = [hit.document for hit in hits]
+        if self.compressor is not None:
+            with span("compress") as compress_span:
+                compressed = self.compressor.compress(query, documents)
+                compress_span.set(tokens_in=compressed.input_tokens, tokens_out=compressed.output_tokens)
+            return "Relevant Content:\n" + compressed.text
+        return "Relevant Content:\n" + "\n\n".join(documents)
+
+
+def knowledge_base_store(tool: RagTool | KnowledgeBaseTool, collection_name: str) -> HybridVectorStore:
+    """Returns the store of a knowledge base tool (with its BM25 index, so ingestion updates both)."""
+    if isinstance(tool, KnowledgeBaseTool):
+        return tool.store
+    return open_hybrid_store(ChromaVectorStore.from_rag_tool(tool, collection_name), collection_name, fusion=False)
+
+
+def scoped_tool(
+    tool: RagTool | KnowledgeBaseTool, store: HybridVectorStore, where: dict[str, Any]
+) -> KnowledgeBaseTool:
+    """
+    Returns a knowledge base tool restricted to the chunks matching `where`.
+
+    The RagTool cannot filter its query, so it is replaced by a KnowledgeBaseTool
+    over the same collection (same limit and threshold).
+
+    Args:
+        tool: Knowledge base tool of the agent
+        store: Store of the collection (see `knowledge_base_store`)
+        where: Metadata values of the scope (e.g. {"document_id": "cv_eddy"})
+
+    Returns:
+        A copy of the tool whose searches only see the chunks of the scope
+    """
+    if isinstance(tool, KnowledgeBaseTool):
+        return tool.model_copy(update={"where": dict(where)})
+    return KnowledgeBaseTool(
+        name=tool.name,
+        description=tool.description,
+        store=store,
+        limit=tool.limit,
+        similarity_threshold=tool.similarity_threshold,
+        where=dict(where),
+    )
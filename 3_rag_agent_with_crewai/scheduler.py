@@ -0,0 +1,199 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script scheduler.py
+===================
+This script contains the agent-execution scheduler of the chat server.
+
+- a fixed number of worker threads (sized to the LLM rate limits) runs the
+  agent, instead of the unbounded default executor
+- waiting jobs live in a bounded queue; when it is full, new questions are
+  rejected immediately with `SchedulerBusyError` (backpressure)
+- jobs are dispatched round-robin across clients, so one client sending
+  many questions cannot starve the others
+- queue depth, wait time and run time are exposed by `stats()`
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from benchmark_utils import summarize
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a job is rejected because the queue is full."""
+
+    def __init__(self, message: str, queue_depth: int) -> None:
+        super().__init__(message)
+        self.queue_depth = queue_depth
+
+
+@dataclass
+class Job:
+    """Job waiting for (or running on) a worker."""
+
+    client_id: str
+    fn: Callable[..., Any]
+    args: tuple
+    seq: int
+    submitted_at: float
+    future: Future = field(default_factory=Future)
+    started: threading.Event = field(default_factory=threading.Event)
+
+
+class AgentScheduler:
+    """
+    Bounded worker pool with admission control and per-client fairness.
+
+    Args:
+        workers: Number of worker threads (maximum concurrent agent runs)
+        max_queue: Maximum number of waiting jobs (above it jobs are rejected)
+        max_per_client: Maximum number of waiting or running jobs per client
+        metrics_window: Number of jobs kept for the wait/run time distributions
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 32,
+        max_per_client: int = 2,
+        metrics_window: int = 1000,
+    ) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client
+        self._queues: dict[str, deque[Job]] = {}
+        # Clients with waiting jobs, in round-robin order:
+        self._ready: deque[str] = deque()
+        self._per_client: dict[str, int] = {}
+        self._waiting = 0
+        self._running = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._wait_ms: deque[float] = deque(maxlen=metrics_window)
+        self._run_ms: deque[float] = deque(maxlen=metrics_window)
+        self._completed = 0
+        self._rejected = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"agent-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, client_id: str, fn: Callable[..., Any], *args: Any) -> Job:
+        """
+        Queues a job, or rejects it immediately when the scheduler is overloaded.
+
+        Args:
+            client_id: Identifier of the client (e.g. the chat session)
+            fn: Function to run on a worker
+            args: Positional arguments of `fn`
+
+        Returns:
+            The queued Job (its `future` holds the result)
+
+        Raises:
+            SchedulerBusyError: When the queue or the client quota is full
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            if self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise SchedulerBusyError(f"Server busy: {self._waiting} questions waiting", self._waiting)
+            if self._per_client.get(client_id, 0) >= self.max_per_client:
+                self._rejected += 1
+                raise SchedulerBusyError("You already have questions being processed", self._waiting)
+
+            job = Job(client_id, fn, args, seq=next(self._seq), submitted_at=time.perf_counter())
+            queue = self._queues.setdefault(client_id, deque())
+            if not queue:
+                self._ready.append(client_id)
+            queue.append(job)
+            self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+            self._waiting += 1
+            self._cond.notify()
+            return job
+
+    def position(self, job: Job) -> int:
+        """Returns how many waiting jobs were submitted before `job` (0 once it started)."""
+        if job.started.is_set():
+            return 0
+        with self._cond:
+            return sum(1 for queue in self._queues.values() for other in queue if other.seq < job.seq)
+
+    def _next_job(self) -> Job | None:
+        """Pops the next job, round-robin across clients (caller holds the lock)."""
+        while self._ready:
+            client_id = self._ready.popleft()
+            queue = self._queues[client_id]
+            job = queue.popleft()
+            if queue:
+                self._ready.append(client_id)
+            else:
+                del self._queues[client_id]
+            return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._ready:
+                    self._cond.wait()
+                if self._closed and not self._ready:
+                    return
+                job = self._next_job()
+                self._waiting -= 1
+                self._running += 1
+
+            started_at = time.perf_counter()
+            job.started.set()
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args))
+                except BaseException as e:
+                    job.future.set_exception(e)
+            finished_at = time.perf_counter()
+
+            with self._cond:
+                self._running -= 1
+                self._completed += 1
+                self._per_client[job.client_id] -= 1
+                if not self._per_client[job.client_id]:
+                    del self._per_client[job.client_id]
+                self._wait_ms.append((started_at - job.submitted_at) * 1000)
+                self._run_ms.append((finished_at - started_at) * 1000)
+
+    def stats(self) -> dict[str, Any]:
+        """Returns queue depth, running jobs and the wait/run time distributions (None while empty)."""
+        # `summarize([])` is NaN, which the JSON response of /stats/scheduler cannot encode:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._waiting,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_ms": summarize(list(self._wait_ms)) if self._wait_ms else None,
+                "run_ms": summarize(list(self._run_ms)) if self._run_ms else None,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the workers once the queued jobs are done."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
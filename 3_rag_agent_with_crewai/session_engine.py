@@ -0,0 +1,336 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script session_engine.py
+========================
+This script contains the session-scoped execution engine of the RAG agent.
+
+Creating a `Crew(memory=True)` sets up the short-term, long-term and entity
+memory storages, which costs hundreds of milliseconds before the first LLM
+call. The engine keeps the agent and the memory storages of every user
+session warm; each question gets its own Crew, built (and validated) with the
+Task of the question on top of those storages. Sessions idle for longer than
+`idle_ttl` seconds are evicted, and at most `max_sessions` sessions are kept
+alive (least recently used sessions are evicted first, never while they are
+answering).
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Generator
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+from crewai import Agent, Crew, Task
+from crewai.memory.entity.entity_memory import EntityMemory
+from crewai.memory.long_term.long_term_memory import LongTermMemory
+from crewai.memory.short_term.short_term_memory import ShortTermMemory
+from logging_config import get_logger
+from tracing import span
+
+logger = get_logger(__name__)
+
+DEFAULT_SESSION_ID = "default"
+
+
+async def kickoff_native_async(crew: Crew) -> Any:
+    """
+    Runs a Crew on the native async path of crewAI (`akickoff`, async LLM calls).
+
+    Falls back to `kickoff_async`, which runs the synchronous kickoff in a
+    thread, on crewAI versions without native async support.
+    """
+    akickoff = getattr(crew, "akickoff", None)
+    if akickoff is not None:
+        return await akickoff()
+    return await crew.kickoff_async()
+
+
+async def acquire_lock(lock: threading.Lock) -> None:
+    """
+    Acquires a threading lock from a coroutine without blocking the event loop.
+
+    The wait runs in a worker thread; if the coroutine is cancelled meanwhile,
+    the lock is released as soon as that thread gets it.
+    """
+    if lock.acquire(blocking=False):
+        return
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        acquiring.add_done_callback(lambda _: lock.release())
+        raise
+
+
+@dataclass
+class SessionEntry:
+    """Warm agent and memory storages of a single user session."""
+
+    agent: Agent
+    memories: dict[str, Any]
+    created_at: float
+    last_used: float
+    questions: int = 0
+    in_flight: int = 0  # Questions checked out and not finished yet (guarded by the engine lock)
+    # Serializes the questions of the session, on the sync, async and streaming paths alike:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def busy(self) -> bool:
+        return self.in_flight > 0 or self.lock.locked()
+
+
+class SessionCrewEngine:
+    """
+    Keeps the agent and the memory storages of every user session warm.
+
+    Args:
+        agent_factory: Returns the agent of a new session (each session gets its
+            own Agent, so concurrent kickoffs never share executor state)
+        task_factory: Builds the Task of a question for the given agent (extra keyword
+            arguments of `ask`, `ask_async` and `ask_stream` are forwarded to it)
+        max_sessions: Maximum number of live sessions (LRU eviction above it)
+        idle_ttl: Seconds without questions after which a session is evicted
+        crew_kwargs: Extra keyword arguments forwarded to `Crew(...)`
+        clock: Monotonic clock (injectable for benchmarks)
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], Agent],
+        task_factory: Callable[..., Task],
+        max_sessions: int = 64,
+        idle_ttl: float = 900.0,
+        crew_kwargs: dict[str, Any] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.agent_factory = agent_factory
+        self.task_factory = task_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.crew_kwargs = {"memory": True, "verbose": False, "tracing": False, **(crew_kwargs or {})}
+        self.clock = clock
+        self._sessions: OrderedDict[str, SessionEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._evicted = 0
+
+    def ask(self, question: str, session_id: str = DEFAULT_SESSION_ID, **task_kwargs: Any) -> Any:
+        """
+        Answers a question on the warm agent and memory storages of the session.
+
+        Args:
+            question: Question of the user
+            session_id: Identifier of the user session
+            task_kwargs: Extra keyword arguments of `task_factory`
+
+        Returns:
+            The CrewOutput of the kickoff
+        """
+        entry, task = self._traced_checkout(session_id, question, task_kwargs)
+        try:
+            # Questions of the same session run one at a time on its memory storages:
+            with entry.lock, span("crew.kickoff", session_id=session_id):
+                entry.questions += 1
+                result = self._crew(entry, task).kickoff()
+                entry.last_used = self.clock()
+        finally:
+            self._release(entry)
+        return result
+
+    async def ask_async(self, question: str, session_id: str = DEFAULT_SESSION_ID, **task_kwargs: Any) -> Any:
+        """
+        Answers a question on the warm session on the native async path.
+
+        No thread is held while the LLM answers, so one event loop can keep
+        hundreds of questions in flight.
+
+        Args:
+            question: Question of the user
+            session_id: Identifier of the user session
+            task_kwargs: Extra keyword arguments of `task_factory`
+
+        Returns:
+            The CrewOutput of the kickoff
+        """
+        entry, task = self._traced_checkout(session_id, question, task_kwargs)
+        try:
+            # Same lock as `ask`: the agent and memory storages of a session serve one question at a time:
+            await acquire_lock(entry.lock)
+            try:
+                entry.questions += 1
+                with span("crew.kickoff", session_id=session_id):
+                    result = await kickoff_native_async(self._crew(entry, task))
+                entry.last_used = self.clock()
+            finally:
+                entry.lock.release()
+        finally:
+            self._release(entry)
+        return result
+
+    def ask_stream(
+        self, question: str, session_id: str = DEFAULT_SESSION_ID, **task_kwargs: Any
+    ) -> Generator[str, None, Any]:
+        """
+        Answers a question on the warm session, streaming the LLM chunks.
+
+        Args:
+            question: Question of the user
+            session_id: Identifier of the user session
+            task_kwargs: Extra keyword arguments of `task_factory`
+
+        Yields:
+            The text chunks emitted by the LLM for the agent (including the ReAct scaffolding)
+
+        Returns:
+            The CrewOutput of the kickoff (value of the StopIteration)
+        """
+        entry, task = self._traced_checkout(session_id, question, task_kwargs)
+        try:
+            with entry.lock:
+                entry.questions += 1
+                try:
+                    streaming = self._crew(entry, task, stream=True).kickoff()
+                    agent_id = str(entry.agent.id)
+                    for chunk in streaming:
+                        # The memory calls (task evaluation, entity extraction) also stream, with no agent:
+                        if chunk.agent_id == agent_id:
+                            yield chunk.content
+                    return streaming.result
+                finally:
+                    entry.last_used = self.clock()
+        finally:
+            self._release(entry)
+
+    def _traced_checkout(
+        self, session_id: str, question: str, task_kwargs: dict[str, Any] | None = None
+    ) -> tuple[SessionEntry, Task]:
+        """`_checkout` recorded as a span (a new session includes the agent and memory setup)."""
+        with span("session.checkout", session_id=session_id) as checkout_span:
+            entry, task = self._checkout(session_id, question, task_kwargs)
+            checkout_span.set(created=entry.questions == 0)
+        return entry, task
+
+    def _checkout(
+        self, session_id: str, question: str, task_kwargs: dict[str, Any] | None = None
+    ) -> tuple[SessionEntry, Task]:
+        """
+        Returns the session entry (creating it if needed) and the task of the question.
+
+        The agent, the memory storages and the task are built outside the engine
+        lock, so a slow setup never blocks the questions of other sessions. The
+        caller must pass the entry to `_release` when the question is finished.
+        """
+        now = self.clock()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions.move_to_end(session_id)
+                entry.last_used = now
+                entry.in_flight += 1
+                self._reused += 1
+
+        if entry is None:
+            agent = self.agent_factory()
+            new_entry = SessionEntry(agent=agent, memories=self._memories(agent), created_at=now, last_used=now)
+            with self._lock:
+                # Another question of the same session may have published its entry meanwhile:
+                entry = self._sessions.get(session_id)
+                if entry is None:
+                    self._evict_lru()
+                    entry = self._sessions[session_id] = new_entry
+                    self._created += 1
+                else:
+                    self._sessions.move_to_end(session_id)
+                    self._reused += 1
+                entry.in_flight += 1
+
+        try:
+            return entry, self.task_factory(question, entry.agent, **(task_kwargs or {}))
+        except BaseException:
+            self._release(entry)
+            raise
+
+    def _release(self, entry: SessionEntry) -> None:
+        with self._lock:
+            entry.in_flight -= 1
+
+    def _memories(self, agent: Agent) -> dict[str, Any]:
+        """
+        Memory storages of a new session, reused by the Crew of each of its questions.
+
+        The storages are named after the roles of `crew.agents`, as the ones
+        `Crew(memory=True)` creates, so the memories of one-shot crews stay
+        reachable; the session's agent is the only agent of its crews.
+        """
+        if not self.crew_kwargs.get("memory"):
+            return {}
+        embedder = self.crew_kwargs.get("embedder")
+        owner = SimpleNamespace(agents=[agent])
+        return {
+            "short_term_memory": ShortTermMemory(crew=owner, embedder_config=embedder),
+            "long_term_memory": LongTermMemory(),
+            "entity_memory": EntityMemory(crew=owner, embedder_config=embedder),
+        }
+
+    def _crew(self, entry: SessionEntry, task: Task, **overrides: Any) -> Crew:
+        """Crew of one question, on the warm agent and memory storages of its session."""
+        return Crew(agents=[entry.agent], tasks=[task], **entry.memories, **{**self.crew_kwargs, **overrides})
+
+    def _evict_lru(self) -> None:
+        """Evicts the least recently used idle sessions down to `max_sessions - 1` (caller holds the lock)."""
+        for session_id in [session_id for session_id, entry in self._sessions.items() if not entry.busy()]:
+            if len(self._sessions) < self.max_sessions:
+                return
+            del self._sessions[session_id]
+            self._evicted += 1
+            logger.info(f"Session {session_id} evicted (max_sessions={self.max_sessions})")
+        if len(self._sessions) >= self.max_sessions:
+            logger.warning(f"All {len(self._sessions)} sessions are answering; max_sessions exceeded temporarily")
+
+    def _evict_idle(self, now: float) -> None:
+        """Evicts the sessions idle for longer than `idle_ttl` (caller holds the lock)."""
+        expired = [
+            session_id
+            for session_id, entry in self._sessions.items()
+            if now - entry.last_used > self.idle_ttl and not entry.busy()
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+            self._evicted += 1
+            logger.info(f"Session {session_id} evicted after {self.idle_ttl:.0f}s idle")
+
+    def evict_idle(self) -> None:
+        """Evicts idle sessions now (the engine also does it on every question)."""
+        with self._lock:
+            self._evict_idle(self.clock())
+
+    def has_history(self, session_id: str) -> bool:
+        """Tells whether the answers of a session depend on its earlier questions (memory on, questions asked)."""
+        if not self.crew_kwargs.get("memory"):
+            return False
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry is not None and entry.questions > 0
+
+    def close_session(self, session_id: str) -> None:
+        """Releases the agent and memory storages of a session (e.g. when the chat is closed)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Returns counters of the engine."""
+        with self._lock:
+            return {
+                "live_sessions": len(self._sessions),
+                "created": self._created,
+                "reused": self._reused,
+                "evicted": self._evicted,
+            }
@@ -0,0 +1,124 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script streaming.py
+===================
+This script contains the helpers of the streaming mode of the RAG agent:
+
+- `FinalAnswerFilter` hides the ReAct scaffolding ("Thought:", "Action:",
+  ...) streamed by the LLM and lets only the final answer through
+- `timed_stream` records the time-to-first-token (TTFT) and the total time
+  of every streamed request in a `StreamMetrics` recorder
+"""
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from benchmark_utils import summarize
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+class FinalAnswerFilter:
+    """
+    Incremental filter that returns only the text after the final answer marker.
+
+    The marker may be split across chunks, so the text is buffered until it
+    is found. Everything before it (thoughts, tool calls) is dropped.
+    """
+
+    def __init__(self, marker: str = FINAL_ANSWER_MARKER) -> None:
+        self.marker = marker
+        self.started = False
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> str:
+        """Returns the part of `chunk` that belongs to the final answer."""
+        if self.started:
+            return chunk
+        self._buffer += chunk
+        position = self._buffer.find(self.marker)
+        if position < 0:
+            # Keep only what could still be the beginning of the marker:
+            self._buffer = self._buffer[-len(self.marker) :]
+            return ""
+        self.started = True
+        text = self._buffer[position + len(self.marker) :].lstrip()
+        self._buffer = ""
+        return text
+
+
+@dataclass
+class StreamRecord:
+    """Timings of one streamed request (milliseconds)."""
+
+    label: str
+    ttft_ms: float
+    total_ms: float
+    chunks: int
+
+
+class StreamMetrics:
+    """
+    Keeps the timings of the last `maxlen` streamed requests.
+
+    Args:
+        maxlen: Number of requests kept
+    """
+
+    def __init__(self, maxlen: int = 1000) -> None:
+        self._records: deque[StreamRecord] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, record: StreamRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> list[StreamRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> dict[str, dict[str, float] | None]:
+        """Returns the TTFT and total time distributions (None before the first streamed request)."""
+        records = self.records()
+        if not records:
+            # `summarize([])` is NaN, which JSON responses cannot encode:
+            return {"ttft_ms": None, "total_ms": None}
+        return {
+            "ttft_ms": summarize([r.ttft_ms for r in records]),
+            "total_ms": summarize([r.total_ms for r in records]),
+        }
+
+
+def timed_stream(tokens: Iterator[str], metrics: StreamMetrics, label: str = "") -> Iterator[str]:
+    """
+    Yields the tokens of a stream and records its TTFT and total time.
+
+    Args:
+        tokens: Stream of tokens
+        metrics: Recorder of the timings
+        label: Label of the request (e.g. the session id)
+
+    Yields:
+        The tokens, unchanged
+    """
+    start = time.perf_counter()
+    ttft_ms = None
+    chunks = 0
+    try:
+        for token in tokens:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - start) * 1000
+            chunks += 1
+            yield token
+    finally:
+        total_ms = (time.perf_counter() - start) * 1000
+        record = StreamRecord(label, ttft_ms if ttft_ms is not None else total_ms, total_ms, chunks)
+        metrics.record(record)
+        logger.info(f"Streamed answer: TTFT={record.ttft_ms:.0f} ms, total={total_ms:.0f} ms, {chunks} chunks")
@@ -0,0 +1,21 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script conftest.py
+==================
+Shared setup of the tests of the RAG agent: the scripts of the project are
+imported from its directory, and crewAI runs offline (no tracing, no
+telemetry, memory storages apart from the application data).
+"""
+import os
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+os.environ.setdefault("CREWAI_STORAGE_DIR", "rag_agent_tests")
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
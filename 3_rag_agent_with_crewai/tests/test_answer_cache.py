@@ -0,0 +1,32 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_answer_cache.py
+===========================
+Tests of the semantic answer cache.
+"""
+from answer_cache import SemanticAnswerCache
+from fakes import FakeEmbeddingFunction
+
+
+class CountingEmbedder:
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.texts.extend(texts)
+        return [FakeEmbeddingFunction.embed(text) for text in texts]
+
+
+def test_store_reuses_the_vector_of_the_lookup():
+    embed = CountingEmbedder()
+    cache = SemanticAnswerCache(embed)
+    cache.store("Where did Eddy study?", "At the UFES.")
+    assert embed.texts == ["Where did Eddy study?"]
+
+    assert cache.lookup("Which languages does Eddy speak?") is None
+    cache.store("Which languages does Eddy speak?", "Portuguese and Spanish.")
+    assert embed.texts == ["Where did Eddy study?", "Which languages does Eddy speak?"]
+
+    assert cache.lookup("which languages does eddy speak") == "Portuguese and Spanish."
+    assert cache.lookup("Which languages does Eddy speak?", scope="cv_other") is None
@@ -0,0 +1,60 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_application.py
+==========================
+Tests of the native async question path of the application (library API;
+the chat server streams its answers on the agent scheduler instead).
+"""
+import asyncio
+
+import application
+from answer_cache import SemanticAnswerCache
+from crewai import Agent, Task
+from fakes import FakeEmbeddingFunction, FakeLLM
+from pre_router import ROUTE_AGENT, ROUTE_GREETING, RouteDecision
+from session_engine import SessionCrewEngine
+
+
+class StubRouter:
+    """Greets "hi" and sends every other question to the agent."""
+
+    def route(self, question, where=None):
+        if question == "hi":
+            return RouteDecision(ROUTE_GREETING, answer="Hello!")
+        return RouteDecision(ROUTE_AGENT)
+
+
+def build_agent() -> Agent:
+    return Agent(
+        role="Curriculum analyst",
+        goal="Answer questions about the curriculum.",
+        backstory="You know the curriculum well.",
+        llm=FakeLLM(answer="Eddy works with Python."),
+        verbose=False,
+        allow_delegation=False,
+    )
+
+
+def build_task(question: str, agent: Agent, where=None) -> Task:
+    return Task(description=question, expected_output="An answer.", agent=agent)
+
+
+def test_ask_question_async_routes_caches_and_runs_the_agent(monkeypatch):
+    engine = SessionCrewEngine(build_agent, build_task, crew_kwargs={"memory": False})
+    cache = SemanticAnswerCache(embed=FakeEmbeddingFunction())
+    monkeypatch.setitem(application._components, "pre_router", StubRouter())
+    monkeypatch.setitem(application._components, "answer_cache", cache)
+    monkeypatch.setitem(application._components, "session_engine", engine)
+
+    async def scenario() -> list[str]:
+        return [
+            await application.ask_question_async("hi", session_id="a"),
+            await application.ask_question_async("Which languages?", session_id="a"),
+            await application.ask_question_async("Which languages?", session_id="b"),
+        ]
+
+    assert asyncio.run(scenario()) == ["Hello!", "Eddy works with Python.", "Eddy works with Python."]
+    stats = engine.stats()
+    assert stats["created"] == 1  # The second session was answered from the cache
+    assert cache.lookup("Which languages?") == "Eddy works with Python."
@@ -0,0 +1,44 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_cv_chunker.py
+=========================
+Tests of the structure-aware CV chunker (headings and list entries).
+"""
+from cv_chunker import DEFAULT_SECTION, CVChunker, detect_sections, heading_section, iter_blocks
+
+PAGES = [
+    "JOHN DOE\n"
+    "Data Scientist\n"
+    "\n"
+    "SKILLS\n"
+    "CLOUD\n"
+    "• AWS (S3, Lambda, SageMaker)\n"
+    "• GCP (BigQuery)\n"
+    "DATA\n"
+    "• SQL\n"
+    "• PYSPARK\n",
+    "EXPERIENCE\n"
+    "2019 - 2021 ACME Corp, machine learning engineer.\n"
+    "Built the recommendation pipelines.\n",
+]
+
+
+def test_bullet_lines_are_not_headings():
+    assert heading_section("• SQL") is None
+    assert heading_section("- PYSPARK") is None
+    assert heading_section("CLOUD") == DEFAULT_SECTION
+    assert heading_section("Skills:") == "skills"
+
+    blocks = list(iter_blocks(PAGES))
+    assert [block.kind for block in blocks if block.text in ("• SQL", "• PYSPARK")] == ["item", "item"]
+
+
+def test_heading_only_blocks_stay_with_the_next_section():
+    chunks = list(CVChunker(chunk_size=60, chunk_overlap=10).chunks(PAGES))
+
+    aws = next(chunk for chunk in chunks if "AWS" in chunk)
+    assert aws.startswith("SKILLS\nCLOUD\n• AWS")
+    assert any(chunk.startswith("DATA\n• SQL") for chunk in chunks)
+    assert not any(chunk.startswith("• SQL") for chunk in chunks)
+    assert detect_sections([aws]) == ["skills"]
@@ -0,0 +1,42 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_embedding_cache.py
+==============================
+Tests of the cached embedder spec with the RagTool, `build_embedder` and Crew.
+"""
+from crewai import Agent, Crew, Task
+from crewai.rag.embeddings.factory import build_embedder
+from crewai_tools import RagTool
+from embedding_cache import cached_embedding_spec, get_cache
+from fakes import FAKE_EMBEDDER_SPEC, FakeEmbeddingFunction, FakeLLM
+from vector_store import ChromaVectorStore
+
+
+def test_cached_spec_embeds_through_the_cache(tmp_path):
+    spec = cached_embedding_spec(FAKE_EMBEDDER_SPEC, cache_path=tmp_path / "cache.sqlite3")
+    embed = build_embedder(spec)
+    assert embed.name() == FakeEmbeddingFunction.name()
+
+    vectors = embed(["a text", "another text"])
+    assert [list(v) for v in vectors] == [FakeEmbeddingFunction.embed(t) for t in ("a text", "another text")]
+    embed(["a text"])
+    assert get_cache(tmp_path / "cache.sqlite3").stats()["hits"] == 1
+
+
+def test_cached_spec_builds_a_rag_tool(tmp_path):
+    spec = cached_embedding_spec(FAKE_EMBEDDER_SPEC, cache_path=tmp_path / "cache.sqlite3", dimensions=64)
+    config = {"vectordb": {"provider": "chromadb", "config": {}}, "embedding_model": spec}
+    collection_name = f"test_cached_spec_{tmp_path.name}"
+    tool = RagTool(collection_name=collection_name, config=config, similarity_threshold=0.0)
+
+    store = ChromaVectorStore.from_config(config, collection_name)
+    store.upsert(["c1"], ["Python and SQL for data science"], [{"source": "cv"}])
+    assert "Python and SQL" in tool.run(query="Python and SQL for data science")
+    store.clear()
+
+
+def test_cached_spec_is_accepted_by_crew(tmp_path):
+    spec = cached_embedding_spec(FAKE_EMBEDDER_SPEC, cache_path=tmp_path / "cache.sqlite3")
+    agent = Agent(role="Analyst", goal="Answer.", backstory="Knows the CV.", llm=FakeLLM(answer="ok"))
+    Crew(agents=[agent], tasks=[Task(description="Q?", expected_output="A.", agent=agent)], embedder=spec)
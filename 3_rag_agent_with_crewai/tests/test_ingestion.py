@@ -0,0 +1,38 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_ingestion.py
+========================
+Tests of the incremental ingestion of a collection written before the
+ingestion manifest existed.
+"""
+from cv_chunker import CHUNKER_SPLIT_TEXT
+from fakes import FakeEmbeddingFunction
+from ingestion import IncrementalIngestor, IngestionManifest
+from local_index import LocalVectorIndex
+from vector_store import LocalVectorStore
+
+
+def test_a_collection_without_manifest_is_migrated_once(tmp_path):
+    store = LocalVectorStore(LocalVectorIndex(tmp_path / "index"), FakeEmbeddingFunction())
+    store.upsert(["legacy-0", "legacy-1"], ["Old chunk written by RagTool.add", "Another old chunk"])
+    document = tmp_path / "cv.txt"
+    document.write_text("Python and SQL.\n\nMachine learning with PyTorch.\n", encoding="utf-8")
+
+    def ingest():
+        ingestor = IncrementalIngestor(
+            store=store,
+            manifest=IngestionManifest(tmp_path / "manifest.json"),
+            collection_name="cv",
+            embedding_model="fake",
+            chunker=CHUNKER_SPLIT_TEXT,
+        )
+        return ingestor.ingest_file(document)
+
+    report = ingest()
+    assert report.status == "new"
+    assert store.count() == report.added > 0  # The legacy chunks were cleared, not duplicated
+
+    again = ingest()
+    assert again.status == "unchanged"
+    assert store.count() == report.added
@@ -0,0 +1,59 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_inspect_chromadb.py
+===============================
+Tests of the ChromaDB storage report and of its compaction.
+"""
+import sqlite3
+
+import chromadb
+from inspect_chromadb import ORPHANS_SQL, compact, connect_read_only, inspect
+
+
+def build_database(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.get_or_create_collection("cv_chunks", embedding_function=None)
+    collection.add(
+        ids=["a", "b", "c"],
+        documents=["alpha python", "beta sql", "gamma aws"],
+        metadatas=[{"source": "x"}, {"source": "y"}, {"source": "z"}],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+    )
+    return tmp_path / "chroma.sqlite3"
+
+
+def test_compact_deletes_the_full_text_rows_of_deleted_embeddings(tmp_path, capsys):
+    db_path = build_database(tmp_path)
+    conn = sqlite3.connect(db_path)
+    # "b" loses its embedding row: its metadata and full-text rows become orphans
+    (orphan_id,) = conn.execute("SELECT id FROM embeddings WHERE embedding_id = 'b'").fetchone()
+    conn.execute("DELETE FROM embeddings WHERE id = ?", (orphan_id,))
+    conn.commit()
+    conn.close()
+
+    inspect(db_path)
+    assert "Metadata rows without embedding: 2" in capsys.readouterr().out
+
+    compact(db_path)
+    conn = connect_read_only(db_path)
+    try:
+        assert conn.execute(ORPHANS_SQL).fetchone() == (0, 0, 0, 0)
+        full_text = dict(conn.execute("SELECT rowid, string_value FROM embedding_fulltext_search"))
+        embeddings = dict(conn.execute("SELECT id, embedding_id FROM embeddings"))
+    finally:
+        conn.close()
+    assert sorted(full_text) == sorted(embeddings)
+    assert sorted(full_text.values()) == ["alpha python", "gamma aws"]
+
+
+def test_immutable_connection_reads_without_locking(tmp_path, capsys):
+    db_path = build_database(tmp_path)
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN EXCLUSIVE")  # A writer holding every lock of the file
+    try:
+        inspect(db_path, immutable=True)
+    finally:
+        writer.rollback()
+        writer.close()
+    assert "cv_chunks" in capsys.readouterr().out
@@ -0,0 +1,58 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_local_index.py
+==========================
+Tests of the IVF training and of the compaction of the local vector index.
+"""
+import numpy as np
+from local_index import LocalVectorIndex
+
+
+def random_vectors(n: int, dimensions: int = 32, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def upsert_batches(index: LocalVectorIndex, vectors: np.ndarray, batch_size: int = 600) -> None:
+    for start in range(0, len(vectors), batch_size):
+        ids = [f"c{row}" for row in range(start, min(start + batch_size, len(vectors)))]
+        metadatas = [{"document_id": f"doc{row % 3}"} for row in range(start, start + len(ids))]
+        index.upsert(ids, vectors[start : start + len(ids)], [f"chunk {i}" for i in ids], metadatas)
+
+
+def test_ivf_is_trained_when_the_index_grows_past_the_exact_threshold(tmp_path):
+    vectors = random_vectors(1_800)
+    index = LocalVectorIndex(tmp_path / "index", exact_threshold=1_000, nprobe=64)
+    upsert_batches(index, vectors)
+
+    assert index.centroids is not None
+    assert index.header["sorted_count"] >= 1_000
+    record, score = index.search(vectors[1_234], k=1)[0]
+    assert record["id"] == "c1234"
+    assert score > 0.99
+
+
+def test_compaction_keeps_the_live_rows_on_disk(tmp_path):
+    vectors = random_vectors(1_200)
+    index = LocalVectorIndex(tmp_path / "index", exact_threshold=1_000)
+    upsert_batches(index, vectors)
+    index.delete([f"c{row}" for row in range(0, 1_200, 2)])  # Above max_dead_ratio: compacts
+
+    assert index.count == len(index) == 600
+    assert not list((tmp_path / "index").glob("*.compact"))
+    reopened = LocalVectorIndex(tmp_path / "index")
+    assert sorted(reopened.all_ids(), key=lambda i: int(i[1:])) == [f"c{row}" for row in range(1, 1_200, 2)]
+    record, _ = reopened.search(vectors[7], k=1, where={"document_id": "doc1"})[0]
+    assert record == {"id": "c7", "document": "chunk c7", "metadata": {"document_id": "doc1"}}
+
+
+def test_interrupted_compaction_leaves_the_index_intact(tmp_path):
+    vectors = random_vectors(10)
+    index = LocalVectorIndex(tmp_path / "index")
+    upsert_batches(index, vectors)
+    (tmp_path / "index" / "vectors.f32.compact").write_bytes(b"partial")
+
+    reopened = LocalVectorIndex(tmp_path / "index")
+    assert len(reopened) == 10
+    assert not (tmp_path / "index" / "vectors.f32.compact").exists()
@@ -0,0 +1,62 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_retrieval.py
+========================
+Tests of the hybrid (dense + BM25) retrieval thresholds.
+"""
+from bm25_index import BM25Index
+from local_index import LocalVectorIndex
+from retrieval import HybridVectorStore, relevant_hits
+from vector_store import LocalVectorStore, SearchHit
+
+DOCUMENTS = {
+    "deep": "Deep learning research with convolutional models and experience",
+    "data": "Python, SQL and PySpark pipelines with experience",
+    "lang": "Portuguese and Spanish speaker with experience",
+    "misc": "Hobbies: football and chess, plenty of experience",
+}
+# Dense geometry of the texts: the question about neural networks is close to "deep" only
+VECTORS = {
+    "deep": [1.0, 0.0, 0.0, 0.0, 0.0],
+    "data": [0.0, 1.0, 0.0, 0.0, 0.0],
+    "lang": [0.0, 0.0, 1.0, 0.0, 0.0],
+    "misc": [0.0, 0.0, 0.0, 1.0, 0.0],
+    "Has he worked on neural networks?": [0.9, 0.1, 0.0, 0.0, 0.0],
+    "PySpark": [0.0, 0.2, 0.0, 0.98, 0.0],
+    "experience": [0.0, 0.0, 0.0, 0.0, 1.0],
+}
+
+
+def embed(texts: list[str]) -> list[list[float]]:
+    by_text = {DOCUMENTS.get(key, key): vector for key, vector in VECTORS.items()}
+    return [by_text[text] for text in texts]
+
+
+def build_store(tmp_path) -> HybridVectorStore:
+    store = LocalVectorStore(LocalVectorIndex(tmp_path / "index"), embed)
+    hybrid = HybridVectorStore(store, BM25Index(tmp_path / "bm25.sqlite3"), similarity_threshold=0.7)
+    hybrid.upsert(list(DOCUMENTS), list(DOCUMENTS.values()))
+    return hybrid
+
+
+def test_hybrid_keeps_dense_matches_without_lexical_overlap(tmp_path):
+    hits = build_store(tmp_path).search("Has he worked on neural networks?", limit=4)
+    assert [hit.id for hit in hits] == ["deep"]
+    assert hits[0].lexical_score is None
+
+
+def test_hybrid_keeps_strong_lexical_matches_only(tmp_path):
+    store = build_store(tmp_path)
+    assert [hit.id for hit in store.search("PySpark", limit=4)] == ["data", "misc"]
+    # A term of every chunk has an IDF close to 0, and no chunk is dense enough:
+    assert store.search("experience", limit=4) == []
+
+
+def test_relevant_hits_requires_a_minimum_bm25_score():
+    hits = [
+        SearchHit("dense", "", {}, similarity=0.8),
+        SearchHit("weak", "", {}, similarity=0.0, lexical_score=0.2),
+        SearchHit("strong", "", {}, similarity=0.0, lexical_score=2.5),
+    ]
+    assert [hit.id for hit in relevant_hits(hits, similarity_threshold=0.7)] == ["dense", "strong"]
@@ -0,0 +1,26 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_scheduler.py
+========================
+Tests of the scheduler statistics served by the chat server.
+"""
+import json
+
+from scheduler import AgentScheduler
+
+
+def test_stats_are_json_before_and_after_the_first_job():
+    scheduler = AgentScheduler(workers=1)
+    stats = scheduler.stats()
+    assert stats["wait_ms"] is None
+    assert stats["run_ms"] is None
+    json.dumps(stats, allow_nan=False)  # What the JSON response of /stats/scheduler does
+
+    job = scheduler.submit("client", lambda: "done")
+    scheduler.shutdown()  # The worker records the timings after resolving the future
+    assert job.future.result() == "done"
+    stats = scheduler.stats()
+    assert stats["completed"] == 1
+    assert stats["run_ms"]["count"] == 1
+    json.dumps(stats, allow_nan=False)
@@ -0,0 +1,141 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_session_engine.py
+=============================
+Tests of the fake embedder spec and of the session engine (offline, FakeLLM).
+"""
+import asyncio
+import threading
+
+import pytest
+from crewai import Agent, Crew, Task
+from crewai.rag.embeddings.factory import build_embedder
+from fakes import FAKE_EMBEDDER_SPEC, FakeLLM
+from session_engine import SessionCrewEngine, acquire_lock
+
+
+def build_agent() -> Agent:
+    return Agent(
+        role="Curriculum analyst",
+        goal="Answer questions about the curriculum.",
+        backstory="You know the curriculum well.",
+        llm=FakeLLM(answer="ok"),
+        verbose=False,
+        allow_delegation=False,
+    )
+
+
+def build_task(question: str, agent: Agent) -> Task:
+    return Task(description=question, expected_output="An answer.", agent=agent)
+
+
+def test_fake_embedder_spec_is_accepted_by_crewai():
+    embed = build_embedder(FAKE_EMBEDDER_SPEC)
+    vectors = embed(["a text", "a text", "another text"])
+    assert len(vectors) == 3
+    assert list(vectors[0]) == list(vectors[1])
+    assert list(vectors[0]) != list(vectors[2])
+
+    agent = build_agent()
+    crew = Crew(agents=[agent], tasks=[build_task("Question?", agent)], embedder=FAKE_EMBEDDER_SPEC)
+    assert crew.embedder == FAKE_EMBEDDER_SPEC
+
+
+def test_session_is_reused_and_each_question_gets_its_own_crew():
+    engine = SessionCrewEngine(build_agent, build_task, crew_kwargs={"memory": False})
+    assert engine.ask("First?", session_id="a").raw == "ok"
+    assert engine.ask("Second?", session_id="a").raw == "ok"
+    stats = engine.stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+
+
+def test_max_sessions_never_evicts_a_session_that_is_answering():
+    engine = SessionCrewEngine(build_agent, build_task, max_sessions=1, crew_kwargs={"memory": False})
+    entry, _ = engine._checkout("busy", "Question?")  # Checked out, not released: the session is answering
+    engine.ask("Question?", session_id="other")
+    assert "busy" in engine._sessions
+    engine._release(entry)
+
+    engine.ask("Question?", session_id="third")
+    assert "busy" not in engine._sessions
+    assert engine.stats()["evicted"] >= 1
+
+
+def test_concurrent_first_questions_of_a_session_share_one_entry():
+    engine = SessionCrewEngine(build_agent, build_task, crew_kwargs={"memory": False})
+    errors = []
+
+    def ask() -> None:
+        try:
+            engine.ask("Question?", session_id="shared")
+        except Exception as error:  # pragma: no cover - reported below
+            errors.append(error)
+
+    threads = [threading.Thread(target=ask) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert engine.stats()["live_sessions"] == 1
+    assert engine.stats()["created"] + engine.stats()["reused"] == 4
+
+
+def test_failed_task_factory_releases_the_session():
+    def failing_task(question: str, agent: Agent) -> Task:
+        raise ValueError("bad question")
+
+    engine = SessionCrewEngine(build_agent, failing_task, crew_kwargs={"memory": False})
+    with pytest.raises(ValueError):
+        engine.ask("Question?", session_id="a")
+    assert engine._sessions["a"].in_flight == 0
+
+
+def test_history_starts_after_the_first_question():
+    engine = SessionCrewEngine(build_agent, build_task, crew_kwargs={"memory": False})
+    assert not engine.has_history("alice")
+    engine.ask("First question?", session_id="alice")
+    assert not engine.has_history("alice")  # Without memory, answers never depend on the history
+
+    engine.crew_kwargs["memory"] = True
+    assert engine.has_history("alice")
+    assert not engine.has_history("bob")
+
+
+def test_acquire_lock_waits_without_blocking_the_loop_and_survives_cancellation():
+    lock = threading.Lock()
+    lock.acquire()
+
+    async def scenario() -> None:
+        waiter = asyncio.create_task(acquire_lock(lock))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()  # The loop keeps running while the lock is held
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        lock.release()  # The cancelled waiter takes the lock in its thread, then gives it back
+        await asyncio.sleep(0.05)
+
+        await acquire_lock(lock)
+        lock.release()
+
+    asyncio.run(scenario())
+    assert lock.acquire(timeout=1.0)
+
+
+def test_session_memories_use_the_storage_names_of_crew_memory():
+    engine = SessionCrewEngine(
+        build_agent, build_task, crew_kwargs={"memory": True, "embedder": FAKE_EMBEDDER_SPEC}
+    )
+    entry, _ = engine._checkout("a", "Question?")
+    engine._release(entry)
+
+    agent = build_agent()
+    crew = Crew(agents=[agent], tasks=[build_task("Question?", agent)], memory=True, embedder=FAKE_EMBEDDER_SPEC)
+    for name in ("short_term_memory", "entity_memory"):
+        storage = entry.memories[name].storage
+        expected = getattr(crew, f"_{name}").storage
+        assert storage.agents == expected.agents == "Curriculum_analyst"
+        assert storage.storage_file_name == expected.storage_file_name
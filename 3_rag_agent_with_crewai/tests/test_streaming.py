@@ -0,0 +1,22 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_streaming.py
+========================
+Tests of the streaming metrics served by the chat server.
+"""
+import json
+
+from streaming import StreamMetrics, timed_stream
+
+
+def test_summary_is_json_before_and_after_the_first_stream():
+    metrics = StreamMetrics()
+    summary = metrics.summary()
+    assert summary == {"ttft_ms": None, "total_ms": None}
+    json.dumps(summary, allow_nan=False)  # What the JSON response of /stats/streaming does
+
+    assert list(timed_stream(iter(["Hello", " world"]), metrics, label="a")) == ["Hello", " world"]
+    summary = metrics.summary()
+    assert summary["ttft_ms"]["count"] == summary["total_ms"]["count"] == 1
+    json.dumps(summary, allow_nan=False)
@@ -0,0 +1,68 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_tracing.py
+======================
+Tests of the local span recorder (LLM events of crewAI paired per call).
+"""
+import contextvars
+import json
+
+import tiktoken
+import tracing
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.llm_events import (
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    LLMCallType,
+)
+from tracing import configure_tracing, count_tokens, mark_llm_call, span
+
+
+def test_llm_calls_of_one_span_are_paired_by_call_id(tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    configure_tracing(trace_file)
+    try:
+        with span("crew.kickoff"):
+            # Two calls of the same task and agent at the same time (no task or agent id at all here):
+            calls = {name: contextvars.copy_context() for name in ("a", "b")}
+            for context in calls.values():
+                context.run(mark_llm_call)
+
+            def emit(name: str, event) -> None:
+                calls[name].run(crewai_event_bus.emit, None, event).result(timeout=10)
+
+            emit("a", LLMCallStartedEvent(messages="first question", model="fake"))
+            emit("b", LLMCallStartedEvent(messages="a second and longer question", model="fake"))
+            emit("b", LLMCallCompletedEvent(response="two words", call_type=LLMCallType.LLM_CALL, model="fake"))
+            emit("a", LLMCallFailedEvent(error="timeout"))
+    finally:
+        configure_tracing(None)
+
+    spans = [json.loads(line) for line in trace_file.read_text(encoding="utf-8").splitlines()]
+    kickoff = next(record for record in spans if record["name"] == "crew.kickoff")
+    llm_calls = [record for record in spans if record["name"] == "llm.call"]
+    assert len(llm_calls) == 2
+    assert all(record["parent_id"] == kickoff["span_id"] for record in llm_calls)
+
+    failed = next(record["attributes"] for record in llm_calls if "error" in record["attributes"])
+    completed = next(record["attributes"] for record in llm_calls if "error" not in record["attributes"])
+    assert failed["error"] == "timeout"
+    assert failed["tokens_in"] == count_tokens("first question")
+    assert completed["tokens_in"] == count_tokens("a second and longer question")
+    assert completed["tokens_out"] == count_tokens("two words")
+
+
+def test_token_counts_are_estimated_when_the_tokenizer_cannot_be_loaded(monkeypatch):
+    def offline(name):
+        raise ConnectionError("no network to download the tokenizer")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", offline)
+    tracing._encoding.cache_clear()
+    try:
+        assert count_tokens("") == 0
+        assert count_tokens("abcdefghi") == 3  # 9 characters, 4 per token, rounded up
+        assert count_tokens([{"role": "user", "content": "abcd"}, {"role": "assistant", "content": None}]) == 1
+    finally:
+        tracing._encoding.cache_clear()
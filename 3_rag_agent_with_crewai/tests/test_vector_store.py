@@ -0,0 +1,42 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_vector_store.py
+===========================
+Tests of the similarity scale shared by the stores and the RagTool.
+"""
+import pytest
+from crewai.rag.factory import create_client
+from crewai_tools import RagTool
+from fakes import FAKE_EMBEDDER_SPEC, FakeEmbeddingFunction
+from local_index import LocalVectorIndex
+from vector_store import ChromaVectorStore, LocalVectorStore
+
+DOCUMENTS = ["Python and SQL", "Machine learning with PyTorch", "Portuguese and Spanish"]
+
+
+def test_chroma_similarity_matches_the_rag_tool_score(tmp_path):
+    config = {"vectordb": {"provider": "chromadb", "config": {}}, "embedding_model": FAKE_EMBEDDER_SPEC}
+    collection_name = f"test_scale_{tmp_path.name}"
+    tool = RagTool(collection_name=collection_name, config=config)
+    store = ChromaVectorStore.from_config(config, collection_name)
+    store.upsert([f"c{i}" for i in range(len(DOCUMENTS))], DOCUMENTS)
+    try:
+        hits = store.search(DOCUMENTS[1], limit=3)
+        results = create_client(tool.adapter.config).search(
+            collection_name=collection_name, query=DOCUMENTS[1], limit=3, score_threshold=0.0
+        )
+        assert [hit.document for hit in hits] == [result["content"] for result in results]
+        assert [hit.similarity for hit in hits] == pytest.approx([result["score"] for result in results], abs=1e-4)
+        assert store.similarities(DOCUMENTS[1], limit=1) == pytest.approx([1.0], abs=1e-4)
+    finally:
+        store.clear()
+
+
+def test_local_similarity_uses_the_rag_tool_scale(tmp_path):
+    store = LocalVectorStore(LocalVectorIndex(tmp_path / "index"), FakeEmbeddingFunction())
+    store.upsert(["c0", "c1"], DOCUMENTS[:2])
+    best, other = store.search(DOCUMENTS[0], limit=2)
+    assert best.similarity == pytest.approx(1.0, abs=1e-4)
+    # Unrelated fake vectors are nearly orthogonal: cosine ~0, RagTool score ~0.5
+    assert other.similarity == pytest.approx(0.5, abs=0.2)
@@ -0,0 +1,166 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script trace_summary.py
+=======================
+This script summarizes the spans recorded by `tracing.py` (RAG_TRACING=1):
+
+- per stage: number of calls, p50/p95/p99 and total time, share of the time
+  of the questions, tokens in/out and cache hit rate
+- the slowest traces, as a tree of their stages
+
+The trace file is only read, so it can be summarized while the agent runs.
+
+Run
+===
+RAG_TRACING=1 uv run application.py
+uv run trace_summary.py --since 60 --slowest 5
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from ansi_colors import CYAN, GREEN, RESET, YELLOW
+from benchmark_utils import summarize
+from config_crewai import TRACE_FILE
+
+
+def load_spans(path: Path, since_minutes: float | None = None) -> list[dict[str, Any]]:
+    """Reads the spans of a trace file (lines cut by a running writer are skipped)."""
+    oldest = time.time() - since_minutes * 60 if since_minutes else 0.0
+    spans = []
+    with path.open(encoding="utf-8") as trace_file:
+        for line in trace_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("start", 0.0) >= oldest:
+                spans.append(record)
+    return spans
+
+
+def cache_hit_rate(spans: list[dict[str, Any]]) -> float | None:
+    """Returns the cache hit rate of a stage (None when its spans do not record cache hits)."""
+    hits = lookups = 0
+    for record in spans:
+        attributes = record["attributes"]
+        if "cache_hit" in attributes:
+            hits += bool(attributes["cache_hit"])
+            lookups += 1
+        elif "cache_hits" in attributes:  # Batches, e.g. the texts of one embedding call
+            hits += attributes["cache_hits"]
+            lookups += attributes.get("texts", 0)
+    return hits / lookups if lookups else None
+
+
+def stage_summaries(spans: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Aggregates the spans by stage name.
+
+    Args:
+        spans: Records of the trace file
+
+    Returns:
+        One row per stage, the longest total time first
+    """
+    by_name: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for record in spans:
+        by_name[record["name"]].append(record)
+    root_ms = sum(record["duration_ms"] for record in spans if record["parent_id"] is None)
+
+    rows = []
+    for name, records in by_name.items():
+        durations = [record["duration_ms"] for record in records]
+        total_ms = sum(durations)
+        rows.append(
+            {
+                "name": name,
+                **summarize(durations),
+                "total_ms": total_ms,
+                "share": total_ms / root_ms if root_ms else 0.0,
+                "errors": sum(record["status"] != "ok" for record in records),
+                "tokens_in": sum(record["attributes"].get("tokens_in", 0) for record in records),
+                "tokens_out": sum(record["attributes"].get("tokens_out", 0) for record in records),
+                "cache_hit_rate": cache_hit_rate(records),
+            }
+        )
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def print_stages(rows: list[dict[str, Any]]) -> None:
+    print(
+        f"{'stage':<28} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'total s':>8} "
+        f"{'share':>6} {'tok in':>8} {'tok out':>8} {'cache':>6} {'errors':>6}"
+    )
+    for row in rows:
+        cache = f"{row['cache_hit_rate']:.0%}" if row["cache_hit_rate"] is not None else "-"
+        print(
+            f"{row['name'][:28]:<28} {row['count']:>6} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f} "
+            f"{row['total_ms'] / 1000:>8.2f} {row['share']:>6.0%} {row['tokens_in']:>8} {row['tokens_out']:>8} "
+            f"{cache:>6} {row['errors']:>6}"
+        )
+
+
+def _format_attributes(attributes: dict[str, Any]) -> str:
+    return " ".join(f"{key}={value}" for key, value in attributes.items() if value is not None)
+
+
+def print_trace(root: dict[str, Any], children: dict[str, list[dict[str, Any]]]) -> None:
+    """Prints a trace as a tree of its stages (children in start order)."""
+
+    def walk(record: dict[str, Any], prefix: str, last: bool, depth: int) -> None:
+        branch = "" if depth == 0 else ("└── " if last else "├── ")
+        error = f" {YELLOW}{record['error']}{RESET}" if record.get("error") else ""
+        attributes = _format_attributes(record["attributes"])
+        attributes = f" {attributes}" if attributes else ""
+        print(f"{prefix}{branch}{record['name']} {record['duration_ms']:.1f} ms{attributes}{error}")
+        nested = sorted(children.get(record["span_id"], []), key=lambda child: child["start"])
+        child_prefix = prefix if depth == 0 else prefix + ("    " if last else "│   ")
+        for position, child in enumerate(nested):
+            walk(child, child_prefix, position == len(nested) - 1, depth + 1)
+
+    walk(root, "", True, 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", type=Path, default=None, help="Trace file (default: TRACE_FILE of config_crewai)")
+    parser.add_argument("--since", type=float, default=None, help="Only the spans of the last N minutes")
+    parser.add_argument("--slowest", type=int, default=3, help="Number of slowest traces printed as trees")
+    parser.add_argument("--root", default="ask_question", help="Name of the root spans ranked by --slowest")
+    args = parser.parse_args()
+
+    if args.path is None:
+        args.path = TRACE_FILE
+    if not args.path.exists():
+        print(f"❌ Trace file not found in: {args.path} (run the agent with RAG_TRACING=1)")
+        sys.exit(1)
+
+    spans = load_spans(args.path, args.since)
+    if not spans:
+        print(f"{YELLOW}No span recorded{' in the period' if args.since else ''}{RESET}")
+        return
+    roots = [record for record in spans if record["parent_id"] is None]
+    print(f"\n{CYAN}=== {len(spans)} spans, {len(roots)} traces ({args.path}) ==={RESET}")
+    print_stages(stage_summaries(spans))
+
+    children: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for record in spans:
+        if record["parent_id"] is not None:
+            children[record["parent_id"]].append(record)
+    slowest = sorted((root for root in roots if root["name"] == args.root), key=lambda root: -root["duration_ms"])
+    for root in slowest[: args.slowest]:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(root["start"]))
+        print(f"\n{CYAN}--- trace {root['trace_id']} ({started}) ---{RESET}")
+        print_trace(root, children)
+    print(f"\n{GREEN}✅ Summary finished{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script tracing.py
+=================
+This script contains the local span recorder of the RAG agent (RAG_TRACING=1
+in `config_crewai.py`). No collector is needed: every finished span is
+appended as one JSON line to a local file, summarized by `trace_summary.py`.
+
+A span is the duration of one stage of a question, with its attributes
+(tokens in/out, cache hit, number of chunks, ...). The spans opened inside
+another span are its children, so one trace holds the whole question:
+
+    ask_question
+    ├── pre_router
+    ├── answer_cache.lookup           cache_hit
+    ├── session.checkout              created (Crew and memory setup)
+    └── crew.kickoff
+        ├── memory.retrieval          (crewAI events)
+        ├── llm.call                  tokens_in, tokens_out
+        ├── tool.Knowledge base       cache_hit (crewAI tool cache)
+        │   └── knowledge_base.search
+        │       ├── retrieve          hits
+        │       │   └── embed         texts, cache_hits
+        │       ├── rerank
+        │       └── compress          tokens_in, tokens_out
+        └── llm.call
+
+The LLM, tool and memory spans come from the crewAI event bus. Their
+handlers run in a thread pool with a copy of the context of the emitter,
+so they find their parent span (except in the streaming kickoff, which
+crewAI runs in its own thread: its spans are recorded as roots). Their
+tokens are counted with tiktoken on the messages and the response.
+
+The LLM events of crewAI carry no call id, so the started and the finished
+event of a call are paired by an id that a `before_llm_call` hook (run by
+the agent executor in the calling thread, right before the call) sets in
+the context the events are emitted from.
+
+When tracing is disabled, `span` returns a shared no-op span.
+"""
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import tiktoken
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent
+from crewai.events.types.memory_events import (
+    MemoryQueryCompletedEvent,
+    MemoryRetrievalCompletedEvent,
+    MemorySaveCompletedEvent,
+)
+from crewai.events.types.tool_usage_events import ToolUsageFinishedEvent
+from crewai.hooks import register_before_llm_call_hook
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CHARS_PER_TOKEN = 4  # Estimate of the token counts when the tokenizer cannot be loaded (offline)
+
+
+@dataclass
+class Span:
+    """One timed stage of a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: float  # Epoch seconds
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration_ms: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+
+    def set(self, **attributes: Any) -> None:
+        """Sets attributes of the span (e.g. tokens_in, cache_hit)."""
+        self.attributes.update(attributes)
+
+    def to_record(self) -> dict[str, Any]:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class _NoopSpan:
+    """Span returned while tracing is disabled."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+# Id of the LLM call being made by the agent executor of the current context:
+_llm_call_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("llm_call_id", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class JsonlSink:
+    """
+    Appends the finished spans to a JSONL file (one span per line).
+
+    Args:
+        path: Path of the trace file (created with its directory)
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Line buffered, so `trace_summary.py` sees the spans of a running server:
+        self._file = self.path.open("a", encoding="utf-8", buffering=1)
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """
+    Records spans into a sink (None: tracing disabled).
+
+    Args:
+        sink: Destination of the finished spans, e.g. a JsonlSink
+    """
+
+    def __init__(self, sink: JsonlSink | None = None) -> None:
+        self.sink = sink
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    def start(self, name: str, parent: Span | None = None, **attributes: Any) -> Span:
+        """Starts a span (child of `parent`, or of the current span) without making it current."""
+        parent = parent or _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else _new_id(),
+            span_id=_new_id(),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+
+    def finish(self, span: Span, duration_ms: float | None = None) -> None:
+        """Writes a finished span to the sink (duration measured from its start when not given)."""
+        span.duration_ms = (time.time() - span.start) * 1000 if duration_ms is None else duration_ms
+        if self.sink is not None:
+            try:
+                self.sink.write(span.to_record())
+            except (OSError, ValueError) as error:  # A closed or full disk never fails a question
+                logger.warning(f"Span {span.name} not recorded: {error}")
+
+    def record(self, name: str, start: float, duration_ms: float, **attributes: Any) -> None:
+        """Records a span measured elsewhere (e.g. by a crewAI event), child of the current span."""
+        if self.sink is None:
+            return
+        span = self.start(name, **attributes)
+        span.start = start
+        self.finish(span, duration_ms)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+        """
+        Times the block as a span, current for the spans opened inside it.
+
+        Args:
+            name: Name of the stage (aggregated by `trace_summary.py`)
+            attributes: Initial attributes; more can be set with `span.set(...)`
+
+        Yields:
+            The span (a no-op span when tracing is disabled)
+        """
+        if self.sink is None:
+            yield _NOOP_SPAN
+            return
+        span = self.start(name, **attributes)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as error:
+            span.status = "error"
+            span.error = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Generators resumed in another context (e.g. a streamed answer in a thread pool):
+                pass
+            self.finish(span, (time.perf_counter() - started) * 1000)
+
+
+_tracer = Tracer()
+_listeners_installed = threading.Event()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attributes: Any) -> AbstractContextManager[Span | _NoopSpan]:
+    """Times a block as a span of the global tracer (see `Tracer.span`)."""
+    return _tracer.span(name, **attributes)
+
+
+def configure_tracing(path: Path | None) -> Tracer:
+    """
+    Enables the global tracer with a JSONL sink (None: disables it).
+
+    Args:
+        path: Path of the trace file
+
+    Returns:
+        The global tracer
+    """
+    if _tracer.sink is not None:
+        _tracer.sink.close()
+    _tracer.sink = JsonlSink(path) if path else None
+    if _tracer.sink is not None:
+        install_crewai_listeners()
+        logger.info(f"Tracing enabled: {path}")
+    return _tracer
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    """The tokenizer of the token counts, or None when it cannot be loaded (tiktoken downloads it once)."""
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, the traced token counts are estimated from the length: {e}")
+        return None
+
+
+def count_tokens(content: Any) -> int:
+    """Counts the tokens of LLM messages (str or list of {"role", "content"}) or of a response."""
+    if content is None:
+        return 0
+    if isinstance(content, list):
+        return sum(count_tokens(item.get("content") if isinstance(item, dict) else item) for item in content)
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(str(content)) // CHARS_PER_TOKEN)  # Rounded up: a non-empty text has at least one token
+    return len(encoding.encode(str(content), disallowed_special=()))
+
+
+def mark_llm_call(context: Any = None) -> None:
+    """`before_llm_call` hook: gives the next LLM call made in the current context its own id."""
+    _llm_call_id.set(_new_id())
+
+
+def install_crewai_listeners() -> None:
+    """Records the LLM calls, tool usages and memory operations of crewAI as spans (installed once)."""
+    if _listeners_installed.is_set():
+        return
+
+    # The started and the completed event of an LLM call may be handled in any order:
+    pending: dict[tuple, Any] = {}
+    pending_lock = threading.Lock()
+
+    def on_llm_event(source: Any, event: Any) -> None:
+        parent = _current_span.get()
+        # The call id tells apart the calls of one span; the rest keys the calls made outside an agent executor:
+        key = (_llm_call_id.get(), parent.span_id if parent else None, event.task_id, event.agent_id)
+        with pending_lock:
+            other = pending.pop(key, None)
+            if other is None:
+                pending[key] = event
+                return
+        started, ended = (other, event) if isinstance(other, LLMCallStartedEvent) else (event, other)
+        attributes = {"model": getattr(started, "model", None), "tokens_in": count_tokens(started.messages)}
+        if isinstance(ended, LLMCallFailedEvent):
+            attributes["error"] = ended.error
+        else:
+            attributes["tokens_out"] = count_tokens(ended.response)
+        duration_ms = (ended.timestamp - started.timestamp).total_seconds() * 1000
+        _tracer.record("llm.call", started.timestamp.timestamp(), duration_ms, **attributes)
+
+    def on_tool_finished(source: Any, event: Any) -> None:
+        duration_ms = (event.finished_at - event.started_at).total_seconds() * 1000
+        _tracer.record(f"tool.{event.tool_name}", event.started_at.timestamp(), duration_ms, cache_hit=event.from_cache)
+
+    def on_memory(name: str, duration_field: str):
+        def handler(source: Any, event: Any) -> None:
+            duration_ms = getattr(event, duration_field)
+            _tracer.record(name, event.timestamp.timestamp() - duration_ms / 1000, duration_ms)
+
+        return handler
+
+    register_before_llm_call_hook(mark_llm_call)
+    for event_type in (LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent):
+        crewai_event_bus.on(event_type)(on_llm_event)
+    crewai_event_bus.on(ToolUsageFinishedEvent)(on_tool_finished)
+    crewai_event_bus.on(MemoryQueryCompletedEvent)(on_memory("memory.query", "query_time_ms"))
+    crewai_event_bus.on(MemorySaveCompletedEvent)(on_memory("memory.save", "save_time_ms"))
+    crewai_event_bus.on(MemoryRetrievalCompletedEvent)(on_memory("memory.retrieval", "retrieval_time_ms"))
+    _listeners_installed.set()
@@ -15,12 +15,28 @@ Access: http://localhost:8000
 """
 
 import asyncio
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
 
 import uvicorn
-from application import ask_question  # Import the RAG agent from application.py
+from application import (  # Import the RAG agent from application.py
+    ask_question_stream,
+    close_session,
+    get_pre_router,
+    streaming_metrics,
+    warm_up,
+)
+from embedding_cache import embedding_cache_stats
 from fastapi import FastAPI
+from logging_config import get_logger, setup_logging
 from reactpy import component, hooks, html
 from reactpy.backend.fastapi import configure
+from scheduler import AgentScheduler, SchedulerBusyError
+
+logger = get_logger(__name__)
 
 # =======================
 # CSS STYLES (Dark Theme)
@@ -44,6 +60,58 @@ FONTS = {
 }
 
 
+# =========
+# STREAMING
+# =========
+# Fixed number of concurrent agent runs (sized to the LLM rate limits) and a bounded queue:
+scheduler = AgentScheduler(
+    workers=int(os.getenv("RAG_AGENT_WORKERS", "4")),
+    max_queue=int(os.getenv("RAG_AGENT_MAX_QUEUE", "32")),
+    max_per_client=1,
+)
+
+
+async def stream_answer(
+    question: str,
+    session_id: str,
+    on_queue_position: Callable[[int], None] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Run `ask_question_stream` on the agent scheduler and yield its tokens in the event loop.
+
+    Raises SchedulerBusyError right away when the server is overloaded. While the
+    question waits for a worker, `on_queue_position` receives its position
+    (1 = next in line), and 0 once it is running.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for token in ask_question_stream(question, session_id):
+                loop.call_soon_threadsafe(queue.put_nowait, token)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    job = scheduler.submit(session_id, produce)
+    while True:
+        try:
+            item = await asyncio.wait_for(queue.get(), timeout=0.5)
+        except TimeoutError:
+            if on_queue_position is not None:
+                on_queue_position(0 if job.started.is_set() else scheduler.position(job) + 1)
+            continue
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await asyncio.wrap_future(job.future)
+
+
 # ==========
 # COMPONENTS
 # ==========
@@ -100,7 +168,7 @@ def chat_message(role: str, content: str):
 
 
 @component
-def loading_indicator():
+def loading_indicator(text: str = "Processing your question..."):
     """Animated loading indicator."""
     container_style = {
         "display": "flex",
@@ -136,7 +204,7 @@ def loading_indicator():
                 },
                 "Assistant",
             ),
-            html.div("Processing your question..."),
+            html.div(text),
         ),
     )
 
@@ -344,6 +412,15 @@ def chat_app():
     messages, set_messages = hooks.use_state([])
     is_loading, set_is_loading = hooks.use_state(False)
     pending_question, set_pending_question = hooks.use_state(None)
+    streaming_answer, set_streaming_answer = hooks.use_state(None)
+    queue_position, set_queue_position = hooks.use_state(0)
+    # Each chat keeps its own warm Crew in the session engine:
+    session_id, _ = hooks.use_state(lambda: uuid.uuid4().hex)
+
+    @hooks.use_effect(dependencies=[])
+    def release_session():
+        """Release the session Crew when the chat is closed."""
+        return lambda: close_session(session_id)
 
     @hooks.use_effect(dependencies=[pending_question])
     async def process_pending_question():
@@ -351,17 +428,26 @@ def chat_app():
         if pending_question is None:
             return
 
+        answer = ""
+        last_render = 0.0
         try:
-            # Execute the ask_question function in a separate thread:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, ask_question, pending_question)
-            response = str(result)
+            # The agent runs in a separate thread and its tokens are shown as they arrive:
+            async for token in stream_answer(pending_question, session_id, set_queue_position):
+                answer += token
+                # Re-render at most every 50 ms instead of on every token:
+                if time.monotonic() - last_render >= 0.05:
+                    set_streaming_answer(answer)
+                    last_render = time.monotonic()
+        except SchedulerBusyError as e:
+            answer = f"⏳ {e} Please try again in a few seconds."
         except Exception as e:
-            response = f"Error processing question: {e!s}"
+            answer = f"Error processing question: {e!s}"
 
         # Add the assistant's response:
-        assistant_message = {"role": "assistant", "content": response}
+        assistant_message = {"role": "assistant", "content": answer}
         set_messages(lambda prev: [*prev, assistant_message])
+        set_streaming_answer(None)
+        set_queue_position(0)
         set_is_loading(False)
         set_pending_question(None)
 
@@ -447,7 +533,20 @@ def chat_app():
         html.div(
             {"style": messages_container_style},
             welcome_message() if not messages else message_elements,
-            loading_indicator() if is_loading else None,
+            (
+                chat_message(role="assistant", content=streaming_answer, key="streaming")
+                if streaming_answer is not None
+                else None
+            ),
+            (
+                loading_indicator(
+                    f"Waiting in queue (position {queue_position})..."
+                    if queue_position
+                    else "Processing your question..."
+                )
+                if is_loading and streaming_answer is None
+                else None
+            ),
         ),
         chat_input(on_send=handle_send, is_loading=is_loading),
     )
@@ -456,11 +555,57 @@ def chat_app():
 # ======================
 # EXECUTION WITH FASTAPI
 # ======================
+async def _warm_up_in_background() -> None:
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        # The first question retries the build and shows the error in the chat:
+        logger.exception("Warm-up of the RAG agent failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure logging and warm up the RAG agent without delaying the server startup."""
+    setup_logging()
+    # The server accepts connections right away; questions sent before the
+    # warm-up ends wait for the components being built:
+    warm_up_task = asyncio.create_task(_warm_up_in_background())
+    yield
+    warm_up_task.cancel()
+
+
 app = FastAPI(
     title="Agentic RAG API with CrewAI",
     description="This is a RAG agent that analyzes the professional curriculum and answers questions about it.",
     version="1.0.0",
+    lifespan=lifespan,
 )
+
+
+@app.get("/stats/embedding-cache")
+def embedding_cache_stats_endpoint() -> dict:
+    """Hit/miss counters of the embedding cache (to follow the hit rate under real traffic)."""
+    return embedding_cache_stats()
+
+
+@app.get("/stats/streaming")
+def streaming_stats_endpoint() -> dict:
+    """Time-to-first-token and total time of the streamed answers."""
+    return streaming_metrics.summary()
+
+
+@app.get("/stats/pre-router")
+def pre_router_stats_endpoint() -> dict:
+    """Questions answered without the agent (greetings, farewells, out of scope) vs agent runs."""
+    return get_pre_router().stats()
+
+
+@app.get("/stats/scheduler")
+def scheduler_stats_endpoint() -> dict:
+    """Queue depth, wait time and run time of the agent scheduler (to size the deployment)."""
+    return scheduler.stats()
+
+
 configure(app, chat_app)
 
 
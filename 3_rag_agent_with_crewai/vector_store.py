@@ -0,0 +1,290 @@
+#! /usr/bin/env python3
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script vector_store.py
+======================
+This script contains thin wrappers around the vector stores of the knowledge
+base. They give the ingestion layer direct control over which chunks are
+written (upsert) or removed (delete), instead of re-adding whole files, and
+the retrieval layer a common `search` method:
+
+- `ChromaVectorStore`: the ChromaDB collection used by the RagTool
+- `LocalVectorStore`: the in-process memory-mapped index of `local_index.py`
+
+`open_vector_store` picks the store from `config["vectordb"]["provider"]`.
+
+Both stores accept `where` (metadata field -> value, e.g. {"document_id":
+"cv_eddy"}) to scope a search to one document or tenant of a shared
+collection; the filter is applied by the index itself, before the top-k.
+"""
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from crewai.rag.config.utils import get_rag_client
+from crewai.rag.embeddings.factory import build_embedder
+from crewai.rag.factory import create_client
+from crewai_tools import RagTool
+from local_index import LocalVectorIndex
+
+LOCAL_PROVIDER = "local"
+
+
+@dataclass
+class SearchHit:
+    """Chunk returned by a similarity search."""
+
+    id: str
+    document: str
+    metadata: dict[str, Any]
+    similarity: float  # Dense similarity on the RagTool scale (`rag_tool_score`), 0.0 when only BM25 found the chunk
+    lexical_score: float | None = None  # BM25 score, when the lexical index found the chunk
+
+
+def rag_tool_score(cosine: float) -> float:
+    """
+    Maps a cosine similarity to the [0, 1] score of the RagTool (1 - 0.5 * cosine distance).
+
+    Every store reports this score, so one `similarity_threshold` means the
+    same thing for the RagTool, the KnowledgeBaseTool and the pre-router.
+    """
+    return max(0.0, min(1.0, 0.5 * (1.0 + cosine)))
+
+
+def chroma_where(where: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Converts {field: value} equalities into a ChromaDB `where` clause."""
+    if not where:
+        return None
+    if len(where) == 1:
+        return dict(where)
+    return {"$and": [{field: value} for field, value in where.items()]}
+
+
+class ChromaVectorStore:
+    """
+    Chunk-level access to a ChromaDB collection.
+
+    Args:
+        collection: ChromaDB collection (created with the embedding function
+            of the RagTool, so documents are embedded exactly like `RagTool.add`)
+    """
+
+    def __init__(self, collection: Any) -> None:
+        self.collection = collection
+
+    @classmethod
+    def from_rag_tool(cls, rag_tool: RagTool, collection_name: str) -> "ChromaVectorStore":
+        """
+        Opens the collection used by a RagTool.
+
+        Args:
+            rag_tool: RagTool already configured with the ChromaDB provider
+            collection_name: Name of the collection in ChromaDB
+
+        Returns:
+            ChromaVectorStore bound to the same collection and embedding function
+        """
+        # A RAG client of crewAI built from the same provider config wraps the ChromaDB client
+        # (shared by path inside the process) and the embedding function of the RagTool:
+        rag_client = create_client(rag_tool.adapter.config) if rag_tool.adapter.config else get_rag_client()
+        collection = rag_client.client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=rag_client.embedding_function,
+        )
+        return cls(collection)
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], collection_name: str) -> "ChromaVectorStore":
+        """Opens a collection with the same client and embedding function a RagTool would use."""
+        return cls.from_rag_tool(RagTool(collection_name=collection_name, config=config), collection_name)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[dict[str, Any]] | None = None,
+        embeddings: Sequence[Sequence[float]] | None = None,
+    ) -> None:
+        """Inserts or replaces chunks (embedded by the collection when `embeddings` is None)."""
+        if not ids:
+            return
+        self.collection.upsert(
+            ids=list(ids),
+            documents=list(documents),
+            metadatas=list(metadatas) if metadatas is not None else None,
+            embeddings=list(embeddings) if embeddings is not None else None,
+        )
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[dict[str, Any]]) -> None:
+        """Replaces the metadata of existing chunks without embedding them again."""
+        if ids:
+            self.collection.update(ids=list(ids), metadatas=list(metadatas))
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Removes chunks by id."""
+        if ids:
+            self.collection.delete(ids=list(ids))
+
+    def existing_ids(self, ids: Sequence[str]) -> set[str]:
+        """Returns which of the given ids are already stored."""
+        if not ids:
+            return set()
+        return set(self.collection.get(ids=list(ids), include=[])["ids"])
+
+    def clear(self) -> None:
+        """Removes every chunk of the collection."""
+        ids = self.collection.get(include=[])["ids"]
+        self.delete(ids)
+
+    def count(self) -> int:
+        """Returns the number of chunks stored in the collection."""
+        return self.collection.count()
+
+    def _to_similarity(self, distance: float) -> float:
+        """
+        Converts a ChromaDB distance with the space of the collection into the
+        score of the RagTool, so the values are comparable with `similarity_threshold`.
+        """
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        # Embeddings are unit vectors, so the squared L2 distance is 2 - 2 * cosine:
+        return rag_tool_score(1.0 - distance * (0.5 if space == "l2" else 1.0))
+
+    def similarities(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[float]:
+        """Returns the similarities of the `limit` closest chunks to a query (best first)."""
+        if not self.collection.count():
+            return []
+        result = self.collection.query(
+            query_texts=[query], n_results=limit, where=chroma_where(where), include=["distances"]
+        )
+        return [self._to_similarity(distance) for distance in result["distances"][0]]
+
+    def search(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[SearchHit]:
+        """Returns the `limit` closest chunks to a query (best first), among the chunks matching `where`."""
+        if not self.collection.count():
+            return []
+        result = self.collection.query(
+            query_texts=[query],
+            n_results=limit,
+            where=chroma_where(where),
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            SearchHit(chunk_id, document, metadata or {}, self._to_similarity(distance))
+            for chunk_id, document, metadata, distance in zip(
+                result["ids"][0],
+                result["documents"][0],
+                result["metadatas"][0],
+                result["distances"][0],
+                strict=True,
+            )
+        ]
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        """Yields (id, document, metadata) of every chunk of the collection."""
+        offset = 0
+        while True:
+            batch = self.collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                return
+            rows = zip(batch["ids"], batch["documents"], batch["metadatas"], strict=True)
+            for chunk_id, document, metadata in rows:
+                yield chunk_id, document, metadata or {}
+            offset += len(batch["ids"])
+
+
+class LocalVectorStore:
+    """
+    Chunk-level access to a `LocalVectorIndex` (same interface as ChromaVectorStore).
+
+    Args:
+        index: Memory-mapped vector index
+        embed: Embedding function (list of texts -> list of vectors)
+    """
+
+    def __init__(self, index: LocalVectorIndex, embed: Callable[[list[str]], Sequence[Sequence[float]]]) -> None:
+        self.index = index
+        self.embed = embed
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], collection_name: str) -> "LocalVectorStore":
+        """
+        Opens the local index of a collection.
+
+        The vectordb config accepts `path` (root directory of the indexes),
+        `exact_threshold`, `nprobe`, `quantization` and `rescore` (see `LocalVectorIndex`).
+        """
+        options = config["vectordb"].get("config", {})
+        index = LocalVectorIndex(
+            Path(options["path"]) / collection_name,
+            exact_threshold=options.get("exact_threshold", 20_000),
+            nprobe=options.get("nprobe", 16),
+            quantization=options.get("quantization"),
+            rescore=options.get("rescore", 8),
+        )
+        return cls(index, build_embedder(config["embedding_model"]))
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[dict[str, Any]] | None = None,
+        embeddings: Sequence[Sequence[float]] | None = None,
+    ) -> None:
+        """Inserts or replaces chunks (embedded here when `embeddings` is None)."""
+        if not ids:
+            return
+        if embeddings is None:
+            embeddings = self.embed(list(documents))
+        self.index.upsert(ids, embeddings, documents, metadatas)
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[dict[str, Any]]) -> None:
+        """Replaces the metadata of existing chunks without embedding them again."""
+        if ids:
+            self.index.update_metadata(ids, metadatas)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Removes chunks by id."""
+        if ids:
+            self.index.delete(ids)
+
+    def existing_ids(self, ids: Sequence[str]) -> set[str]:
+        """Returns which of the given ids are already stored."""
+        return self.index.existing_ids(ids) if ids else set()
+
+    def clear(self) -> None:
+        """Removes every chunk of the index."""
+        self.index.clear()
+
+    def count(self) -> int:
+        """Returns the number of chunks stored in the index."""
+        return len(self.index)
+
+    def similarities(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[float]:
+        """Returns the similarities of the `limit` closest chunks to a query (best first)."""
+        if not len(self.index):
+            return []
+        rows = self.index.search_rows(self.embed([query])[0], limit, where=where)
+        return [rag_tool_score(cosine) for _, cosine in rows]
+
+    def search(self, query: str, limit: int, where: dict[str, Any] | None = None) -> list[SearchHit]:
+        """Returns the `limit` closest chunks to a query (best first), among the chunks matching `where`."""
+        if not len(self.index):
+            return []
+        return [
+            SearchHit(record["id"], record["document"], record["metadata"], rag_tool_score(cosine))
+            for record, cosine in self.index.search(self.embed([query])[0], limit, where=where)
+        ]
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        """Yields (id, document, metadata) of every chunk of the index."""
+        for record in self.index.iter_records():
+            yield record["id"], record["document"], record["metadata"]
+
+
+def open_vector_store(config: dict[str, Any], collection_name: str) -> ChromaVectorStore | LocalVectorStore:
+    """Opens the store of a collection with the provider selected in the RagTool config."""
+    if config["vectordb"]["provider"] == LOCAL_PROVIDER:
+        return LocalVectorStore.from_config(config, collection_name)
+    return ChromaVectorStore.from_config(config, collection_name)
@@ -0,0 +1,207 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script batch.py
+===============
+Modo batch (sem interação) do `GuideCreatorFlow`: gera vários guias a partir
+de um manifesto com os pares (topic, audience_level).
+
+- manifesto JSONL (um objeto por linha) ou CSV (com cabeçalho), com as
+  colunas `topic` e `audience_level` e, opcionalmente, `output_dir`
+- os guias rodam ao mesmo tempo (`--max-guides`), e todas as chamadas ao
+  LLM do processo dividem um limite global de concorrência e de chamadas
+  por minuto (llm_limiter.py)
+- cada guia é salvo no seu próprio diretório (outline, guia e relatório de
+  tokens), e cada execução tem o seu checkpoint (`resume <id>` retoma um
+  guia que falhou)
+- no fim, o relatório `batch_report.json` traz a vazão do lote e o custo de
+  cada guia
+
+Run
+===
+uv run batch guides.jsonl --max-guides 3 --max-llm-calls 8 --rpm 300
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from guide_creator_flow.llm_limiter import install_llm_limiter
+from guide_creator_flow.main import AUDIENCE_LEVELS, GuideCreatorFlow, checkpoint_store
+
+# Preço por milhão de tokens (padrão: gpt-4o-mini, o modelo do outline, das crews e dos resumos):
+PRICE_INPUT_PER_1M = float(os.getenv("GUIDE_PRICE_INPUT_PER_1M", "0.15"))
+PRICE_OUTPUT_PER_1M = float(os.getenv("GUIDE_PRICE_OUTPUT_PER_1M", "0.60"))
+
+
+def _slug(text: str, max_length: int = 40) -> str:
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-")[:max_length].rstrip("-") or "guia"
+
+
+def load_manifest(path: str, output_dir: str = "output/batch") -> list[dict[str, str]]:
+    """
+    Lê o manifesto de guias (JSONL ou CSV, pela extensão).
+
+    Args:
+        path: Caminho do manifesto
+        output_dir: Diretório base dos guias sem `output_dir` no manifesto
+
+    Returns:
+        Os inputs do fluxo de cada guia (topic, audience_level, output_dir), na ordem do manifesto
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for position, row in enumerate(rows, start=1):
+        topic = (row.get("topic") or "").strip()
+        audience_level = (row.get("audience_level") or "").strip().lower()
+        if not topic:
+            raise ValueError(f"{path}, guia {position}: 'topic' vazio")
+        if audience_level not in AUDIENCE_LEVELS:
+            raise ValueError(
+                f"{path}, guia {position}: público-alvo inválido {audience_level!r} "
+                f"(esperado: {', '.join(AUDIENCE_LEVELS)})"
+            )
+        directory = row.get("output_dir") or os.path.join(output_dir, f"{position:03d}-{_slug(topic)}")
+        jobs.append({"topic": topic, "audience_level": audience_level, "output_dir": directory})
+    return jobs
+
+
+def guide_cost(usage: dict[str, int]) -> float:
+    """Custo em dólares dos tokens de um guia."""
+    return (usage["prompt_tokens"] * PRICE_INPUT_PER_1M + usage["completion_tokens"] * PRICE_OUTPUT_PER_1M) / 1e6
+
+
+def run_guide(inputs: dict[str, str], store) -> dict[str, Any]:
+    """Gera um guia (em uma thread do lote) e retorna o seu resultado, inclusive quando falha."""
+    flow = GuideCreatorFlow(persistence=store)
+    start = time.perf_counter()
+    error = None
+    try:
+        flow.kickoff(inputs=inputs)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"❌ Guia {inputs['topic']!r} falhou: {error}")
+    usage = flow.llm_usage()
+    return {
+        **inputs,
+        "run_id": flow.state.id,
+        "status": "error" if error else "ok",
+        "error": error,
+        "seconds": round(time.perf_counter() - start, 2),
+        "sections": len(flow.state.sections_content),
+        **usage,
+        "cost_usd": round(guide_cost(usage), 6),
+    }
+
+
+def run_batch(jobs: list[dict[str, str]], max_guides: int = 2) -> list[dict[str, Any]]:
+    """
+    Gera os guias do manifesto, até `max_guides` ao mesmo tempo.
+
+    Args:
+        jobs: Inputs de cada guia (ver `load_manifest`)
+        max_guides: Número máximo de guias gerados ao mesmo tempo
+
+    Returns:
+        O resultado de cada guia, na ordem do manifesto
+    """
+    store = checkpoint_store()
+    with ThreadPoolExecutor(max_workers=max(1, max_guides), thread_name_prefix="guide") as executor:
+        return list(executor.map(lambda inputs: run_guide(inputs, store), jobs))
+
+
+def batch_report(results: list[dict[str, Any]], seconds: float, limiter_stats: dict[str, float]) -> dict[str, Any]:
+    """Vazão do lote e custo total e por guia."""
+    done = [result for result in results if result["status"] == "ok"]
+    sections = sum(result["sections"] for result in results)
+    tokens = sum(result["prompt_tokens"] + result["completion_tokens"] for result in results)
+    cost = sum(result["cost_usd"] for result in results)
+    return {
+        "guides": len(results),
+        "succeeded": len(done),
+        "failed": len(results) - len(done),
+        "seconds": round(seconds, 2),
+        "guides_per_hour": round(len(done) / seconds * 3600, 2) if seconds else 0.0,
+        "sections_per_minute": round(sections / seconds * 60, 2) if seconds else 0.0,
+        "tokens_per_second": round(tokens / seconds, 1) if seconds else 0.0,
+        "total_cost_usd": round(cost, 6),
+        "cost_per_guide_usd": round(cost / len(results), 6) if results else 0.0,
+        "prices_per_1m": {"input": PRICE_INPUT_PER_1M, "output": PRICE_OUTPUT_PER_1M},
+        "llm_limiter": limiter_stats,
+        "results": results,
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"\n{'guia':<40} {'status':>6} {'seções':>6} {'tempo s':>8} {'tok in':>8} {'tok out':>8} {'custo $':>9}")
+    for result in report["results"]:
+        print(
+            f"{result['topic'][:40]:<40} {result['status']:>6} {result['sections']:>6} {result['seconds']:>8.1f} "
+            f"{result['prompt_tokens']:>8} {result['completion_tokens']:>8} {result['cost_usd']:>9.4f}"
+        )
+    print(
+        f"\n{report['succeeded']}/{report['guides']} guias em {report['seconds']:.1f} s: "
+        f"{report['guides_per_hour']} guias/h, {report['sections_per_minute']} seções/min, "
+        f"{report['tokens_per_second']} tokens/s"
+    )
+    print(f"Custo total: ${report['total_cost_usd']:.4f} (${report['cost_per_guide_usd']:.4f} por guia)")
+    print(
+        f"Chamadas ao LLM: {report['llm_limiter']['calls']}, "
+        f"espera total pelo limite: {report['llm_limiter']['waited_seconds']:.1f} s"
+    )
+    for result in report["results"]:
+        if result["status"] != "ok":
+            print(f"Para retomar {result['topic']!r}: resume {result['run_id']}")
+
+
+def main():
+    """Gera os guias de um manifesto sem interação"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="Manifesto JSONL ou CSV com topic e audience_level")
+    parser.add_argument("--output-dir", default="output/batch", help="Diretório base dos guias e do relatório")
+    parser.add_argument(
+        "--max-guides", type=int, default=int(os.getenv("GUIDE_BATCH_MAX_GUIDES", "2")),
+        help="Guias gerados ao mesmo tempo",
+    )
+    parser.add_argument(
+        "--max-llm-calls", type=int, default=int(os.getenv("GUIDE_LLM_MAX_CONCURRENCY", "8")),
+        help="Chamadas ao LLM ao mesmo tempo, somando todos os guias (0: sem limite)",
+    )
+    parser.add_argument(
+        "--rpm", type=int, default=int(os.getenv("GUIDE_LLM_RPM", "0")),
+        help="Chamadas ao LLM por minuto, somando todos os guias (0: sem limite)",
+    )
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest, args.output_dir)
+    print(f"\n=== Batch: {len(jobs)} guias, até {args.max_guides} ao mesmo tempo ===\n")
+    limiter = install_llm_limiter(args.max_llm_calls, args.rpm)
+
+    start = time.perf_counter()
+    results = run_batch(jobs, args.max_guides)
+    report = batch_report(results, time.perf_counter() - start, limiter.stats())
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    report_path = os.path.join(args.output_dir, "batch_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"\nRelatório salvo em {report_path}")
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
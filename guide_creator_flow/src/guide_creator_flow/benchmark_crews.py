@@ -0,0 +1,98 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script benchmark_crews.py
+=========================
+Micro-benchmark do custo de montar as crews antes de um kickoff (nenhuma
+chamada ao LLM é feita):
+
+- "yaml": leitura de agents.yaml e tasks.yaml com `yaml.safe_load`, feita
+  pelo `@CrewBase` a cada crew montada (o pool só a repete quando monta uma
+  crew nova)
+- "cold": `ContentCrew().crew()` a cada kickoff (o comportamento anterior)
+- "warm": `CrewFactory.checkout()`, que reutiliza a crew e clona só as tasks
+
+Run
+===
+uv run benchmark_crews --iterations 50
+"""
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+
+import yaml
+
+from guide_creator_flow.crew_factory import CrewFactory
+from guide_creator_flow.crews.content_crew.content_crew import ContentCrew
+from guide_creator_flow.crews.poem_crew.poem_crew import PoemCrew
+
+CREWS = {"content": ContentCrew, "poem": PoemCrew}
+
+
+def _timed(run: Callable[[], object], iterations: int) -> dict[str, float]:
+    """Mediana, p95 e média (ms) de `iterations` execuções de `run`."""
+    durations: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(durations), 3),
+    }
+
+
+def benchmark_crew(crew_class, iterations: int) -> dict[str, dict[str, float]]:
+    """Mede a leitura dos YAML e a montagem da crew, a frio e pelo pool."""
+    paths = [
+        crew_class.base_directory / crew_class.original_agents_config_path,
+        crew_class.base_directory / crew_class.original_tasks_config_path,
+    ]
+
+    def parse_yaml():
+        for path in paths:
+            with open(path, encoding="utf-8") as file:
+                yaml.safe_load(file)
+
+    def checkout():
+        with factory.checkout():
+            pass
+
+    factory = CrewFactory(crew_class)
+    checkout()  # A primeira crew do pool é montada fora da medição
+    return {
+        "yaml_parse": _timed(parse_yaml, iterations),
+        "cold_build": _timed(lambda: crew_class().crew(), iterations),
+        "warm_checkout": _timed(checkout, iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30, help="Repetições de cada medição")
+    parser.add_argument("--crew", choices=sorted(CREWS), nargs="+", default=sorted(CREWS), help="Crews medidas")
+    parser.add_argument("--output", default=None, help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.crew:
+        results[name] = benchmark_crew(CREWS[name], args.iterations)
+        print(f"\n=== {name} ({args.iterations} iterações) ===")
+        print(f"{'medição':<15} {'p50 ms':>9} {'p95 ms':>9} {'média ms':>9}")
+        for measure, stats in results[name].items():
+            print(f"{measure:<15} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['mean_ms']:>9.3f}")
+        cold, warm = results[name]["cold_build"]["p50_ms"], results[name]["warm_checkout"]["p50_ms"]
+        print(f"Montagem pelo pool: {cold / warm:.1f}x mais rápida (p50)" if warm else "")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script checkpoint.py
+====================
+Checkpoints do `GuideCreatorFlow` em SQLite, por id de execução (o `id` do
+estado do fluxo).
+
+O estado é salvo depois de cada etapa e de cada seção concluída, então uma
+execução interrompida (erro, limite de taxa da API, Ctrl+C) é retomada com
+`resume <id>` sem pagar de novo pelas seções já escritas.
+
+A persistência SQLite do crewAI (`@persist`) só salva o estado no fim de
+cada método do fluxo, e todas as seções são escritas por um único método;
+por isso o fluxo chama `save_state` diretamente. Esta classe guarda apenas
+o último estado de cada execução e serializa os modelos aninhados (outline).
+"""
+import json
+import sqlite3
+from datetime import UTC, datetime
+from typing import Any
+
+from crewai.flow.persistence import SQLiteFlowPersistence
+from pydantic import BaseModel
+
+DEFAULT_CHECKPOINT_DB = "output/guide_checkpoints.db"
+
+
+class GuideCheckpointStore(SQLiteFlowPersistence):
+    """Persistência SQLite do crewAI que mantém só o último checkpoint de cada execução."""
+
+    def save_state(
+        self,
+        flow_uuid: str,
+        method_name: str,
+        state_data: dict[str, Any] | BaseModel,
+    ) -> None:
+        """Salva o estado (substituindo o checkpoint anterior da mesma execução)."""
+        if isinstance(state_data, BaseModel):
+            state_data = state_data.model_dump(mode="json")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM flow_states WHERE flow_uuid = ?", (flow_uuid,))
+            conn.execute(
+                "INSERT INTO flow_states (flow_uuid, method_name, timestamp, state_json) VALUES (?, ?, ?, ?)",
+                (flow_uuid, method_name, datetime.now(UTC).isoformat(), json.dumps(state_data)),
+            )
+
+    def runs(self, limit: int = 20) -> list[dict[str, str]]:
+        """Lista as execuções salvas, da mais recente para a mais antiga."""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT flow_uuid, method_name, timestamp FROM flow_states ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"id": run_id, "step": step, "timestamp": timestamp} for run_id, step, timestamp in rows]
+
+    def latest_run_id(self) -> str | None:
+        """Retorna o id da execução salva mais recentemente (None se não há nenhuma)."""
+        runs = self.runs(limit=1)
+        return runs[0]["id"] if runs else None
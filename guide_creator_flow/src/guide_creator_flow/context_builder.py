@@ -0,0 +1,140 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script context_builder.py
+=========================
+Contexto das seções anteriores ("previous_sections") dado às tarefas de
+escrita e de revisão de uma seção.
+
+Com o texto completo de todas as seções anteriores, o prompt cresce a cada
+seção (tokens quadráticos no número de seções). Aqui o contexto é montado
+dentro de um orçamento de tokens, em um de três modos:
+
+- "summary": resumo de cada seção, gerado uma única vez quando ela termina
+  e guardado no estado do fluxo (padrão)
+- "titles": apenas os títulos das seções
+- "full": o texto completo (comportamento anterior)
+
+As seções mais recentes têm prioridade: quando o orçamento acaba, as mais
+antigas aparecem apenas pelo título.
+"""
+from functools import lru_cache
+
+import tiktoken
+
+try:
+    from litellm import token_counter
+except ImportError:  # Instalado com o crewAI 0.x; as versões 1.x não dependem mais do litellm
+    token_counter = None
+
+CONTEXT_SUMMARY = "summary"
+CONTEXT_TITLES = "titles"
+CONTEXT_FULL = "full"
+CONTEXT_MODES = (CONTEXT_SUMMARY, CONTEXT_TITLES, CONTEXT_FULL)
+
+# "previous_sections" aparece nas duas tarefas da ContentCrew (escrita e revisão):
+PROMPTS_PER_SECTION = 2
+
+CONTEXT_HEADER = "# Seções escritas anteriormente\n\n"
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Conta os tokens de um texto com o tokenizador do modelo."""
+    if not text:
+        return 0
+    if token_counter is not None:
+        return token_counter(model=model, text=text)
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> tiktoken.Encoding:
+    """Tokenizador do modelo (sem o litellm), com o mesmo critério do `token_counter` do litellm."""
+    name = model.split("/")[-1]
+    if "gpt-4o" in name:
+        return tiktoken.get_encoding("o200k_base")
+    try:
+        return tiktoken.encoding_for_model(name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def summarize_section(llm, title: str, content: str, max_words: int = 120) -> str:
+    """
+    Resume uma seção escrita, para o contexto das seções seguintes.
+
+    Args:
+        llm: LLM do crewAI usado para o resumo (ex.: gpt-4o-mini)
+        title: Título da seção
+        content: Texto completo (Markdown) da seção
+        max_words: Tamanho máximo do resumo
+
+    Returns:
+        Resumo com os conceitos explicados e os termos definidos na seção
+    """
+    messages = [
+        {"role": "system", "content": "Você resume seções de guias educacionais de forma fiel e concisa."},
+        {"role": "user", "content": f"""
+        Resuma a seção "{title}" abaixo em no máximo {max_words} palavras.
+        Liste os conceitos explicados, os termos definidos e os exemplos usados,
+        para que as próximas seções possam construir sobre eles sem repeti-los.
+
+        {content}
+        """},
+    ]
+    return llm.call(messages=messages).strip()
+
+
+def _entry(title: str, text: str | None) -> str:
+    return f"## {title}\n\n{text}\n\n" if text else f"## {title}\n\n"
+
+
+def build_context(
+    titles: list[str],
+    contents: dict[str, str],
+    summaries: dict[str, str],
+    mode: str = CONTEXT_SUMMARY,
+    token_budget: int = 1500,
+) -> str:
+    """
+    Monta o contexto das seções `titles` dentro de um orçamento de tokens.
+
+    Args:
+        titles: Seções lidas pela seção a escrever, na ordem do guia
+        contents: Texto completo de cada seção concluída
+        summaries: Resumo de cada seção concluída (modo "summary")
+        mode: "summary", "titles" ou "full"
+        token_budget: Máximo de tokens do contexto (0: sem limite)
+
+    Returns:
+        O texto de "previous_sections"
+    """
+    if mode not in CONTEXT_MODES:
+        raise ValueError(f"Modo de contexto desconhecido: {mode!r} (esperado: {', '.join(CONTEXT_MODES)})")
+
+    used = count_tokens(CONTEXT_HEADER)
+    entries: dict[str, str] = {}
+    # Da seção mais recente para a mais antiga; cada uma cai para um nível menor quando não cabe:
+    for title in reversed(titles):
+        levels = []
+        if mode == CONTEXT_FULL and contents.get(title):
+            levels.append(contents[title])
+        if mode in (CONTEXT_FULL, CONTEXT_SUMMARY) and summaries.get(title):
+            levels.append(summaries[title])
+        levels.append(None)  # Apenas o título
+        for text in levels:
+            entry = _entry(title, text)
+            tokens = count_tokens(entry)
+            if not token_budget or used + tokens <= token_budget:
+                break
+        else:
+            break  # Nem o título cabe mais: as seções mais antigas ficam de fora
+        entries[title] = entry
+        used += tokens
+
+    return CONTEXT_HEADER + "".join(entries[title] for title in titles if title in entries)
+
+
+def full_context(titles: list[str], contents: dict[str, str]) -> str:
+    """Contexto com o texto completo de todas as seções, sem orçamento (referência do relatório)."""
+    return CONTEXT_HEADER + "".join(_entry(title, contents.get(title, "")) for title in titles)
@@ -0,0 +1,133 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script crew_factory.py
+======================
+Fábrica de crews `@CrewBase` reutilizáveis entre kickoffs.
+
+`ContentCrew().crew()` lê e interpreta de novo `config/agents.yaml` e
+`config/tasks.yaml` e recria os agentes (e os seus LLMs) a cada seção. Aqui:
+
+- as crews prontas (agentes, LLMs, tasks de referência) ficam em um pool e
+  são reutilizadas: os YAML só são lidos pelo `@CrewBase` quando o pool
+  monta uma crew nova
+- cada crew guarda o mtime dos YAML com que foi montada (uma edição do YAML
+  é vista no próximo kickoff)
+- a cada kickoff, apenas as tasks são clonadas das tasks de referência (que
+  nunca rodam) e os contadores de tokens são zerados: o do agente (crewAI
+  0.x) e o do LLM do agente (crewAI 1.x, lido por
+  `Crew.calculate_usage_metrics`; o executor do agente, reutilizado entre
+  kickoffs, usa o mesmo LLM)
+
+Os agentes guardam estado da execução (executor, crew atual), então uma
+crew do pool atende um kickoff por vez: kickoffs ao mesmo tempo (seções em
+paralelo) recebem crews diferentes, e o pool cresce até o pico de kickoffs
+simultâneos.
+"""
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from crewai import Crew, Task
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+
+
+@dataclass
+class _WarmCrew:
+    """Crew pronta do pool, com as tasks de referência (nunca executadas) e os mtimes dos YAML."""
+
+    crew: Crew
+    templates: list[Task]
+    config_mtimes: tuple[float, ...]
+
+
+def _reset_llm_usage(llm: Any) -> None:
+    """Zera os contadores de uso de um LLM do crewAI 1.x (o LLM do 0.x não tem contadores)."""
+    usage = getattr(llm, "_token_usage", None)
+    if isinstance(usage, dict):
+        llm._token_usage = dict.fromkeys(usage, 0)
+
+
+class CrewFactory:
+    """
+    Pool de crews prontas de uma classe `@CrewBase`.
+
+    Args:
+        crew_class: Classe decorada com `@CrewBase`
+        max_idle: Máximo de crews guardadas no pool entre os kickoffs
+    """
+
+    def __init__(self, crew_class, max_idle: int = 8) -> None:
+        self.crew_class = crew_class
+        self.max_idle = max_idle
+        self._idle: list[_WarmCrew] = []
+        self._lock = threading.Lock()
+        self._built = 0
+        self._reused = 0
+
+    def _config_paths(self) -> list[Path]:
+        return [
+            self.crew_class.base_directory / path
+            for path in (self.crew_class.original_agents_config_path, self.crew_class.original_tasks_config_path)
+            if isinstance(path, str)
+        ]
+
+    def _config_mtimes(self) -> tuple[float, ...]:
+        return tuple(os.path.getmtime(path) for path in self._config_paths() if path.exists())
+
+    def _build(self) -> _WarmCrew:
+        config_mtimes = self._config_mtimes()
+        crew = self.crew_class().crew()
+        with self._lock:
+            self._built += 1
+        return _WarmCrew(crew=crew, templates=list(crew.tasks), config_mtimes=config_mtimes)
+
+    @contextmanager
+    def checkout(self) -> Iterator[Crew]:
+        """
+        Empresta uma crew do pool (ou cria uma nova) com tasks novas, para um kickoff.
+
+        Yields:
+            A crew, de uso exclusivo até o fim do bloco
+        """
+        config_mtimes = self._config_mtimes()
+        warm = None
+        with self._lock:
+            # Crews criadas com um YAML que mudou desde então são descartadas:
+            self._idle = [idle for idle in self._idle if idle.config_mtimes == config_mtimes]
+            if self._idle:
+                warm = self._idle.pop()
+                self._reused += 1
+        if warm is None:
+            warm = self._build()
+
+        # Só o estado mutável de um kickoff é novo: as tasks e os contadores de tokens:
+        task_mapping: dict[str, Task] = {}
+        tasks = []
+        for template in warm.templates:
+            # O `context` da task clonada aponta para os clones das tasks anteriores:
+            task_mapping[template.key] = template.copy(warm.crew.agents, task_mapping)
+            tasks.append(task_mapping[template.key])
+        warm.crew.tasks = tasks
+        for crew_agent in warm.crew.agents:
+            crew_agent._token_process = TokenProcess()
+            _reset_llm_usage(crew_agent.llm)
+        try:
+            yield warm.crew
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(warm)
+
+    def kickoff(self, inputs: dict[str, Any]):
+        """Executa uma crew do pool com os `inputs` (seguro entre threads)."""
+        with self.checkout() as crew:
+            return crew.kickoff(inputs=inputs)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"built": self._built, "reused": self._reused, "idle": len(self._idle)}
@@ -1,8 +1,9 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
+
 @CrewBase
-class ContentCrew():
+class ContentCrew:
     """Equipe (crew) para escrita de conteúdo"""
 
     @agent
@@ -40,4 +41,4 @@ class ContentCrew():
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True,
-        )
\ No newline at end of file
+        )
@@ -1,6 +1,8 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
+from guide_creator_flow.crew_factory import CrewFactory
+
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
@@ -45,3 +47,7 @@ class PoemCrew:
             process=Process.sequential,
             verbose=True,
         )
+
+
+# Ready-made crews reused across kickoffs: poem_crews.kickoff(inputs={"sentence_count": 3})
+poem_crews = CrewFactory(PoemCrew)
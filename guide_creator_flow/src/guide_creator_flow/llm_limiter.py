@@ -0,0 +1,180 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script llm_limiter.py
+=====================
+Limite global das chamadas ao LLM do processo: no máximo `max_concurrency`
+chamadas ao mesmo tempo e `requests_per_minute` chamadas por minuto.
+
+No modo batch vários guias rodam ao mesmo tempo, cada um com as suas seções
+em paralelo; sem um limite global, o número de chamadas simultâneas é o
+produto dos dois e a API responde com erros de limite de taxa.
+
+O limite vale para todas as chamadas feitas por `crewai.LLM` (agentes das
+crews, outline e resumos). O lugar é reservado na thread que faz a chamada,
+antes da requisição, e liberado pelos eventos de fim de chamada:
+
+- crewAI 1.x: hook global `before_llm_call` (o barramento de eventos roda os
+  handlers em um pool de threads, então bloquear no evento de início não
+  atrasaria a chamada)
+- crewAI 0.114: evento de início, cujos handlers rodam de forma síncrona na
+  thread que faz a chamada
+
+O lugar de cada chamada fica em uma `ContextVar`: o barramento copia o
+contexto de quem emite o evento, então o evento de fim encontra o lugar
+mesmo quando roda em outra thread.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+try:
+    from crewai.events import (
+        LLMCallCompletedEvent,
+        LLMCallFailedEvent,
+        LLMCallStartedEvent,
+        crewai_event_bus,
+    )
+    from crewai.hooks import register_before_llm_call_hook
+except ImportError:  # crewAI 0.x: sem hooks de LLM e com os eventos em crewai.utilities.events
+    from crewai.utilities.events import (
+        LLMCallCompletedEvent,
+        LLMCallFailedEvent,
+        LLMCallStartedEvent,
+        crewai_event_bus,
+    )
+
+    register_before_llm_call_hook = None
+
+WINDOW_SECONDS = 60.0
+
+
+class LLMSlot:
+    """Lugar reservado por uma chamada ao LLM; liberado uma única vez, pelo primeiro evento de fim."""
+
+    def __init__(self, limiter: "LLMLimiter") -> None:
+        self.limiter = limiter
+        self.held = True
+
+
+# Lugar da chamada em andamento no contexto atual (copiado pelo barramento para os handlers):
+_current_slot: ContextVar[LLMSlot | None] = ContextVar("llm_limiter_slot", default=None)
+
+
+class LLMLimiter:
+    """
+    Semáforo de chamadas simultâneas e janela deslizante de chamadas por minuto.
+
+    Args:
+        max_concurrency: Máximo de chamadas ao mesmo tempo (0: sem limite)
+        requests_per_minute: Máximo de chamadas iniciadas por minuto (0: sem limite)
+    """
+
+    def __init__(self, max_concurrency: int = 0, requests_per_minute: int = 0) -> None:
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._starts: deque = deque()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited_seconds = 0.0
+
+    def _wait_for_rate(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= WINDOW_SECONDS:
+                    self._starts.popleft()
+                if len(self._starts) < self.requests_per_minute:
+                    self._starts.append(now)
+                    return
+                delay = WINDOW_SECONDS - (now - self._starts[0])
+            time.sleep(delay)
+
+    def acquire(self) -> LLMSlot:
+        """Espera um lugar para uma chamada (primeiro a concorrência, depois a taxa)."""
+        started = time.perf_counter()
+        if self._slots is not None:
+            self._slots.acquire()
+        if self.requests_per_minute:
+            self._wait_for_rate()
+        with self._lock:
+            self.calls += 1
+            self.waited_seconds += time.perf_counter() - started
+        return LLMSlot(self)
+
+    def release(self, slot: LLMSlot) -> None:
+        """Libera o lugar de uma chamada (eventos de fim repetidos são ignorados)."""
+        with self._lock:
+            if not slot.held:
+                return
+            slot.held = False
+        if self._slots is not None:
+            self._slots.release()
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {"calls": self.calls, "waited_seconds": round(self.waited_seconds, 3)}
+
+
+class _InstalledLimiter:
+    """Limitador em uso no processo: `install_llm_limiter` substitui `limiter` e registra os handlers uma vez."""
+
+    def __init__(self) -> None:
+        self.limiter: LLMLimiter | None = None
+        self.handlers_registered = False
+
+    def acquire(self) -> None:
+        """Reserva um lugar para a chamada do contexto atual (chamadas aninhadas usam o mesmo lugar)."""
+        slot = _current_slot.get()
+        if self.limiter is None or (slot is not None and slot.held):
+            return
+        _current_slot.set(self.limiter.acquire())
+
+    def release(self) -> None:
+        """Libera o lugar da chamada do contexto atual, no limitador que o reservou."""
+        slot = _current_slot.get()
+        if slot is not None:
+            slot.limiter.release(slot)
+
+
+_installed = _InstalledLimiter()
+
+
+def install_llm_limiter(max_concurrency: int = 0, requests_per_minute: int = 0) -> LLMLimiter:
+    """
+    Aplica um limite global às chamadas ao LLM do processo.
+
+    Os handlers são registrados no crewAI uma única vez; uma nova chamada
+    substitui o limite usado pelas chamadas seguintes.
+
+    Args:
+        max_concurrency: Máximo de chamadas ao mesmo tempo (0: sem limite)
+        requests_per_minute: Máximo de chamadas por minuto (0: sem limite)
+
+    Returns:
+        O limitador instalado (com as estatísticas de chamadas e de espera)
+    """
+    _installed.limiter = LLMLimiter(max_concurrency, requests_per_minute)
+    if not _installed.handlers_registered:
+        _installed.handlers_registered = True
+
+        def on_finished(source, event) -> None:
+            _installed.release()
+
+        if register_before_llm_call_hook is not None:
+
+            def before_llm_call(context) -> None:
+                _installed.acquire()
+
+            register_before_llm_call_hook(before_llm_call)
+        else:
+
+            def on_started(source, event) -> None:
+                _installed.acquire()
+
+            crewai_event_bus.on(LLMCallStartedEvent)(on_started)
+        crewai_event_bus.on(LLMCallCompletedEvent)(on_finished)
+        crewai_event_bus.on(LLMCallFailedEvent)(on_finished)
+    return _installed.limiter
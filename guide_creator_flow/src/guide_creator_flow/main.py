@@ -1,42 +1,111 @@
 #!/usr/bin/env python
 import json
 import os
-from typing import List, Dict
-from pydantic import BaseModel, Field
+import sys
+import time
+
 from crewai import LLM
-from crewai.flow.flow import Flow, listen, start
+from crewai.flow.flow import Flow, FlowState, listen, start
+from dotenv import find_dotenv, load_dotenv
+from pydantic import BaseModel, Field
+
+from guide_creator_flow.checkpoint import DEFAULT_CHECKPOINT_DB, GuideCheckpointStore
+from guide_creator_flow.context_builder import (
+    CONTEXT_SUMMARY,
+    PROMPTS_PER_SECTION,
+    build_context,
+    count_tokens,
+    full_context,
+    summarize_section,
+)
+from guide_creator_flow.crew_factory import CrewFactory
 from guide_creator_flow.crews.content_crew.content_crew import ContentCrew
-from dotenv import load_dotenv, find_dotenv
+from guide_creator_flow.section_scheduler import (
+    GENERATION_PARALLEL,
+    run_in_dependency_order,
+    section_dependencies,
+)
+
 _ = load_dotenv(find_dotenv())  # read local .env file
 
 # Cria o diretório de saída se não existir:
 os.makedirs("output", exist_ok=True)
 
+AUDIENCE_LEVELS = ["iníciante", "intermediário", "avançado"]
+
+# Crews de conteúdo prontas, reutilizadas entre as seções (e entre os guias do modo batch):
+content_crews = CrewFactory(ContentCrew)
+
+
 # Definimos nossos modelos para dados estruturados:
 class Section(BaseModel):
     title: str = Field(description="Título da seção")
     description: str = Field(description="Descrição breve do que a seção deve cobrir")
+    depends_on: list[str] = Field(
+        default_factory=list,
+        description="Títulos das seções anteriores que esta seção precisa ler (vazio se basta o outline)",
+    )
+
 
 class GuideOutline(BaseModel):
     title: str = Field(description="Título do guia")
     introduction: str = Field(description="Introdução ao tópico")
     target_audience: str = Field(description="Descrição do público-alvo")
-    sections: List[Section] = Field(description="Lista de seções no guia")
+    sections: list[Section] = Field(description="Lista de seções no guia")
     conclusion: str = Field(description="Conclusão ou resumo do guia")
 
-# Definimos o estado do fluxo:
-class GuideCreatorState(BaseModel):
+
+# Definimos o estado do fluxo (o `id` de FlowState identifica a execução nos checkpoints):
+class GuideCreatorState(FlowState):
     topic: str = ""
     audience_level: str = ""
-    guide_outline: GuideOutline = None
-    sections_content: Dict[str, str] = {}
+    # Diretório do outline, do guia e do relatório de tokens (um por guia no modo batch):
+    output_dir: str = "output"
+    # None até o outline ser criado (também nos checkpoints das primeiras etapas):
+    guide_outline: GuideOutline | None = None
+    sections_content: dict[str, str] = Field(default_factory=dict)
+    # As variáveis de ambiente são lidas a cada novo estado (e não quando a classe é definida):
+    # "parallel": seções independentes ao mesmo tempo; "sequential": uma por vez, cada uma lendo todas as anteriores:
+    generation_mode: str = Field(default_factory=lambda: os.getenv("GUIDE_GENERATION_MODE", GENERATION_PARALLEL))
+    max_concurrency: int = Field(default_factory=lambda: int(os.getenv("GUIDE_MAX_CONCURRENCY", "4")))
+    # Contexto das seções anteriores (context_builder.py): "summary", "titles" ou "full", com orçamento de tokens:
+    context_mode: str = Field(default_factory=lambda: os.getenv("GUIDE_CONTEXT_MODE", CONTEXT_SUMMARY))
+    context_token_budget: int = Field(default_factory=lambda: int(os.getenv("GUIDE_CONTEXT_TOKEN_BUDGET", "1500")))
+    section_summaries: dict[str, str] = Field(default_factory=dict)
+    # Tokens por seção: contexto enviado, contexto completo equivalente, custo dos resumos e tokens da crew:
+    token_usage: dict[str, dict[str, int]] = Field(default_factory=dict)
+    outline_usage: dict[str, int] = Field(default_factory=dict)
+
 
 class GuideCreatorFlow(Flow[GuideCreatorState]):
     """Fluxo para criar um guia completo sobre qualquer tópico"""
 
+    def _checkpoint(self, step: str) -> None:
+        """Salva o estado da execução (sem persistência, por exemplo no `plot`, não faz nada)"""
+        if self._persistence is not None:
+            self._persistence.save_state(flow_uuid=self.state.id, method_name=step, state_data=self.state)
+
+    def _output_path(self, filename: str) -> str:
+        return os.path.join(self.state.output_dir, filename)
+
     @start()
     def get_user_input(self):
         """Obter entrada do usuário sobre o tópico do guia e o público-alvo"""
+        os.makedirs(self.state.output_dir, exist_ok=True)
+        if self.state.guide_outline is not None:
+            print(f"\nRetomando o guia sobre {self.state.topic} (execução {self.state.id})...\n")
+            return self.state
+        if self.state.topic and self.state.audience_level:
+            # Tópico e público dados em `kickoff(inputs=...)` (modo batch): nada é perguntado:
+            if self.state.audience_level not in AUDIENCE_LEVELS:
+                raise ValueError(
+                    f"Público-alvo inválido: {self.state.audience_level!r} (esperado: {', '.join(AUDIENCE_LEVELS)})"
+                )
+            print(f"\nCriando um guia sobre {self.state.topic} para o público {self.state.audience_level}...")
+            print(f"Id da execução: {self.state.id} (saída em {self.state.output_dir})")
+            self._checkpoint("get_user_input")
+            return self.state
+
         print("\n=== Crie seu guia completo ===\n")
 
         # Obter entrada do usuário:
@@ -45,17 +114,23 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
         # Obtenha o nível de público-alvo com validação:
         while True:
             audience = input("Quem é seu público-alvo? (iníciante/intermediário/avançado) ").lower()
-            if audience in ["iníciante", "intermediário", "avançado"]:
+            if audience in AUDIENCE_LEVELS:
                 self.state.audience_level = audience
                 break
             print("Por favor, insira 'iníciante', 'intermediário' ou 'avançado'")
 
         print(f"\nCriando um guia sobre {self.state.topic} para o público {self.state.audience_level}...\n")
+        print(f"Id da execução: {self.state.id} (para retomar após uma falha: resume {self.state.id})")
+        self._checkpoint("get_user_input")
         return self.state
 
     @listen(get_user_input)
     def create_guide_outline(self, state):
         """Cria o outline do guia usando uma chamada direta ao LLM"""
+        if self.state.guide_outline is not None:
+            print(f"Outline retomado do checkpoint ({len(self.state.guide_outline.sections)} seções)")
+            return self.state.guide_outline
+
         print("Criando o outline do guia...")
 
         # Inicializa o LLM:
@@ -65,7 +140,8 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
         messages = [
             {"role": "system", "content": "Você é um assistente útil projetado para produzir JSON."},
             {"role": "user", "content": f"""
-            Crie um outline detalhado para um guia completo sobre "{state.topic}" para {state.audience_level} nível de aprendiz.
+            Crie um outline detalhado para um guia completo sobre "{state.topic}"
+            para {state.audience_level} nível de aprendiz.
 
             O outline deve incluir:
             1. Um título atraente para o guia
@@ -74,56 +150,163 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
             4. Uma conclusão ou resumo
 
             Para cada seção, forneça um título claro e uma descrição breve do que deve cobrir.
+            Em "depends_on", liste os títulos das seções anteriores que a seção realmente precisa
+            ler para ser escrita (deixe vazio quando o outline basta), para que as seções
+            independentes possam ser escritas em paralelo.
             """}
         ]
 
         # Faz a chamada ao LLM com o formato de resposta JSON:
         response = llm.call(messages=messages)
+        if isinstance(response, GuideOutline):  # crewAI 1.x já devolve o outline validado
+            response = response.model_dump_json()
 
         # Analisa a resposta JSON:
         outline_dict = json.loads(response)
         self.state.guide_outline = GuideOutline(**outline_dict)
+        # Estimativa com o tokenizador (`LLM.call` devolve apenas o texto):
+        self.state.outline_usage = {
+            "prompt_tokens": sum(count_tokens(message["content"]) for message in messages),
+            "completion_tokens": count_tokens(response),
+            "requests": 1,
+        }
 
         # Salva o outline em um arquivo:
-        with open("output/guide_outline.json", "w") as f:
+        with open(self._output_path("guide_outline.json"), "w") as f:
             json.dump(outline_dict, f, indent=2)
 
         print(f"Guia outline criado com {len(self.state.guide_outline.sections)} seções")
+        self._checkpoint("create_guide_outline")
         return self.state.guide_outline
 
+    def _section_context(self, outline, section) -> str:
+        """Constrói o contexto de uma seção: as seções de que ela depende (ou o outline), dentro do orçamento"""
+        if section.depends_on:
+            return build_context(
+                section.depends_on,
+                self.state.sections_content,
+                self.state.section_summaries,
+                mode=self.state.context_mode,
+                token_budget=self.state.context_token_budget,
+            )
+
+        # Seção independente: o outline evita que ela repita o que as outras seções vão cobrir:
+        context = "Nenhuma seção escrita ainda. Outline do guia:\n\n"
+        for other in outline.sections:
+            context += f"- {other.title}: {other.description}\n"
+        return context
+
+    def _write_section(self, outline, section, summary_llm):
+        """
+        Executa a tripulação de conteúdo para uma seção (em uma thread do escalonador).
+
+        Retorna o conteúdo, o resumo (modo "summary", para as seções seguintes) e os tokens da seção.
+        Só lê o estado do fluxo: quem grava o resultado em `self.state` é `write_and_compile_guide`,
+        na thread do fluxo e uma seção por vez (ver `run_in_dependency_order`). Cada kickoff usa
+        uma crew exclusiva do pool `content_crews`.
+        """
+        print(f"Processando seção: {section.title}")
+        previous_sections = self._section_context(outline, section)
+        result = content_crews.kickoff(inputs={
+            "section_title": section.title,
+            "section_description": section.description,
+            "audience_level": self.state.audience_level,
+            "previous_sections": previous_sections,
+            "draft_content": ""
+        })
+
+        # Referência: o texto completo das mesmas seções (no modo sequencial, todas as anteriores):
+        reference = previous_sections
+        if section.depends_on:
+            reference = full_context(section.depends_on, self.state.sections_content)
+        usage = {
+            "context": PROMPTS_PER_SECTION * count_tokens(previous_sections),
+            "full_context": PROMPTS_PER_SECTION * count_tokens(reference),
+            "summary_in": 0,
+            "summary_out": 0,
+            # Tokens informados pela API para todas as chamadas da crew (escrita, revisão):
+            "prompt_tokens": result.token_usage.prompt_tokens,
+            "completion_tokens": result.token_usage.completion_tokens,
+            "requests": result.token_usage.successful_requests,
+        }
+        summary = None
+        if self.state.context_mode == CONTEXT_SUMMARY:
+            # Resumo feito uma única vez, quando a seção termina:
+            summary = summarize_section(summary_llm, section.title, result.raw)
+            usage["summary_in"] = count_tokens(result.raw)
+            usage["summary_out"] = count_tokens(summary)
+        return result.raw, summary, usage
+
+    def llm_usage(self) -> dict[str, int]:
+        """Tokens de todas as chamadas ao LLM do guia: outline, crews de conteúdo e resumos"""
+        keys = ("prompt_tokens", "completion_tokens", "requests")
+        totals = {key: self.state.outline_usage.get(key, 0) for key in keys}
+        for usage in self.state.token_usage.values():
+            totals["prompt_tokens"] += usage.get("prompt_tokens", 0) + usage["summary_in"]
+            totals["completion_tokens"] += usage.get("completion_tokens", 0) + usage["summary_out"]
+            totals["requests"] += usage.get("requests", 0) + (1 if usage["summary_out"] else 0)
+        return totals
+
+    def _token_report(self) -> dict:
+        """Soma os tokens de contexto da execução e a economia em relação ao contexto completo"""
+        totals = {key: sum(usage[key] for usage in self.state.token_usage.values())
+                  for key in ("context", "full_context", "summary_in", "summary_out")}
+        spent = totals["context"] + totals["summary_in"] + totals["summary_out"]
+        report = {
+            "context_mode": self.state.context_mode,
+            "context_token_budget": self.state.context_token_budget,
+            **totals,
+            "saved_tokens": totals["full_context"] - spent,
+            "saving": 1 - spent / totals["full_context"] if totals["full_context"] else 0.0,
+            "llm": self.llm_usage(),
+            "sections": self.state.token_usage,
+        }
+        print(
+            f"Tokens de contexto: {totals['context']} (completo: {totals['full_context']}), "
+            f"resumos: {totals['summary_in']} -> {totals['summary_out']}, economia: {report['saving']:.0%}"
+        )
+        return report
+
     @listen(create_guide_outline)
     def write_and_compile_guide(self, outline):
         """Escreva todas as seções e compile o guia"""
-        print("Escrevendo seções do guia e compilando...")
-        completed_sections = []
+        print(f"Escrevendo seções do guia e compilando (modo {self.state.generation_mode})...")
+        sections = {section.title: section for section in outline.sections}
+        dependencies = section_dependencies(outline.sections, self.state.generation_mode)
+        # No modo sequencial, cada seção lê todas as anteriores (como antes):
+        for title, required in dependencies.items():
+            sections[title] = sections[title].model_copy(update={"depends_on": required})
 
-        # Processa seções uma por uma para manter o fluxo de contexto:
-        for section in outline.sections:
-            print(f"Processando seção: {section.title}")
-
-            # Constrói o contexto a partir das seções anteriores:
-            previous_sections_text = ""
-            if completed_sections:
-                previous_sections_text = "# Seções escritas anteriormente\n\n"
-                for title in completed_sections:
-                    previous_sections_text += f"## {title}\n\n"
-                    previous_sections_text += self.state.sections_content.get(title, "") + "\n\n"
-            else:
-                previous_sections_text = "Nenhuma seção escrita ainda."
-
-            # Executa a tripulação de conteúdo para esta seção:
-            result = ContentCrew().crew().kickoff(inputs={
-                "section_title": section.title,
-                "section_description": section.description,
-                "audience_level": self.state.audience_level,
-                "previous_sections": previous_sections_text,
-                "draft_content": ""
-            })
-
-            # Armazena o conteúdo:
-            self.state.sections_content[section.title] = result.raw
-            completed_sections.append(section.title)
-            print(f"Seção concluída: {section.title}")
+        # Seções já concluídas (execução retomada) não são escritas de novo:
+        done = set(self.state.sections_content)
+        if done:
+            print(f"{len(done)} seções retomadas do checkpoint")
+        pending = {
+            title: [name for name in required if name not in done]
+            for title, required in dependencies.items()
+            if title not in done
+        }
+
+        # Cada seção espera apenas as seções de que depende; as prontas rodam em paralelo:
+        summary_llm = LLM(model="openai/gpt-4o-mini")
+        start = time.perf_counter()
+        for title, (content, summary, usage) in run_in_dependency_order(
+            pending,
+            lambda title: self._write_section(outline, sections[title], summary_llm),
+            max_workers=self.state.max_concurrency,
+        ):
+            # Armazena o conteúdo e o resumo (antes de as seções dependentes começarem):
+            self.state.sections_content[title] = content
+            if summary is not None:
+                self.state.section_summaries[title] = summary
+            self.state.token_usage[title] = usage
+            self._checkpoint(f"section:{title}")
+            print(f"Seção concluída: {title}")
+        print(f"{len(pending)} seções escritas em {time.perf_counter() - start:.1f} s")
+
+        # Relatório de tokens da execução:
+        with open(self._output_path("token_report.json"), "w") as f:
+            json.dump(self._token_report(), f, indent=2)
 
         # Compile o guia final:
         guide_content = f"# {outline.title}\n\n"
@@ -138,24 +321,50 @@ class GuideCreatorFlow(Flow[GuideCreatorState]):
         guide_content += f"## Conclusão\n\n{outline.conclusion}\n\n"
 
         # Salva o guia:
-        with open("output/complete_guide.md", "w") as f:
+        with open(self._output_path("complete_guide.md"), "w") as f:
             f.write(guide_content)
 
-        print("\nGuia completo compilado e salvo em output/complete_guide.md")
+        self._checkpoint("write_and_compile_guide")
+        print(f"\nGuia completo compilado e salvo em {self._output_path('complete_guide.md')}")
         return "Criação de guia concluída com sucesso"
 
+
+def checkpoint_store() -> GuideCheckpointStore:
+    """Checkpoints das execuções (GUIDE_CHECKPOINT_DB, padrão output/guide_checkpoints.db)"""
+    return GuideCheckpointStore(db_path=os.getenv("GUIDE_CHECKPOINT_DB", DEFAULT_CHECKPOINT_DB))
+
+
 def kickoff():
     """Executa o fluxo de criação de guia"""
-    GuideCreatorFlow().kickoff()
+    GuideCreatorFlow(persistence=checkpoint_store()).kickoff()
     print("\n=== Fluxo concluído ===")
     print("Seu guia completo está pronto no diretório output.")
     print("Abra output/complete_guide.md para vê-lo.")
 
+
+def resume():
+    """Retoma uma execução interrompida (id em `resume <id>`; sem id, a mais recente)"""
+    store = checkpoint_store()
+    run_id = sys.argv[1] if len(sys.argv) > 1 else store.latest_run_id()
+    if run_id is None or store.load_state(run_id) is None:
+        print(f"Nenhum checkpoint encontrado{f' para a execução {run_id}' if run_id else ''}.")
+        for run in store.runs():
+            print(f"- {run['id']}  última etapa: {run['step']}  ({run['timestamp']})")
+        sys.exit(1)
+
+    # O crewAI restaura o estado salvo a partir do `id`; as etapas já concluídas são puladas:
+    flow = GuideCreatorFlow(persistence=store)
+    flow.kickoff(inputs={"id": run_id})
+    print("\n=== Fluxo retomado e concluído ===")
+    print(f"Abra {os.path.join(flow.state.output_dir, 'complete_guide.md')} para ver o guia.")
+
+
 def plot():
     """Gera uma visualização do fluxo"""
     flow = GuideCreatorFlow()
     flow.plot("guide_creator_flow")
     print("Visualização do fluxo salva em guide_creator_flow.html")
 
+
 if __name__ == "__main__":
-    kickoff()
\ No newline at end of file
+    kickoff()
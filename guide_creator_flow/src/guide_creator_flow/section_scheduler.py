@@ -0,0 +1,138 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script section_scheduler.py
+===========================
+Escalonador das seções do guia respeitando as dependências entre elas.
+
+Cada seção espera apenas as seções de que depende (`depends_on`); as
+seções prontas rodam em paralelo, até `max_workers` ao mesmo tempo. Assim o
+tempo total de um guia se aproxima do caminho mais longo de dependências,
+e não da soma das seções.
+
+- modo "parallel": as seções sem `depends_on` precisam apenas do outline
+- modo "sequential": cada seção depende de todas as anteriores (uma por vez)
+
+As seções rodam nas threads do pool, mas os resultados são entregues na
+thread de quem consome o iterador: é nela que o fluxo grava o estado
+(`self.state`), uma seção por vez. As threads do pool só leem o estado, e
+apenas o conteúdo das seções de que dependem, gravado antes de elas
+começarem.
+"""
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TypeVar
+
+GENERATION_PARALLEL = "parallel"
+GENERATION_SEQUENTIAL = "sequential"
+GENERATION_MODES = (GENERATION_PARALLEL, GENERATION_SEQUENTIAL)
+
+T = TypeVar("T")
+
+
+def section_dependencies(sections, mode: str = GENERATION_PARALLEL) -> dict[str, list[str]]:
+    """
+    Retorna as dependências de cada seção (título -> títulos das seções esperadas).
+
+    Args:
+        sections: Seções do outline (com `title` e `depends_on`)
+        mode: "parallel" (`depends_on`, restrito às seções anteriores) ou "sequential" (todas as anteriores)
+
+    Returns:
+        Dicionário na ordem do outline
+    """
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"Modo de geração desconhecido: {mode!r} (esperado: {', '.join(GENERATION_MODES)})")
+    titles = [section.title for section in sections]
+    if mode == GENERATION_SEQUENTIAL:
+        return {title: titles[:position] for position, title in enumerate(titles)}
+
+    dependencies = {}
+    for position, section in enumerate(sections):
+        # O outline vem do LLM: só valem títulos de seções anteriores (o que também evita ciclos):
+        previous = set(titles[:position])
+        ignored = [title for title in section.depends_on if title not in previous]
+        if ignored:
+            print(f"Seção {section.title!r}: dependências ignoradas (não são seções anteriores): {ignored}")
+        dependencies[section.title] = [title for title in dict.fromkeys(section.depends_on) if title in previous]
+    return dependencies
+
+
+def validate_dependencies(dependencies: dict[str, list[str]]) -> None:
+    """Verifica que toda dependência é uma seção do guia e que não há ciclos."""
+    for title, required in dependencies.items():
+        unknown = [name for name in required if name not in dependencies]
+        if unknown:
+            raise ValueError(f"A seção {title!r} depende de seções inexistentes: {unknown}")
+
+    # Ordenação topológica (Kahn): sobra alguma seção apenas quando há um ciclo:
+    remaining = {title: set(required) for title, required in dependencies.items()}
+    while remaining:
+        ready = [title for title, required in remaining.items() if not required]
+        if not ready:
+            raise ValueError(f"Dependências circulares entre as seções: {sorted(remaining)}")
+        for title in ready:
+            del remaining[title]
+        for required in remaining.values():
+            required.difference_update(ready)
+
+
+def run_in_dependency_order(
+    dependencies: dict[str, list[str]],
+    run: Callable[[str], T],
+    max_workers: int = 4,
+) -> Iterator[tuple[str, T]]:
+    """
+    Executa `run(título)` para cada seção assim que as suas dependências terminam.
+
+    Os resultados são entregues na thread de quem consome o iterador, na ordem
+    em que terminam. As seções que dependem de uma seção só são submetidas
+    depois que quem consome processou o resultado dela (por exemplo, guardou o
+    conteúdo no estado do fluxo), então `run` pode ler esse conteúdo.
+
+    Se uma seção falha, nenhuma outra começa; as que estavam em andamento são
+    entregues normalmente e a exceção é relançada no fim.
+
+    Args:
+        dependencies: Título -> títulos das seções esperadas (ver `section_dependencies`)
+        run: Função que gera uma seção (executada em uma thread do pool)
+        max_workers: Número máximo de seções geradas ao mesmo tempo
+
+    Yields:
+        (título, resultado de `run`) de cada seção concluída
+    """
+    validate_dependencies(dependencies)
+    waiting = {title: set(required) for title, required in dependencies.items()}
+    running: dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="section") as executor:
+
+        def submit_ready() -> None:
+            for title in [title for title, required in waiting.items() if not required]:
+                del waiting[title]
+                running[executor.submit(run, title)] = title
+
+        submit_ready()
+        error: BaseException | None = None
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                title = running.pop(future)
+                if future.cancelled():
+                    continue
+                if future.exception() is not None:
+                    if error is None:
+                        error = future.exception()
+                        # As seções ainda na fila do pool não começam:
+                        for queued in running:
+                            queued.cancel()
+                    continue
+                yield title, future.result()
+                for required in waiting.values():
+                    required.discard(title)
+            # Depois de uma falha nada novo começa, mas as seções em andamento ainda são entregues
+            # (quem consome pode salvá-las antes de a exceção interromper o guia):
+            if error is None:
+                submit_ready()
+        if error is not None:
+            raise error
@@ -0,0 +1,23 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script conftest.py
+==================
+Configuração comum dos testes do fluxo: o pacote é importado de `src/`, o
+crewAI roda offline (sem tracing e sem telemetria) e as saídas do fluxo
+(`output/`, relativo ao diretório atual) ficam em um diretório temporário.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+os.environ["CREWAI_TRACING_ENABLED"] = "false"
+os.environ["OTEL_SDK_DISABLED"] = "true"
+
+os.chdir(tempfile.mkdtemp(prefix="guide_flow_tests_"))
+
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,88 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_batch.py
+====================
+Teste de fumaça do modo batch: dois guias gerados ao mesmo tempo com o
+cliente da OpenAI substituído por respostas fixas, dividindo um limite
+global de uma chamada ao LLM por vez. Roda no crewAI 0.x (versão do
+uv.lock, via litellm) e no 1.x (provedor nativo da OpenAI).
+"""
+import json
+import threading
+
+from openai._constants import RAW_RESPONSE_HEADER
+from openai.resources.chat.completions import Completions
+from openai.types.chat import ChatCompletion
+
+from guide_creator_flow import batch, context_builder, llm_limiter, main
+
+OUTLINE = {
+    "title": "Guia de teste",
+    "introduction": "Introdução.",
+    "target_audience": "Pessoas que programam em Python",
+    "sections": [
+        {"title": "Conceitos", "description": "O básico"},
+        {"title": "Prática", "description": "Exemplos", "depends_on": ["Conceitos"]},
+    ],
+    "conclusion": "Conclusão.",
+}
+
+
+class RawResponse:
+    """Resposta bruta mínima de `with_raw_response.create`."""
+
+    def __init__(self, completion: ChatCompletion) -> None:
+        self.completion = completion
+        self.headers: dict[str, str] = {}
+
+    def parse(self) -> ChatCompletion:
+        return self.completion
+
+
+def test_batch_kickoff_with_a_stubbed_llm(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    # Contagem aproximada (o tokenizador do gpt-4o é baixado da internet):
+    for module in (main, context_builder):
+        monkeypatch.setattr(module, "count_tokens", lambda text, model="": len(str(text).split()))
+
+    lock = threading.Lock()
+    calls = {"in_flight": 0, "max_in_flight": 0, "total": 0}
+
+    def create(self, **params):
+        with lock:
+            calls["in_flight"] += 1
+            calls["total"] += 1
+            calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+        text = json.dumps(OUTLINE) if "response_format" in params else "Thought: pronto\nFinal Answer: Texto."
+        with lock:
+            calls["in_flight"] -= 1
+        completion = ChatCompletion.model_validate({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": params["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+        # O litellm (crewAI 0.x) pede a resposta bruta e lê os headers antes do parse:
+        return RawResponse(completion) if RAW_RESPONSE_HEADER in params.get("extra_headers", {}) else completion
+
+    monkeypatch.setattr(Completions, "create", create)
+    monkeypatch.setattr(llm_limiter._installed, "limiter", None)
+    limiter = llm_limiter.install_llm_limiter(max_concurrency=1)
+
+    jobs = [
+        {"topic": f"Tópico {n}", "audience_level": "intermediário", "output_dir": str(tmp_path / f"guia-{n}")}
+        for n in (1, 2)
+    ]
+    results = batch.run_batch(jobs, max_guides=2)
+
+    assert [result["status"] for result in results] == ["ok", "ok"]
+    assert all(result["sections"] == 2 for result in results)
+    for job in jobs:
+        guide = (tmp_path / job["output_dir"] / "complete_guide.md").read_text(encoding="utf-8")
+        assert guide.startswith("# Guia de teste")
+    # Cada guia: outline + 2 seções x (escrita, revisão, resumo):
+    assert calls["total"] == limiter.stats()["calls"] == 14
+    assert calls["max_in_flight"] == 1
@@ -0,0 +1,84 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_crew_factory.py
+===========================
+Testes do pool de crews: reutilização entre kickoffs, tasks novas a cada
+kickoff, uso de tokens de cada kickoff e crews descartadas quando um YAML
+da crew muda.
+"""
+import os
+
+from openai._constants import RAW_RESPONSE_HEADER
+from openai.resources.chat.completions import Completions
+from openai.types.chat import ChatCompletion
+
+from guide_creator_flow.crew_factory import CrewFactory
+from guide_creator_flow.crews.poem_crew.poem_crew import PoemCrew
+
+
+def test_checkout_reuses_the_agents_and_clones_the_tasks(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    factory = CrewFactory(PoemCrew)
+    with factory.checkout() as crew:
+        first_agents, first_tasks = list(crew.agents), list(crew.tasks)
+    with factory.checkout() as crew:
+        assert crew.agents == first_agents
+        assert all(task is not first for task, first in zip(crew.tasks, first_tasks, strict=True))
+    assert factory.stats() == {"built": 1, "reused": 1, "idle": 1}
+
+
+class RawResponse:
+    """Resposta bruta mínima de `with_raw_response.create` (litellm, crewAI 0.x)."""
+
+    def __init__(self, completion: ChatCompletion) -> None:
+        self.completion = completion
+        self.headers: dict[str, str] = {}
+
+    def parse(self) -> ChatCompletion:
+        return self.completion
+
+
+def test_each_kickoff_reports_only_its_own_token_usage(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    def create(self, **params):
+        completion = ChatCompletion.model_validate({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": params["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "Thought: pronto\nFinal Answer: Um poema."},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+        return RawResponse(completion) if RAW_RESPONSE_HEADER in params.get("extra_headers", {}) else completion
+
+    monkeypatch.setattr(Completions, "create", create)
+    factory = CrewFactory(PoemCrew)
+    for _ in range(2):
+        with factory.checkout() as crew:
+            result = crew.kickoff(inputs={"sentence_count": 1})
+        # Uma chamada ao LLM por kickoff, também no segundo (a mesma crew do pool):
+        assert (result.token_usage.total_tokens, result.token_usage.successful_requests) == (15, 1)
+    assert factory.stats() == {"built": 1, "reused": 1, "idle": 1}
+
+
+def test_a_changed_yaml_builds_a_new_crew(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    factory = CrewFactory(PoemCrew)
+    with factory.checkout():
+        pass
+
+    tasks_yaml = PoemCrew.base_directory / PoemCrew.original_tasks_config_path
+    times = os.stat(tasks_yaml)
+    os.utime(tasks_yaml, (times.st_atime, times.st_mtime + 1))
+    try:
+        with factory.checkout():
+            pass
+    finally:
+        os.utime(tasks_yaml, (times.st_atime, times.st_mtime))
+    assert factory.stats() == {"built": 2, "reused": 0, "idle": 1}
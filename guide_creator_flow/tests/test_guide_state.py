@@ -0,0 +1,36 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_guide_state.py
+==========================
+Testes do estado do fluxo: valores padrão lidos do ambiente a cada execução
+e checkpoints retomados antes de o outline existir.
+"""
+from guide_creator_flow.checkpoint import GuideCheckpointStore
+from guide_creator_flow.main import GuideCreatorFlow, GuideCreatorState
+
+
+def test_defaults_are_read_from_the_environment_of_each_run(monkeypatch):
+    monkeypatch.setenv("GUIDE_MAX_CONCURRENCY", "2")
+    monkeypatch.setenv("GUIDE_GENERATION_MODE", "sequential")
+    state = GuideCreatorState()
+    assert state.max_concurrency == 2
+    assert state.generation_mode == "sequential"
+
+    state.sections_content["Introdução"] = "texto"
+    assert GuideCreatorState().sections_content == {}
+
+
+def test_a_checkpoint_saved_before_the_outline_is_resumed(tmp_path):
+    store = GuideCheckpointStore(db_path=str(tmp_path / "checkpoints.db"))
+    flow = GuideCreatorFlow(persistence=store)
+    flow.state.topic = "Python assíncrono"
+    flow.state.audience_level = "avançado"
+    flow._checkpoint("get_user_input")
+
+    resumed = GuideCreatorFlow(persistence=store)
+    resumed._restore_state(store.load_state(flow.state.id))
+    assert resumed.state.id == flow.state.id
+    assert resumed.state.topic == "Python assíncrono"
+    assert resumed.state.guide_outline is None
+    assert store.latest_run_id() == flow.state.id
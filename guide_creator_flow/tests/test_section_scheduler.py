@@ -0,0 +1,54 @@
+"""
+Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
+
+Script test_section_scheduler.py
+================================
+Testes do escalonador das seções: paralelismo, ordem das dependências e
+gravação do estado apenas na thread de quem consome os resultados.
+"""
+import threading
+
+import pytest
+
+from guide_creator_flow.section_scheduler import run_in_dependency_order
+
+DEPENDENCIES = {"A": [], "B": [], "C": ["A", "B"]}
+
+
+def test_state_is_written_only_by_the_consumer_thread():
+    state: dict[str, str] = {}
+    both_running = threading.Barrier(2, timeout=10)
+    seen: dict[str, dict[str, str]] = {}
+    run_threads, write_threads = set(), set()
+
+    def run(title: str) -> str:
+        run_threads.add(threading.current_thread().name)
+        if title in ("A", "B"):
+            both_running.wait()  # Falha (BrokenBarrierError) se A e B não rodam ao mesmo tempo
+        # Só lê o estado: o conteúdo das dependências já foi gravado por quem consome
+        seen[title] = {name: state[name] for name in DEPENDENCIES[title]}
+        return f"conteúdo de {title}"
+
+    for title, content in run_in_dependency_order(DEPENDENCIES, run, max_workers=4):
+        write_threads.add(threading.current_thread().name)
+        state[title] = content
+
+    assert write_threads == {threading.current_thread().name}
+    assert all(name.startswith("section") for name in run_threads)
+    assert seen["C"] == {"A": "conteúdo de A", "B": "conteúdo de B"}
+    assert set(state) == {"A", "B", "C"}
+
+
+def test_a_failed_section_stops_its_dependents():
+    delivered = []
+
+    def run(title: str) -> str:
+        if title == "A":
+            raise RuntimeError("falha em A")
+        return title
+
+    with pytest.raises(RuntimeError, match="falha em A"):
+        for title, _ in run_in_dependency_order(DEPENDENCIES, run, max_workers=1):
+            delivered.append(title)
+
+    assert "C" not in delivered
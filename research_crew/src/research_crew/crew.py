@@ -2,13 +2,15 @@
 """
 Senior Data Scientist.: Dr. Eddy Giusepe Chirinos Isidro
 """
+import os
+
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai_tools import SerperDevTool
-import os
+
 
 @CrewBase
-class ResearchCrew():
+class ResearchCrew:
     """Equipe de pesquisa para análise completa de tópicos e geração de relatórios"""
 
     @agent
@@ -47,4 +49,4 @@ class ResearchCrew():
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True,
-        )
\ No newline at end of file
+        )
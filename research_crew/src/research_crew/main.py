@@ -13,8 +13,10 @@ crewai run
 Link de estudo ---> https://docs.crewai.com/guides/crews/first-crew
 """
 import os
+
+from dotenv import find_dotenv, load_dotenv
+
 from research_crew.crew import ResearchCrew
-from dotenv import load_dotenv, find_dotenv
 
 _ = load_dotenv(find_dotenv())  # read local .env file
 